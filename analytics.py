@@ -0,0 +1,237 @@
+"""
+School-wide statistics computed with NumPy.
+
+GradeTable.from_students() flattens the roster once into columnar arrays:
+one row per student (class code, absence count) and one row per grade
+(student index, lesson code, grade). Every aggregate is then a vectorized
+group-by over those arrays (np.bincount, sorting + segment offsets) instead
+of a Python loop per student.
+
+NumPy is optional for the rest of the application; this module raises
+AnalyticsUnavailable when it is not installed.
+"""
+import itertools
+from typing import Dict, List, Optional, Sequence
+
+try:
+    import numpy as np
+except ImportError:  # Optional dependency
+    np = None
+
+PERCENTILES = (10, 25, 50, 75, 90)
+# Grades that are whole numbers in this range are summarised from per-group
+# histograms (one bincount) instead of sorting every grade.
+HISTOGRAM_RANGE = 101
+
+class AnalyticsUnavailable(RuntimeError):
+    pass
+
+def available() -> bool:
+    return np is not None
+
+def _require_numpy():
+    if np is None:
+        raise AnalyticsUnavailable("Analytics require NumPy (pip install numpy).")
+
+def _group_percentiles(values, starts, counts, qs: Sequence[float]):
+    """
+    Percentiles (linear interpolation, like np.percentile) of every segment
+    values[starts[g]:starts[g] + counts[g]] of an array sorted within segments.
+    Returns an array of shape (groups, len(qs)).
+    """
+    qs = np.asarray(qs, dtype=np.float64) / 100.0
+    pos = (counts[:, None] - 1) * qs[None, :]
+    lower = np.floor(pos).astype(np.int64)
+    upper = np.minimum(lower + 1, counts[:, None] - 1)
+    frac = pos - lower
+    base = starts[:, None]
+    return values[base + lower] * (1 - frac) + values[base + upper] * frac
+
+def _histogram_percentiles(cumulative, counts, qs: Sequence[float]):
+    """
+    Same as _group_percentiles, but reading the sorted values off per-group
+    cumulative histograms (shape groups x HISTOGRAM_RANGE) instead of sorted arrays.
+    """
+    qs = np.asarray(qs, dtype=np.float64) / 100.0
+    pos = (counts[:, None] - 1) * qs[None, :]
+    lower = np.floor(pos).astype(np.int64)
+    upper = np.minimum(lower + 1, counts[:, None] - 1)
+    frac = pos - lower
+
+    def value_at(k):
+        # The k-th smallest value is the first bin whose cumulative count exceeds k
+        return (cumulative[:, None, :] > k[:, :, None]).argmax(axis=2)
+
+    return value_at(lower) * (1 - frac) + value_at(upper) * frac
+
+class GradeTable:
+    """Columnar snapshot of the roster's grades. Build it with from_students()."""
+
+    def __init__(self, ids: List[str], names: List[str], class_names: List[str], class_codes,
+                 absences, lessons: List[str], entry_student, entry_lesson, grades):
+        self.ids = ids
+        self.names = names
+        self.class_names = class_names        # class code -> class name
+        self.class_codes = class_codes        # per student
+        self.absences = absences              # per student
+        self.lessons = lessons                # lesson code -> lesson name
+        self.entry_student = entry_student    # per grade
+        self.entry_lesson = entry_lesson      # per grade
+        self.grades = grades                  # per grade (float64)
+        self._small_ints = bool(len(grades)) and bool(np.all(
+            (grades >= 0) & (grades < HISTOGRAM_RANGE) & (grades == np.floor(grades))))
+
+    @classmethod
+    def from_students(cls, students) -> 'GradeTable':
+        _require_numpy()
+        ids, names, class_list, absences = [], [], [], []
+        class_index: Dict[str, int] = {}
+        lesson_index: Dict[str, int] = {}
+        # One entry per (student, lesson); grades are expanded with np.repeat
+        # afterwards, so the Python loop does not touch individual grades.
+        block_student, block_lesson, block_size, blocks = [], [], [], []
+
+        for index, student in enumerate(students):
+            ids.append(student.id)
+            names.append(f"{student.name} {student.surname}")
+            class_list.append(class_index.setdefault(student.class_name, len(class_index)))
+            absences.append(student.absence_count)
+            for lesson, lesson_grades in student.grades.items():
+                block_student.append(index)
+                block_lesson.append(lesson_index.setdefault(lesson, len(lesson_index)))
+                block_size.append(len(lesson_grades))
+                blocks.append(lesson_grades)
+
+        sizes = np.array(block_size, dtype=np.int64)
+        grades = np.fromiter(itertools.chain.from_iterable(blocks), dtype=np.float64, count=int(sizes.sum()))
+        return cls(ids, names, list(class_index), np.array(class_list, dtype=np.int32),
+                   np.array(absences, dtype=np.int64), list(lesson_index),
+                   np.repeat(np.array(block_student, dtype=np.int32), sizes),
+                   np.repeat(np.array(block_lesson, dtype=np.int32), sizes), grades)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    # --- Per-student ---
+
+    def student_averages(self):
+        """Average of all grades per student; NaN for students without grades."""
+        counts = np.bincount(self.entry_student, minlength=len(self))
+        sums = np.bincount(self.entry_student, weights=self.grades, minlength=len(self))
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return sums / counts
+
+    # --- Group-bys ---
+
+    def _describe(self, keys, groups: int):
+        """count/mean/std/min/max/percentiles of the grades grouped by `keys` (one key per grade)."""
+        counts = np.bincount(keys, minlength=groups)
+        sums = np.bincount(keys, weights=self.grades, minlength=groups)
+        squares = np.bincount(keys, weights=self.grades ** 2, minlength=groups)
+        present = counts > 0
+        mean = np.divide(sums, counts, out=np.full(groups, np.nan), where=present)
+        var = np.divide(squares, counts, out=np.full(groups, np.nan), where=present) - mean ** 2
+        std = np.sqrt(np.maximum(var, 0))
+
+        result = {"count": counts, "mean": mean, "std": std,
+                  "min": np.full(groups, np.nan), "max": np.full(groups, np.nan),
+                  "percentiles": np.full((groups, len(PERCENTILES)), np.nan)}
+        if not present.any():
+            return result
+        if self._small_ints:
+            histogram = np.bincount(keys.astype(np.int64) * HISTOGRAM_RANGE + self.grades.astype(np.int64),
+                                    minlength=groups * HISTOGRAM_RANGE).reshape(groups, HISTOGRAM_RANGE)[present]
+            cumulative = np.cumsum(histogram, axis=1)
+            result["min"][present] = (histogram > 0).argmax(axis=1)
+            result["max"][present] = HISTOGRAM_RANGE - 1 - (histogram[:, ::-1] > 0).argmax(axis=1)
+            result["percentiles"][present] = _histogram_percentiles(cumulative, counts[present], PERCENTILES)
+            return result
+
+        # Sort by (group, grade): every group becomes a sorted contiguous segment
+        order = np.lexsort((self.grades, keys))
+        values = self.grades[order]
+        starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+        result["min"][present] = values[starts[present]]
+        result["max"][present] = values[starts[present] + counts[present] - 1]
+        result["percentiles"][present] = _group_percentiles(values, starts[present], counts[present], PERCENTILES)
+        return result
+
+    @staticmethod
+    def _rows(labels: List[str], stats: Dict) -> List[Dict]:
+        rows = []
+        for i, label in enumerate(labels):
+            if not stats["count"][i]:
+                continue
+            row = {"name": label, "count": int(stats["count"][i]), "mean": float(stats["mean"][i]),
+                   "std": float(stats["std"][i]), "min": float(stats["min"][i]), "max": float(stats["max"][i])}
+            row.update({f"p{q}": float(v) for q, v in zip(PERCENTILES, stats["percentiles"][i])})
+            rows.append(row)
+        return rows
+
+    def class_stats(self) -> List[Dict]:
+        """Grade statistics per class (all grades of the class's students), sorted by class."""
+        keys = self.class_codes[self.entry_student]
+        rows = self._rows(self.class_names, self._describe(keys, len(self.class_names)))
+        return sorted(rows, key=lambda r: r["name"])
+
+    def lesson_stats(self) -> List[Dict]:
+        """Grade distribution per lesson, sorted by lesson."""
+        rows = self._rows(self.lessons, self._describe(self.entry_lesson, len(self.lessons)))
+        return sorted(rows, key=lambda r: r["name"])
+
+    def school_stats(self) -> Dict:
+        """Distribution of every grade in the school plus roster totals."""
+        stats = self._describe(np.zeros(len(self.grades), dtype=np.int32), 1)
+        rows = self._rows(["school"], stats)
+        summary = rows[0] if rows else {"name": "school", "count": 0}
+        summary["students"] = len(self)
+        summary["classes"] = len(self.class_names)
+        summary["lessons"] = len(self.lessons)
+        return summary
+
+    def class_rankings(self, class_name: Optional[str] = None) -> Dict[str, List[Dict]]:
+        """
+        Students ranked by general average within each class (or one class).
+        Ties share a rank (1, 2, 2, 4); students without grades are not ranked.
+        """
+        averages = self.student_averages()
+        graded = np.flatnonzero(~np.isnan(averages))
+        if class_name is not None:
+            if class_name not in self.class_names:
+                return {}
+            graded = graded[self.class_codes[graded] == self.class_names.index(class_name)]
+        classes = self.class_codes[graded]
+        order = np.lexsort((-averages[graded], classes))
+        students = graded[order]
+        classes = classes[order]
+        values = averages[students]
+
+        n = len(students)
+        if not n:
+            return {}
+        positions = np.arange(n)
+        group_start = np.r_[True, classes[1:] != classes[:-1]]
+        first_of_group = np.maximum.accumulate(np.where(group_start, positions, 0))
+        new_value = group_start | np.r_[True, values[1:] != values[:-1]]
+        first_of_value = np.maximum.accumulate(np.where(new_value, positions, 0))
+        ranks = first_of_value - first_of_group + 1
+
+        result: Dict[str, List[Dict]] = {}
+        for student, code, rank, value in zip(students.tolist(), classes.tolist(), ranks.tolist(), values.tolist()):
+            result.setdefault(self.class_names[code], []).append(
+                {"rank": rank, "id": self.ids[student], "name": self.names[student], "average": value})
+        return result
+
+    def absence_correlation(self) -> Dict:
+        """Pearson correlation between absence count and general average, over students with grades."""
+        averages = self.student_averages()
+        graded = ~np.isnan(averages)
+        x = self.absences[graded].astype(np.float64)
+        y = averages[graded]
+        result = {"students": int(graded.sum()), "r": None, "slope": None}
+        if len(x) < 2 or x.std() == 0 or y.std() == 0:
+            return result
+        result["r"] = float(np.corrcoef(x, y)[0, 1])
+        # Least-squares change in average per additional absence
+        result["slope"] = float(np.polyfit(x, y, 1)[0])
+        return result
@@ -0,0 +1,198 @@
+"""
+Content-addressed, deduplicated backup store (data/backups/ by default).
+
+A backup is a manifest listing chunks of student records; each chunk is
+stored once under the SHA-256 of its content, so a backup only writes the
+chunks that changed since earlier ones:
+
+    backups/objects/ab/cdef...        chunk: canonical JSON records, one per line
+    backups/manifests/<id>.json       {"id", "created", "students", "chunks": [...]}
+
+Chunk boundaries are content-defined: a chunk ends after a student whose id
+hashes to 0 modulo CHUNK_RECORDS. Editing, adding or removing one student
+therefore changes only the chunk holding it, not every chunk after it.
+Chunks are zlib-compressed unless compress=False (a one-byte header says
+which). prune() applies a retention policy and removes unreferenced chunks.
+"""
+import hashlib
+import json
+import os
+import zlib
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from locking import FileLock
+
+# Average records per chunk
+CHUNK_RECORDS = 64
+# Hard cap, for runs of ids that never hit a boundary
+MAX_CHUNK_RECORDS = CHUNK_RECORDS * 4
+# Retention defaults: the newest KEEP_LAST backups plus the newest one of each of the last KEEP_DAILY days
+KEEP_LAST = 10
+KEEP_DAILY = 30
+
+RAW, COMPRESSED = b'r', b'z'
+
+class BackupNotFound(LookupError):
+    pass
+
+# One shared encoder: json.dumps with options builds a new one per call
+_ENCODER = json.JSONEncoder(sort_keys=True, ensure_ascii=False, separators=(',', ':'))
+
+def _canonical(record: Dict) -> bytes:
+    return _ENCODER.encode(record).encode('utf-8')
+
+def _is_boundary(student_id) -> bool:
+    return zlib.crc32(str(student_id).encode('utf-8')) % CHUNK_RECORDS == 0
+
+def chunk_records(records: Iterable[Dict]) -> Iterator[List[bytes]]:
+    """Groups the canonical encodings of `records` into content-defined chunks."""
+    chunk: List[bytes] = []
+    for record in records:
+        chunk.append(_canonical(record))
+        if _is_boundary(record.get("id")) or len(chunk) >= MAX_CHUNK_RECORDS:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+class BackupStore:
+    """
+    Backups under `root`. With `source` (a data file name), list/find/prune
+    only see that file's backups; chunks are shared by all of them.
+    """
+
+    def __init__(self, root: str, source: Optional[str] = None):
+        self.root = root
+        self.source = source
+        self.objects = os.path.join(root, 'objects')
+        self.manifests = os.path.join(root, 'manifests')
+        # Held while creating or pruning, so pruning never removes a chunk a
+        # concurrent backup is about to reference
+        self._lock = FileLock(os.path.join(root, 'store'))
+
+    def _object_path(self, digest: str) -> str:
+        return os.path.join(self.objects, digest[:2], digest[2:])
+
+    def _write_object(self, digest: str, payload: bytes, compress: bool) -> int:
+        """Stores a chunk unless it is already present. Returns the bytes written."""
+        path = self._object_path(digest)
+        if os.path.exists(path):
+            return 0
+        data = COMPRESSED + zlib.compress(payload, 6) if compress else RAW + payload
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+        return len(data)
+
+    def _read_object(self, digest: str) -> bytes:
+        with open(self._object_path(digest), 'rb') as f:
+            data = f.read()
+        payload = zlib.decompress(data[1:]) if data[:1] == COMPRESSED else data[1:]
+        if hashlib.sha256(payload).hexdigest() != digest:
+            raise ValueError(f"Backup chunk {digest} is corrupt")
+        return payload
+
+    # --- Backups ---
+
+    def create(self, records: Iterable[Dict], compress: bool = True) -> Dict:
+        """
+        Backs up `records` (student dicts, streamed). Returns the manifest plus
+        "new_chunks" and "new_bytes": what this backup actually added to the store.
+        """
+        import storage   # storage imports this module
+
+        now = datetime.now()
+        manifest = {"id": now.strftime("%Y%m%d_%H%M%S_%f"), "created": now.isoformat(), "source": self.source,
+                    "students": 0, "chunks": []}
+        new_chunks = new_bytes = 0
+        with self._lock:
+            for chunk in chunk_records(records):
+                payload = b"\n".join(chunk)
+                digest = hashlib.sha256(payload).hexdigest()
+                written = self._write_object(digest, payload, compress)
+                new_chunks += bool(written)
+                new_bytes += written
+                manifest["chunks"].append(digest)
+                manifest["students"] += len(chunk)
+            storage.atomic_write_json(os.path.join(self.manifests, manifest["id"] + '.json'), manifest)
+        return {**manifest, "new_chunks": new_chunks, "new_bytes": new_bytes}
+
+    def _all(self) -> List[Dict]:
+        if not os.path.isdir(self.manifests):
+            return []
+        result = []
+        for name in sorted(os.listdir(self.manifests)):
+            if name.endswith('.json'):
+                with open(os.path.join(self.manifests, name), 'r', encoding='utf-8') as f:
+                    result.append(json.load(f))
+        return result
+
+    def list(self) -> List[Dict]:
+        """Manifests of this source's backups (every backup without a source), oldest first."""
+        return [b for b in self._all() if self.source is None or b.get("source") == self.source]
+
+    def find(self, backup_id: Optional[str] = None) -> Dict:
+        """
+        The newest backup whose id starts with `backup_id`, so a date
+        (20260118) or date and time (20260118_1430) picks the last backup
+        made then; the newest backup overall if None.
+        """
+        backups = self.list()
+        if backup_id:
+            backups = [b for b in backups if b["id"].startswith(backup_id)]
+        if not backups:
+            raise BackupNotFound(f"No backup matches '{backup_id}'" if backup_id else "No backups yet")
+        return backups[-1]
+
+    def iter_records(self, backup_id: Optional[str] = None) -> Iterator[Dict]:
+        """Streams the student dicts of a backup in their original order."""
+        for digest in self.find(backup_id)["chunks"]:
+            for line in self._read_object(digest).split(b"\n"):
+                yield json.loads(line)
+
+    # --- Retention ---
+
+    def prune(self, keep_last: int = KEEP_LAST, keep_daily: int = KEEP_DAILY) -> Dict:
+        """
+        Deletes backups outside the retention policy, then every chunk no
+        remaining backup references. Returns counts of what was removed.
+        """
+        with self._lock:
+            backups = self.list()
+            keep = {b["id"] for b in backups[-keep_last:]} if keep_last else set()
+            days = []
+            for backup in reversed(backups):
+                day = backup["id"][:8]
+                if day not in days:
+                    days.append(day)
+                    if len(days) <= keep_daily:
+                        keep.add(backup["id"])
+            removed = [b for b in backups if b["id"] not in keep]
+            for backup in removed:
+                os.remove(os.path.join(self.manifests, backup["id"] + '.json'))
+
+            # Chunks are shared with the other sources' backups too
+            referenced = {digest for b in self._all() for digest in b["chunks"]}
+            freed_chunks = freed_bytes = 0
+            if os.path.isdir(self.objects):
+                for prefix in os.listdir(self.objects):
+                    directory = os.path.join(self.objects, prefix)
+                    for name in os.listdir(directory):
+                        if prefix + name in referenced:
+                            continue
+                        path = os.path.join(directory, name)
+                        freed_bytes += os.path.getsize(path)
+                        freed_chunks += 1
+                        os.remove(path)
+        return {"backups": len(removed), "chunks": freed_chunks, "bytes": freed_bytes}
+
+    def disk_usage(self) -> int:
+        total = 0
+        for directory, _, files in os.walk(self.root):
+            total += sum(os.path.getsize(os.path.join(directory, name)) for name in files)
+        return total
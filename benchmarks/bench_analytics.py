@@ -0,0 +1,95 @@
+"""
+Compares the NumPy analytics engine (analytics.GradeTable) with a naive
+pure-Python implementation of the same statistics: class and lesson
+distributions (mean, std, percentiles), within-class rankings and the
+absence/average correlation. Results are checked to agree.
+
+Usage: python benchmarks/bench_analytics.py [--sizes 10000 100000] [--repeat 3]
+"""
+import argparse
+import math
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_save import make_students
+from analytics import PERCENTILES, GradeTable
+from models import Student
+
+def percentile(sorted_values, q):
+    pos = (len(sorted_values) - 1) * q / 100
+    lower = math.floor(pos)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (pos - lower)
+
+def describe(values):
+    values = sorted(values)
+    row = {"count": len(values), "mean": statistics.fmean(values), "std": statistics.pstdev(values),
+           "min": values[0], "max": values[-1]}
+    row.update({f"p{q}": percentile(values, q) for q in PERCENTILES})
+    return row
+
+def naive(students):
+    by_class, by_lesson = {}, {}
+    for s in students:
+        for lesson, grades in s.grades.items():
+            by_class.setdefault(s.class_name, []).extend(grades)
+            by_lesson.setdefault(lesson, []).extend(grades)
+    class_stats = {name: describe(v) for name, v in by_class.items()}
+    lesson_stats = {name: describe(v) for name, v in by_lesson.items()}
+
+    rankings = {}
+    for s in students:
+        if s.stats.count:
+            rankings.setdefault(s.class_name, []).append((s.average(), s.id))
+    for ranked in rankings.values():
+        ranked.sort(key=lambda item: -item[0])
+
+    graded = [s for s in students if s.stats.count]
+    r = statistics.correlation([float(s.absence_count) for s in graded], [s.average() for s in graded])
+    return class_stats, lesson_stats, rankings, r
+
+def vectorized(students):
+    table = GradeTable.from_students(students)
+    return table, table.class_stats(), table.lesson_stats(), table.class_rankings(), table.absence_correlation()
+
+def check(naive_result, fast_result):
+    class_stats, lesson_stats, rankings, r = naive_result
+    _, fast_classes, fast_lessons, fast_rankings, correlation = fast_result
+    for expected, rows in ((class_stats, fast_classes), (lesson_stats, fast_lessons)):
+        for row in rows:
+            for key, value in expected[row["name"]].items():
+                assert math.isclose(row[key], value, rel_tol=1e-9, abs_tol=1e-9), (row["name"], key)
+    for class_name, ranked in rankings.items():
+        assert [e["average"] for e in fast_rankings[class_name]] == [avg for avg, _ in ranked]
+    assert math.isclose(correlation["r"], r, rel_tol=1e-9)
+
+def best_of(fn, repeat):
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'students':>10} {'naive':>10} {'numpy':>10} {'(build)':>10} {'(stats)':>10} {'speedup':>8}")
+    for size in args.sizes:
+        students = [Student.from_dict(d) for d in make_students(size)]
+        naive_time, naive_result = best_of(lambda: naive(students), args.repeat)
+        fast_time, fast_result = best_of(lambda: vectorized(students), args.repeat)
+        build_time, table = best_of(lambda: GradeTable.from_students(students), args.repeat)
+        check(naive_result, fast_result)
+        print(f"{size:>10} {naive_time:>9.3f}s {fast_time:>9.3f}s {build_time:>9.3f}s "
+              f"{fast_time - build_time:>9.3f}s {naive_time / fast_time:>7.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Compares the deduplicated backup store (backup_store.py) with the previous
+approach of copying the whole data file per backup. Takes --backups backups
+of a roster, editing --changes students between them, and reports backup
+time, restore time and the disk space all backups occupy.
+
+Usage: python benchmarks/bench_backup.py [--students 100000] [--backups 10] [--changes 100]
+"""
+import argparse
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_save import SUBJECTS, make_students
+import storage
+from backup_store import BackupStore
+
+def directory_size(path: str) -> int:
+    return sum(os.path.getsize(os.path.join(d, f)) for d, _, files in os.walk(path) for f in files)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--students", type=int, default=100000)
+    parser.add_argument("--backups", type=int, default=10)
+    parser.add_argument("--changes", type=int, default=100, help="Students edited between backups")
+    args = parser.parse_args()
+
+    rng = random.Random(1)
+    data = make_students(args.students)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "students.json")
+        copies = os.path.join(tmp, "copies")
+        os.makedirs(copies)
+        store = BackupStore(os.path.join(tmp, "store"), "students.json")
+        copy_time = store_time = 0.0
+
+        for i in range(args.backups):
+            for student in rng.sample(data, args.changes):
+                student["grades"].setdefault(rng.choice(SUBJECTS), []).append(rng.randint(40, 100))
+            storage.save_data(data, path)
+
+            start = time.perf_counter()
+            shutil.copy2(path, os.path.join(copies, f"students.json.{i}.bak"))
+            copy_time += time.perf_counter() - start
+
+            start = time.perf_counter()
+            store.create(storage.iter_data(path))
+            store_time += time.perf_counter() - start
+
+        start = time.perf_counter()
+        storage.load_data(os.path.join(copies, f"students.json.{args.backups - 1}.bak"))
+        copy_restore = time.perf_counter() - start
+        start = time.perf_counter()
+        restored = list(store.iter_records())
+        store_restore = time.perf_counter() - start
+        assert restored == storage.load_data(path)
+
+        print(f"{args.students} students, {args.backups} backups, {args.changes} students edited between backups")
+        print(f"  {'':<14} {'backup (avg)':>12} {'restore':>9} {'disk':>10}")
+        print(f"  {'full copies':<14} {copy_time / args.backups:11.3f}s {copy_restore:8.3f}s "
+              f"{directory_size(copies) / 2**20:8.1f} MiB")
+        print(f"  {'backup store':<14} {store_time / args.backups:11.3f}s {store_restore:8.3f}s "
+              f"{directory_size(store.root) / 2**20:8.1f} MiB")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+Measures the streaming CSV exporter (csv_export.write_csv): time and peak
+traced memory for the wide, long and gzip layouts, reading students one at
+a time from a JSON Lines file so the roster is never held in memory.
+
+Usage: python benchmarks/bench_export.py [--sizes 10000 100000]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_save import make_students
+import csv_export
+import storage
+from models import Student
+
+LAYOUTS = [
+    ("wide", "out.csv", {}),
+    ("wide + lesson averages", "out.csv", {"lesson_averages": True}),
+    ("long", "out.csv", {"long": True}),
+    ("wide, gzip", "out.csv.gz", {}),
+]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in args.sizes:
+            snapshot = os.path.join(tmp, "students.json")
+            storage.save_data(make_students(size), snapshot)
+            storage.convert_to_jsonl(snapshot, os.path.join(tmp, "students.jsonl"))
+            source = storage.JsonBackend(os.path.join(tmp, "students.jsonl"))
+
+            def students():
+                return (Student.from_dict(d) for d in source.iter_students())
+
+            lessons = csv_export.lessons_of(students())
+            print(f"{size} students")
+            for label, name, options in LAYOUTS:
+                path = os.path.join(tmp, name)
+                start = time.perf_counter()
+                rows = csv_export.write_csv(students(), path, lessons=lessons, **options)
+                elapsed = time.perf_counter() - start
+                # Traced separately: tracemalloc slows the run down several times
+                tracemalloc.start()
+                csv_export.write_csv(students(), path, lessons=lessons, **options)
+                peak = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+                print(f"  {label:<24} {rows:>9} rows  {elapsed:7.2f}s  peak {peak / 1024:7.0f} KiB  "
+                      f"{os.path.getsize(path) / 2**20:7.1f} MiB")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+"""
+Times StudentManager.import_students on generated JSON Lines and CSV files,
+with parsing in-process (--workers 1) and in a process pool (one worker per
+CPU), into an empty JSON store, including the final snapshot rewrite.
+
+Usage: python benchmarks/bench_import.py [--students 100000]
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_save import make_students
+import csv_export
+import storage
+from models import Student
+from services import StudentManager
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--students", type=int, default=100000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        jsonl = os.path.join(tmp, "input.jsonl")
+        with open(jsonl, "w", encoding="utf-8") as f:
+            for data in make_students(args.students):
+                f.write(json.dumps(data, ensure_ascii=False) + "\n")
+        csv_path = os.path.join(tmp, "input.csv")
+        csv_export.write_csv((Student.from_dict(d) for d in make_students(args.students)), csv_path)
+
+        print(f"{args.students} students, {os.cpu_count()} CPUs")
+        for label, path in (("jsonl", jsonl), ("csv", csv_path)):
+            for workers in sorted({1, os.cpu_count() or 1}):
+                target = os.path.join(tmp, f"students-{label}-{workers}.json")
+                manager = StudentManager(storage.JsonBackend(target))
+                start = time.perf_counter()
+                report = manager.import_students(path, workers=workers)
+                elapsed = time.perf_counter() - start
+                print(f"  {label:<6} workers={workers:<3} {elapsed:7.2f}s  "
+                      f"{report.imported / elapsed:9.0f} students/s  ({report})")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""
+Compares resident memory of the default Student dataclass, the compact
+slotted/array-backed CompactStudent and the SummaryStudent roster summary
+(grade histories kept out of memory) for the same roster. Raise --grades
+to see how each grows with longer grade histories.
+
+Usage: python benchmarks/bench_memory.py [--sizes 10000 100000] [--grades 3]
+"""
+import argparse
+import gc
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_save import make_students
+from models import MODELS
+
+def measure(model, text: str):
+    """Parses and builds the roster under tracemalloc; only what the students retain is counted."""
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    students = [model.from_dict(d) for d in json.loads(text)]
+    gc.collect()
+    elapsed = time.perf_counter() - start
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del students
+    return current, elapsed
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--grades", type=int, default=3, help="Grades per lesson")
+    args = parser.parse_args()
+
+    print(f"{'Students':>10} | {'Model':>8} | {'MB':>8} | {'Bytes/student':>13} | {'Load (s)':>9}")
+    print("-" * 62)
+    for size in args.sizes:
+        text = json.dumps(make_students(size, grades_per_lesson=args.grades))
+        for name, model in MODELS.items():
+            used, elapsed = measure(model, text)
+            print(f"{size:>10} | {name:>8} | {used / (1024 * 1024):>8.1f} | {used // size:>13} | {elapsed:>9.2f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Compares StudentManager.rank_students() (heap-based top-K selection) with
+sorting the whole roster, for typical queries: the top 20 by average, a
+page further down the ranking, the top 20 of one class and the most absent
+students. Results are checked to agree.
+
+Usage: python benchmarks/bench_ranking.py [--students 100000] [--repeat 5]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_save import make_students
+import storage
+from services import StudentManager
+
+def best(fn, repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--students", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "students.json")
+        storage.save_data(make_students(args.students), path)
+        manager = StudentManager(storage.JsonBackend(path))
+    students = manager.students
+    class_name = students[0].class_name
+
+    queries = [
+        ("top 20 by average",
+         lambda: sorted(students, key=lambda s: s.average(), reverse=True)[:20],
+         lambda: manager.rank_students("average", limit=20)),
+        ("page 10 (offset 180, limit 20)",
+         lambda: sorted(students, key=lambda s: s.average(), reverse=True)[180:200],
+         lambda: manager.rank_students("average", limit=20, offset=180)),
+        (f"top 20 of class {class_name}",
+         lambda: sorted((s for s in students if s.class_name == class_name),
+                        key=lambda s: s.average(), reverse=True)[:20],
+         lambda: manager.rank_students("average", limit=20, class_name=class_name)),
+        ("top 20 by absence",
+         lambda: sorted(students, key=lambda s: s.absence_count, reverse=True)[:20],
+         lambda: manager.rank_students("absence", limit=20)),
+    ]
+
+    print(f"{args.students} students")
+    print(f"  {'query':<32} {'full sort':>10} {'top-k':>10} {'speedup':>8}")
+    for label, full, ranked in queries:
+        assert full() == ranked(), label
+        full_time, ranked_time = best(full, args.repeat), best(ranked, args.repeat)
+        print(f"  {label:<32} {full_time:9.4f}s {ranked_time:9.4f}s {full_time / ranked_time:7.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Compares the cost of writing students.json with the old truncate-and-dump path
+against the atomic temp-file + fsync + rename path used by storage.save_data.
+
+Usage: python benchmarks/bench_save.py [--sizes 10000 100000 1000000] [--repeat 3]
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import storage
+
+SUBJECTS = ["Math", "Physics", "Chemistry", "Biology", "History", "Literature", "English", "Geography"]
+
+def make_students(count: int, seed: int = 0, grades_per_lesson: int = 3):
+    rng = random.Random(seed)
+    return [{
+        "id": f"{i:08d}-0000-4000-8000-000000000000",
+        "name": f"Name{i}",
+        "surname": f"Surname{i}",
+        "class_name": rng.choice(["9-A", "10-B", "11-A", "12-C"]),
+        "grades": {lesson: [rng.randint(40, 100) for _ in range(grades_per_lesson)]
+                   for lesson in rng.sample(SUBJECTS, 5)},
+        "absence_count": rng.randint(0, 15),
+        "created_at": "2026-01-14T21:39:28.704517",
+        "updated_at": "2026-01-14T21:39:28.704517",
+    } for i in range(count)]
+
+def legacy_save(path: str, data):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=4, ensure_ascii=False)
+
+def atomic_save(path: str, data):
+    storage.atomic_write_json(path, data, indent=4, ensure_ascii=False)
+
+def best_of(fn, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'Students':>10} | {'Legacy (s)':>10} | {'Atomic (s)':>10} | {'Overhead':>8} | {'File MB':>8}")
+    print("-" * 60)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'students.json')
+        for size in args.sizes:
+            data = make_students(size)
+            legacy = best_of(lambda: legacy_save(path, data), args.repeat)
+            atomic = best_of(lambda: atomic_save(path, data), args.repeat)
+            size_mb = os.path.getsize(path) / (1024 * 1024)
+            print(f"{size:>10} | {legacy:>10.3f} | {atomic:>10.3f} | {atomic / legacy - 1:>+8.1%} | {size_mb:>8.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""
+Load test for the HTTP/JSON API (server.py). Opens --clients keep-alive
+connections that each send --requests requests, a --write-ratio share of
+them writes (grade / attendance updates), and reports throughput and
+latency percentiles.
+
+Without --url, a server is started in-process on a temporary copy of
+generated data, so the run never touches data/.
+
+Usage: python benchmarks/bench_server.py [--students 10000] [--clients 50]
+                                         [--requests 200] [--write-ratio 0.2]
+                                         [--url http://127.0.0.1:8080]
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from urllib.parse import urlsplit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_save import SUBJECTS, make_students
+import storage
+from jobs import JobRunner
+from server import StudentServer
+from services import StudentManager
+
+async def request(reader, writer, method: str, path: str, body=None):
+    payload = b"" if body is None else json.dumps(body).encode("utf-8")
+    writer.write((f"{method} {path} HTTP/1.1\r\nHost: bench\r\nContent-Length: {len(payload)}\r\n"
+                  f"Content-Type: application/json\r\n\r\n").encode("latin-1") + payload)
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        if name.lower() == "content-length":
+            length = int(value)
+    if length:
+        await reader.readexactly(length)
+    return status
+
+async def client(host: str, port: int, ids, count: int, write_ratio: float, seed: int, latencies, errors):
+    rng = random.Random(seed)
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        for _ in range(count):
+            student_id = rng.choice(ids)
+            roll = rng.random()
+            if roll < write_ratio / 2:
+                call = ("POST", f"/students/{student_id}/grades", {"lesson": rng.choice(SUBJECTS), "grade": rng.randint(40, 100)})
+            elif roll < write_ratio:
+                call = ("POST", f"/students/{student_id}/attendance", {"amount": 1})
+            elif roll < 0.9:
+                call = ("GET", f"/students/{student_id}", None)
+            else:
+                call = ("GET", f"/students/{student_id}/average", None)
+            start = time.perf_counter()
+            status = await request(reader, writer, *call)
+            latencies.append(time.perf_counter() - start)
+            if status >= 400:
+                errors.append(status)
+    finally:
+        writer.close()
+
+async def load(host: str, port: int, ids, clients: int, requests: int, write_ratio: float):
+    latencies, errors = [], []
+    start = time.perf_counter()
+    await asyncio.gather(*(client(host, port, ids, requests, write_ratio, seed, latencies, errors)
+                           for seed in range(clients)))
+    return time.perf_counter() - start, latencies, errors
+
+def start_local_server(students: int, directory: str):
+    """Runs a StudentServer on its own event loop thread; returns (host, port, ids)."""
+    path = os.path.join(directory, "students.json")
+    storage.save_data(make_students(students), path)
+    jobs = JobRunner()
+    manager = jobs.submit(StudentManager, storage.JsonBackend(path)).result()
+    app = StudentServer(manager, jobs)
+    loop = asyncio.new_event_loop()
+    ready = threading.Event()
+
+    async def main():
+        started = asyncio.Event()
+        task = asyncio.create_task(app.serve("127.0.0.1", 0, started))
+        await started.wait()
+        ready.set()
+        await task
+
+    threading.Thread(target=loop.run_until_complete, args=(main(),), daemon=True).start()
+    ready.wait()
+    return app.address[0], app.address[1], [s.id for s in manager.students]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--students", type=int, default=10000)
+    parser.add_argument("--clients", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=200, help="Requests per client")
+    parser.add_argument("--write-ratio", type=float, default=0.2)
+    parser.add_argument("--url", help="Benchmark a running server instead of starting one")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.url:
+            url = urlsplit(args.url)
+            host, port = url.hostname, url.port or 80
+
+            async def fetch_ids():
+                reader, writer = await asyncio.open_connection(host, port)
+                writer.write(f"GET /students HTTP/1.1\r\nHost: bench\r\nConnection: close\r\n\r\n".encode("latin-1"))
+                raw = await reader.read()
+                writer.close()
+                return [s["id"] for s in json.loads(raw.split(b"\r\n\r\n", 1)[1])]
+
+            ids = asyncio.run(fetch_ids())
+        else:
+            host, port, ids = start_local_server(args.students, tmp)
+
+        elapsed, latencies, errors = asyncio.run(
+            load(host, port, ids, args.clients, args.requests, args.write_ratio))
+
+    total = len(latencies)
+    quantiles = statistics.quantiles(latencies, n=100)
+    print(f"{args.clients} clients x {args.requests} requests ({args.write_ratio:.0%} writes) "
+          f"against {len(ids)} students")
+    print(f"  {total / elapsed:10.0f} req/s   {elapsed:.2f}s total   {len(errors)} errors")
+    print(f"  latency p50 {quantiles[49] * 1000:.2f} ms   p95 {quantiles[94] * 1000:.2f} ms   "
+          f"p99 {quantiles[98] * 1000:.2f} ms   max {max(latencies) * 1000:.2f} ms")
+
+if __name__ == "__main__":
+    main()
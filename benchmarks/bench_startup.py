@@ -0,0 +1,50 @@
+"""
+Measures StudentManager start-up time (load + Student construction) from a
+students.json snapshot: without the binary snapshot cache, on the first run
+(cache rebuilt), and on later runs (cache fresh).
+
+Usage: python benchmarks/bench_startup.py [--sizes 10000 100000 1000000]
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_save import make_students
+import snapshot_cache
+import storage
+from services import StudentManager
+
+def timed_start(path: str, use_cache: bool) -> float:
+    start = time.perf_counter()
+    manager = StudentManager(storage.JsonBackend(path, use_cache=use_cache))
+    elapsed = time.perf_counter() - start
+    del manager
+    return elapsed
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    args = parser.parse_args()
+
+    print(f"{'Students':>10} | {'No cache (s)':>12} | {'Rebuild (s)':>11} | {'Cached (s)':>10} | {'Speed-up':>8}")
+    print("-" * 66)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'students.json')
+        for size in args.sizes:
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(make_students(size), f, indent=4, ensure_ascii=False)
+            if os.path.exists(snapshot_cache.cache_file(path)):
+                os.remove(snapshot_cache.cache_file(path))
+
+            plain = timed_start(path, use_cache=False)
+            rebuild = timed_start(path, use_cache=True)
+            cached = timed_start(path, use_cache=True)
+            print(f"{size:>10} | {plain:>12.2f} | {rebuild:>11.2f} | {cached:>10.2f} | {plain / cached:>7.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,253 @@
+"""
+Benchmark suite for the StudentManager, storage and GUI refresh hot paths.
+
+Generates a seeded dataset (generate_test_data), then times each case:
+loading, add_student, add_grade, calculate_average, attendance updates,
+class roll calls, absence range and streak queries, sorted listing, search, the GUI list refresh (the data side of
+gui.refresh_list: search plus formatting the visible rows, without Tk),
+CSV export and backup. Every case reports throughput, latency percentiles
+and the peak memory (tracemalloc) of one extra call.
+
+Results can be written as JSON (--output) and compared with an earlier
+results file (--baseline): a case whose median latency or peak memory grew
+by more than --threshold is reported as a regression and the exit status
+is 1, so the suite can gate CI.
+
+Usage: python benchmarks/bench_suite.py [--students 100000] [--backend json] [--cases load search]
+                                        [--output results.json] [--baseline baseline.json] [--threshold 0.25]
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import generate_test_data
+import storage
+from services import StudentManager
+
+# Rows formatted per GUI refresh: a window of about 30 rows plus gui.ROW_BUFFER on each side
+GUI_ROWS = 30 + 2 * 50
+# Grades of the generated dataset carry one of these terms, a date and a weight
+TERMS = ["2025-1", "2025-2"]
+SEARCH_QUERIES = ["ali", "yılmaz", "10-a", "ayşe kaya", "e", "mehmet 12"]
+# Smaller changes are timer and allocator noise, whatever the ratio
+MIN_CHANGE = {"p50_ms": 0.01, "peak_kib": 64}
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    index = min(len(sorted_values) - 1, max(0, round(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+class Context:
+    """The dataset and the manager the cases run against."""
+
+    def __init__(self, path: str, backend: str, seed: int):
+        self.path = path
+        self.backend_name = backend
+        self.rng = random.Random(seed)
+        self.manager = StudentManager(self.backend())
+        self.ids = [s.id for s in self.manager.students]
+
+    def backend(self) -> storage.StorageBackend:
+        if self.backend_name == "sqlite":
+            from sqlite_storage import SQLiteBackend
+            return SQLiteBackend(self.path)
+        return storage.JsonBackend(self.path)
+
+    def random_id(self) -> str:
+        return self.rng.choice(self.ids)
+
+def _load(ctx: Context):
+    StudentManager(ctx.backend())
+
+def _add_student(ctx: Context):
+    student = ctx.manager.add_student("Bench", "Student", "9-A")
+    ctx.ids.append(student.id)
+
+def _add_grade(ctx: Context):
+    ctx.manager.add_grade(ctx.random_id(), "Math", ctx.rng.randint(0, 100))
+
+def _average(ctx: Context):
+    ctx.manager.calculate_average(ctx.random_id())
+
+def _term_average(ctx: Context):
+    ctx.manager.calculate_average(ctx.random_id(), term=ctx.rng.choice(TERMS), weighted=True)
+
+def _attendance(ctx: Context):
+    ctx.manager.update_attendance(ctx.random_id(), 1)
+
+def _roll_call(ctx: Context):
+    class_name = ctx.rng.choice(generate_test_data.CLASSES)
+    roster = ctx.manager.get_class_roster(class_name)
+    absent = [s.id for s in ctx.rng.sample(roster, min(len(roster), 3))]
+    ctx.manager.roll_call(class_name, absent, ctx.rng.choice(generate_test_data.SCHOOL_DAYS))
+
+def _absence_range(ctx: Context):
+    start = ctx.rng.randrange(len(generate_test_data.SCHOOL_DAYS) - 20)
+    ctx.manager.absences_between(generate_test_data.SCHOOL_DAYS[start], generate_test_data.SCHOOL_DAYS[start + 20])
+
+def _absence_streaks(ctx: Context):
+    ctx.manager.absence_streaks(3)
+
+def _list_sorted(ctx: Context):
+    ctx.manager.list_students(sort_by="average")
+
+def _list_sorted_term(ctx: Context):
+    ctx.manager.list_students(sort_by="average", term=ctx.rng.choice(TERMS), weighted=True)
+
+def _search(ctx: Context):
+    ctx.manager.search(ctx.rng.choice(SEARCH_QUERIES))
+
+def _gui_refresh(ctx: Context):
+    # What refresh_list/_render_window compute before touching the Treeview
+    rows = [s.id for s in ctx.manager.search(ctx.rng.choice(SEARCH_QUERIES))]
+    for student_id in rows[:GUI_ROWS]:
+        s = ctx.manager.get_student(student_id)
+        (s.id, s.name, s.surname, s.class_name, s.absence_count, f"{s.average():.2f}")
+
+def _export(ctx: Context):
+    ctx.manager.export_csv(os.path.join(os.path.dirname(ctx.path), "export.csv"))
+
+def _backup(ctx: Context):
+    ctx.manager.backup_data()
+
+# name -> (function, calls per --repeat): cheap operations run many times for stable percentiles
+CASES: Dict[str, Tuple[Callable[[Context], None], int]] = {
+    "load": (_load, 1),
+    "calculate_average": (_average, 2000),
+    "term_average": (_term_average, 2000),
+    "list_sorted": (_list_sorted, 1),
+    "list_sorted_term": (_list_sorted_term, 1),
+    "search": (_search, 50),
+    "gui_refresh": (_gui_refresh, 20),
+    "add_student": (_add_student, 200),
+    "add_grade": (_add_grade, 200),
+    "update_attendance": (_attendance, 200),
+    "roll_call": (_roll_call, 5),
+    "absence_range": (_absence_range, 5),
+    "absence_streaks": (_absence_streaks, 1),
+    "export_csv": (_export, 1),
+    "backup": (_backup, 1),
+}
+
+def run_case(ctx: Context, fn: Callable[[Context], None], calls: int, memory: bool) -> Dict:
+    latencies = []
+    for _ in range(calls):
+        start = time.perf_counter()
+        fn(ctx)
+        latencies.append(time.perf_counter() - start)
+    total = sum(latencies)
+    latencies.sort()
+    result = {
+        "ops": calls,
+        "seconds": round(total, 6),
+        "ops_per_sec": round(calls / total, 2) if total else None,
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 4),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 4),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 4),
+        "max_ms": round(latencies[-1] * 1000, 4),
+    }
+    if memory:
+        # Measured separately: tracemalloc would slow down the timed calls
+        tracemalloc.start()
+        fn(ctx)
+        result["peak_kib"] = round(tracemalloc.get_traced_memory()[1] / 1024, 1)
+        tracemalloc.stop()
+    return result
+
+def compare(results: Dict, baseline: Dict, threshold: float) -> List[str]:
+    """Descriptions of the cases that got slower or bigger than `threshold` allows."""
+    regressions = []
+    for name, current in results["cases"].items():
+        before = baseline.get("cases", {}).get(name)
+        if not before:
+            continue
+        for metric, min_change in MIN_CHANGE.items():
+            old, new = before.get(metric), current.get(metric)
+            if old and new and new > old * (1 + threshold) and new - old > min_change:
+                regressions.append(f"{name}: {metric} {old} -> {new} ({new / old - 1:+.0%})")
+    return regressions
+
+def print_results(results: Dict, baseline: Optional[Dict]):
+    print(f"{'case':<18} {'ops':>6} {'ops/s':>11} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'peak KiB':>10}"
+          + (f" {'p50 vs base':>12}" if baseline else ""))
+    for name, r in results["cases"].items():
+        line = (f"{name:<18} {r['ops']:>6} {r['ops_per_sec'] or 0:>11.1f} {r['p50_ms']:>9.3f} "
+                f"{r['p95_ms']:>9.3f} {r['p99_ms']:>9.3f} {r.get('peak_kib', 0):>10.1f}")
+        before = (baseline or {}).get("cases", {}).get(name)
+        if before and before.get("p50_ms"):
+            line += f" {r['p50_ms'] / before['p50_ms'] - 1:>+12.1%}"
+        print(line)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--students", type=int, default=100000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--backend", choices=generate_test_data.FORMATS, default="json")
+    parser.add_argument("--cases", nargs="+", choices=CASES, default=list(CASES), help="Cases to run, in order")
+    parser.add_argument("--repeat", type=int, default=3, help="Multiplies every case's call count")
+    parser.add_argument("--no-memory", action="store_true", help="Skip the peak memory measurements")
+    parser.add_argument("--output", help="Write the results to this JSON file")
+    parser.add_argument("--baseline", help="Compare with an earlier --output file")
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="Relative growth counted as a regression (default: 0.25)")
+    args = parser.parse_args()
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+
+    results = {
+        "meta": {
+            "date": datetime.now().isoformat(timespec="seconds"),
+            "students": args.students,
+            "seed": args.seed,
+            "backend": args.backend,
+            "model": os.environ.get("STUDENT_MODEL", "default"),
+            "repeat": args.repeat,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+        },
+        "cases": {},
+    }
+    if baseline:
+        differs = [k for k in ("students", "backend", "model") if baseline["meta"].get(k) != results["meta"][k]]
+        if differs:
+            print(f"Warning: the baseline was run with a different {', '.join(differs)}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "students.db" if args.backend == "sqlite" else f"students.{args.backend}")
+        start = time.perf_counter()
+        generate_test_data.generate(args.students, path, args.backend, args.seed,
+                                    generate_test_data.DataSpec(terms=TERMS))
+        print(f"Generated {args.students} students ({args.backend}) in {time.perf_counter() - start:.1f}s")
+        ctx = Context(path, args.backend, args.seed)
+        for name in args.cases:
+            fn, calls = CASES[name]
+            results["cases"][name] = run_case(ctx, fn, calls * args.repeat, not args.no_memory)
+        ctx.manager.backend.close()
+
+    print_results(results, baseline)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to {args.output}")
+    if baseline:
+        regressions = compare(results, baseline, args.threshold)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        if regressions:
+            sys.exit(1)
+        print(f"No regressions beyond {args.threshold:.0%}.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+Streaming CSV export (RFC 4180, via the csv module).
+
+Students are read one at a time from any iterable and written in chunks of
+CHUNK_ROWS rows, so memory use does not grow with the roster. Two layouts:
+
+    wide  one row per student; `columns` picks from COLUMNS, optionally
+          followed by one "<lesson> Average" column per lesson
+    long  one row per grade: the selected student columns + Lesson, Grade,
+          Term, Date, Weight
+
+Paths ending in .gz (or compress=True) are written gzip-compressed. The file
+is replaced atomically, so a failed export never leaves a partial file.
+"""
+import csv
+import gzip
+import io
+import os
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import storage
+
+CHUNK_ROWS = 1000
+
+def _grades_text(student) -> str:
+    return "; ".join(f"{lesson}: {' '.join(map(str, grades))}" for lesson, grades in student.grades.items())
+
+# Column name -> (header, value)
+COLUMNS: Dict[str, Tuple[str, Callable]] = {
+    "id": ("ID", lambda s: s.id),
+    "name": ("Name", lambda s: s.name),
+    "surname": ("Surname", lambda s: s.surname),
+    "class_name": ("Class", lambda s: s.class_name),
+    "absence_count": ("Absence", lambda s: s.absence_count),
+    "absence_dates": ("Absence Dates", lambda s: " ".join(s.absence_days())),
+    "average": ("Average", lambda s: f"{s.average():.2f}"),
+    "grades": ("Grades", _grades_text),
+    "created_at": ("Created", lambda s: s.created_at),
+    "updated_at": ("Updated", lambda s: s.updated_at),
+}
+DEFAULT_COLUMNS = ("id", "name", "surname", "class_name", "absence_count", "grades")
+# Per-grade columns make no sense once every grade has its own row
+LONG_DEFAULT_COLUMNS = ("id", "name", "surname", "class_name")
+
+def default_path() -> str:
+    return os.path.join(os.path.dirname(storage.DATA_FILE), 'students_export.csv')
+
+def lessons_of(students: Iterable) -> List[str]:
+    """Sorted names of every lesson graded in `students` (one pass)."""
+    names = set()
+    for student in students:
+        names.update(student.grades)
+    return sorted(names)
+
+def _rows(students: Iterable, columns: Sequence[str], long: bool, lessons: Optional[Sequence[str]]):
+    getters = [COLUMNS[c][1] for c in columns]
+    for student in students:
+        values = [get(student) for get in getters]
+        if long:
+            yield from ((*values, lesson, grade, term or "", day or "", weight)
+                        for lesson, grade, term, day, weight in student.grade_history())
+            continue
+        if lessons:
+            values.extend(f"{student.average(lesson):.2f}" if student.has_lesson(lesson) else ""
+                          for lesson in lessons)
+        yield values
+
+def write_csv(students: Iterable, path: Optional[str] = None, columns: Optional[Sequence[str]] = None,
+              long: bool = False, lesson_averages: bool = False, lessons: Optional[Sequence[str]] = None,
+              compress: Optional[bool] = None) -> int:
+    """
+    Writes `students` to `path` (default: data/students_export.csv) and
+    returns the number of data rows. lesson_averages adds a column per lesson
+    (wide layout only); the lessons are taken from `lessons`, or found with
+    an extra pass over `students`, which must then be re-iterable.
+    """
+    path = path or default_path()
+    columns = list(columns or (LONG_DEFAULT_COLUMNS if long else DEFAULT_COLUMNS))
+    unknown = [c for c in columns if c not in COLUMNS]
+    if unknown:
+        raise ValueError(f"Unknown column(s): {', '.join(unknown)} (expected some of {', '.join(COLUMNS)})")
+    if lesson_averages and long:
+        raise ValueError("Lesson average columns are only available in the wide layout")
+    if lesson_averages and lessons is None:
+        if iter(students) is students:
+            raise ValueError("Pass `lessons` when exporting lesson averages from an iterator")
+        lessons = lessons_of(students)
+    if not lesson_averages:
+        lessons = None
+    if compress is None:
+        compress = path.endswith('.gz')
+
+    header = [COLUMNS[c][0] for c in columns]
+    if long:
+        header += ["Lesson", "Grade", "Term", "Date", "Weight"]
+    elif lessons:
+        header += [f"{lesson} Average" for lesson in lessons]
+
+    count = 0
+    with storage.atomic_open(path, binary=True) as raw:
+        # compresslevel 6: close to the size of 9 at a fraction of the time
+        compressed = gzip.GzipFile(fileobj=raw, mode='wb', compresslevel=6) if compress else None
+        text = io.TextIOWrapper(compressed or raw, encoding='utf-8', newline='')
+        writer = csv.writer(text)
+        writer.writerow(header)
+        chunk = []
+        for row in _rows(students, columns, long, lessons):
+            chunk.append(row)
+            if len(chunk) == CHUNK_ROWS:
+                writer.writerows(chunk)
+                count += len(chunk)
+                chunk = []
+        writer.writerows(chunk)
+        count += len(chunk)
+        # Hand the underlying file back to atomic_open unclosed, so it can fsync it
+        text.flush()
+        text.detach()
+        if compressed is not None:
+            compressed.close()
+    return count
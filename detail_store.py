@@ -0,0 +1,102 @@
+"""
+Out-of-memory storage for the detail records of SummaryStudent (grade
+history and created_at), with a bounded LRU cache in front.
+
+Every version of a student's details is appended to a private temporary
+file (marshal-encoded; the file never outlives the process) and addressed
+by the integer handle put() returns. Versions are never modified, so a
+handle always reads back the same details: changing a student appends a new
+version, and copies of a student (batch undo, background exports) can share
+handles safely. get() keeps the most recently read records in memory up to
+`budget` bytes (estimated), so memory stays flat however long the grade
+histories grow.
+"""
+import marshal
+import os
+import tempfile
+import threading
+from array import array
+from collections import OrderedDict
+from typing import Dict, Optional
+
+# Default cache budget; STUDENT_DETAIL_CACHE_MB overrides it
+DEFAULT_BUDGET_MB = 16
+# Rough in-memory cost of a details dict: the dicts themselves, plus per lesson a list header and its
+# slots (three more lists, of term, date and weight, for the lessons in grade_info)
+RECORD_OVERHEAD = 400
+LESSON_OVERHEAD = 120
+
+def estimate_size(details: Dict) -> int:
+    size = RECORD_OVERHEAD + sum(LESSON_OVERHEAD + 8 * len(g) for g in details["grades"].values())
+    return size + sum(3 * LESSON_OVERHEAD + 24 * len(info["weight"]) for info in details.get("grade_info", {}).values())
+
+class DetailStore:
+    """Append-only detail records behind an LRU cache. Thread-safe (the GUI saves on a worker thread)."""
+
+    def __init__(self, budget: Optional[int] = None):
+        if budget is None:
+            budget = int(float(os.environ.get("STUDENT_DETAIL_CACHE_MB", DEFAULT_BUDGET_MB)) * 2**20)
+        self.budget = budget
+        self._lock = threading.RLock()
+        self._file = None
+        self._end = 0
+        self._unflushed = False
+        self._offsets = array('Q')
+        self._lengths = array('I')
+        # handle -> (details, estimated size), least recently used first
+        self._cache: "OrderedDict[int, tuple]" = OrderedDict()
+        self.cached_bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def put(self, details: Dict, cache: bool = False) -> int:
+        """
+        Stores a new version of some details ({"grades", "created_at", "grade_info"?}) and
+        returns its handle. cache=True also keeps it in memory, for details
+        that are about to be read again (e.g. right after a change).
+        """
+        payload = marshal.dumps(details)
+        with self._lock:
+            if self._file is None:
+                self._file = tempfile.TemporaryFile(prefix="student-details-")
+            self._file.seek(self._end)
+            self._file.write(payload)
+            self._unflushed = True
+            handle = len(self._offsets)
+            self._offsets.append(self._end)
+            self._lengths.append(len(payload))
+            self._end += len(payload)
+            if cache:
+                self._remember(handle, details)
+        return handle
+
+    def get(self, handle: int) -> Dict:
+        """The details stored under `handle`. Treat the result as read-only."""
+        with self._lock:
+            entry = self._cache.get(handle)
+            if entry is not None:
+                self._cache.move_to_end(handle)
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+            if self._unflushed:
+                self._file.flush()
+                self._unflushed = False
+            self._file.seek(self._offsets[handle])
+            details = marshal.loads(self._file.read(self._lengths[handle]))
+            self._remember(handle, details)
+            return details
+
+    def _remember(self, handle: int, details: Dict):
+        size = estimate_size(details)
+        self._cache[handle] = (details, size)
+        self.cached_bytes += size
+        while self.cached_bytes > self.budget and len(self._cache) > 1:
+            _, (_, evicted) = self._cache.popitem(last=False)
+            self.cached_bytes -= evicted
+
+    def info(self) -> Dict:
+        with self._lock:
+            return {"records": len(self._offsets), "file_bytes": self._end, "cached": len(self._cache),
+                    "cached_bytes": self.cached_bytes, "budget": self.budget,
+                    "hits": self.hits, "misses": self.misses}
@@ -1,60 +1,244 @@
+"""
+Synthetic student data for load and benchmark testing.
+
+    python generate_test_data.py                          # add 50 students to data/students.json
+    python generate_test_data.py --count 1000000 --seed 42 --format jsonl --out /tmp/students.jsonl
+    python generate_test_data.py --count 100000 --format sqlite --workers 4 --grade-mean 70 --grade-sd 12
+
+Students are generated in blocks of BLOCK_SIZE, each from its own random
+stream derived from the seed and the block number. The output therefore
+depends only on the seed and the options, not on --workers, and blocks can
+be generated in separate processes and written in order as they arrive.
+JSON and JSON Lines files are streamed to disk; other backends receive one
+batch per block through StorageBackend.apply().
+"""
+import argparse
+import json
+import os
 import random
-from models import Student
-from storage import load_data, save_data
-
-def generate_test_data():
-    first_names = ["Ahmet", "Mehmet", "Ayşe", "Fatma", "Ali", "Veli", "Zeynep", "Elif", "Mustafa", "Can", 
-                   "Cem", "Deniz", "Ege", "Selin", "Sude", "Burak", "Emre", "Onur", "Gökhan", "Hakan",
-                   "Murat", "Oğuz", "Serkan", "Tolga", "Umut", "Yasin", "Yusuf", "Barış", "Berk", "Çağatay"]
-    
-    last_names = ["Yılmaz", "Kaya", "Demir", "Çelik", "Şahin", "Yıldız", "Yıldırım", "Öztürk", "Aydın", "Özdemir",
-                  "Arslan", "Doğan", "Kılıç", "Aslan", "Çetin", "Kara", "Koç", "Kurt", "Özkan", "Şimşek",
-                  "Polat", "Güler", "Erdoğan", "Bulut", "Yalçın", "Güneş", "Bozkurt", "Avcı", "Sarı", "Taş"]
-    
-    classes = ["9-A", "9-B", "10-A", "10-B", "11-A", "11-B", "12-A", "12-B", "12-C"]
-    
-    subjects = ["Math", "Physics", "Chemistry", "Biology", "History", "Literature", "English", "Geography"]
-
-    existing_data = load_data()
-    print(f"Current student count: {len(existing_data)}")
-    
-    new_students = []
-    
-    for _ in range(50):
-        name = random.choice(first_names)
-        surname = random.choice(last_names)
-        class_name = random.choice(classes)
-        absence_count = random.randint(0, 15)
-        
-        grades = {}
-        # Assign grades for 4-6 random subjects
-        num_subjects = random.randint(4, 6)
-        student_subjects = random.sample(subjects, num_subjects)
-        
-        for subject in student_subjects:
-            # Assign 2-4 grades per subject
-            num_grades = random.randint(2, 4)
-            grades[subject] = [random.randint(40, 100) for _ in range(num_grades)]
-            
-        student = Student(
-            name=name,
-            surname=surname,
-            class_name=class_name,
-            grades=grades,
-            absence_count=absence_count
-        )
-        # Convert to dict right away since storage expects dicts (based on load_data return type usually being dicts)
-        # Let's check models.py again. Student.to_dict() exists.
-        # storage.py save_data expects List[Dict].
-        new_students.append(student.to_dict())
-
-    # Combine with existing data
-    all_data = existing_data + new_students
-    
-    if save_data(all_data):
-        print(f"Successfully added 50 students. New total: {len(all_data)}")
-    else:
-        print("Failed to save data.")
+import uuid
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import storage
+from locking import FileLock
+
+BLOCK_SIZE = 10000
+FORMATS = ("json", "jsonl", "sqlite")
+
+FIRST_NAMES = ["Ahmet", "Mehmet", "Ayşe", "Fatma", "Ali", "Veli", "Zeynep", "Elif", "Mustafa", "Can",
+               "Cem", "Deniz", "Ege", "Selin", "Sude", "Burak", "Emre", "Onur", "Gökhan", "Hakan",
+               "Murat", "Oğuz", "Serkan", "Tolga", "Umut", "Yasin", "Yusuf", "Barış", "Berk", "Çağatay"]
+
+LAST_NAMES = ["Yılmaz", "Kaya", "Demir", "Çelik", "Şahin", "Yıldız", "Yıldırım", "Öztürk", "Aydın", "Özdemir",
+              "Arslan", "Doğan", "Kılıç", "Aslan", "Çetin", "Kara", "Koç", "Kurt", "Özkan", "Şimşek",
+              "Polat", "Güler", "Erdoğan", "Bulut", "Yalçın", "Güneş", "Bozkurt", "Avcı", "Sarı", "Taş"]
+
+CLASSES = ["9-A", "9-B", "10-A", "10-B", "11-A", "11-B", "12-A", "12-B", "12-C"]
+
+SUBJECTS = ["Math", "Physics", "Chemistry", "Biology", "History", "Literature", "English", "Geography"]
+
+# Timestamps fall in the school year starting here
+EPOCH = datetime(2025, 9, 1)
+YEAR_SECONDS = 300 * 24 * 3600
+# Absences fall on the weekdays of that year
+GRADE_WEIGHTS = (1, 1, 1, 2)
+SCHOOL_DAYS = [day.date().isoformat() for day in (EPOCH + timedelta(days=n) for n in range(300)) if day.weekday() < 5]
+
+@dataclass
+class DataSpec:
+    """What the generated students look like. Ranges are inclusive."""
+    subjects: List[str] = field(default_factory=lambda: list(SUBJECTS))
+    classes: List[str] = field(default_factory=lambda: list(CLASSES))
+    subjects_per_student: Tuple[int, int] = (4, 6)
+    grades_per_subject: Tuple[int, int] = (2, 4)
+    grade_range: Tuple[int, int] = (40, 100)
+    # Grades are uniform over grade_range, or normal (clipped to it) when a mean is given
+    grade_mean: Optional[float] = None
+    grade_sd: float = 15.0
+    absence_range: Tuple[int, int] = (0, 15)
+    # With terms, every grade gets a term, a school day and (now and then) a weight of 2
+    terms: List[str] = field(default_factory=list)
+
+def generate_block(seed: int, block: int, count: int, spec: DataSpec) -> List[Dict]:
+    """The students of one block; the same arguments always give the same students."""
+    rng = random.Random(f"{seed}:{block}")
+    low, high = spec.grade_range
+    most_subjects = len(spec.subjects)
+
+    def grade() -> int:
+        if spec.grade_mean is None:
+            return rng.randint(low, high)
+        return min(high, max(low, round(rng.gauss(spec.grade_mean, spec.grade_sd))))
+
+    students = []
+    for _ in range(count):
+        subjects = rng.sample(spec.subjects, min(most_subjects, rng.randint(*spec.subjects_per_student)))
+        created = EPOCH + timedelta(seconds=rng.randrange(YEAR_SECONDS))
+        updated = created + timedelta(seconds=rng.randrange(YEAR_SECONDS))
+        absences = min(len(SCHOOL_DAYS), rng.randint(*spec.absence_range))
+        student = {
+            "id": str(uuid.UUID(int=rng.getrandbits(128), version=4)),
+            "name": rng.choice(FIRST_NAMES),
+            "surname": rng.choice(LAST_NAMES),
+            "class_name": rng.choice(spec.classes),
+            "grades": {subject: [grade() for _ in range(rng.randint(*spec.grades_per_subject))]
+                       for subject in subjects},
+            "absence_count": absences,
+            "created_at": created.isoformat(),
+            "updated_at": updated.isoformat(),
+        }
+        if absences:
+            student["absence_dates"] = sorted(rng.sample(SCHOOL_DAYS, absences))
+        if spec.terms:
+            student["grade_info"] = {
+                subject: {"term": sorted(rng.choice(spec.terms) for _ in grades),
+                          "date": sorted(rng.sample(SCHOOL_DAYS, len(grades))),
+                          "weight": [rng.choice(GRADE_WEIGHTS) for _ in grades]}
+                for subject, grades in student["grades"].items()}
+        students.append(student)
+    return students
+
+def _encoded_block(seed: int, block: int, count: int, spec: DataSpec) -> List[str]:
+    # Encoded in the worker, so the parent only writes strings
+    return [json.dumps(s, ensure_ascii=False, separators=(',', ':')) for s in generate_block(seed, block, count, spec)]
+
+def iter_blocks(count: int, seed: int, spec: DataSpec, workers: int = 1, encoded: bool = False) -> Iterator[List]:
+    """Yields the blocks in order, generated in `workers` processes when more than one."""
+    make = _encoded_block if encoded else generate_block
+    jobs = [(seed, block, min(BLOCK_SIZE, count - start), spec)
+            for block, start in enumerate(range(0, count, BLOCK_SIZE))]
+    if workers <= 1:
+        for job in jobs:
+            yield make(*job)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        # A bounded window of blocks in flight keeps memory flat for huge counts
+        in_flight = deque()
+        for job in jobs:
+            in_flight.append(pool.submit(make, *job))
+            if len(in_flight) >= workers * 2:
+                yield in_flight.popleft().result()
+        while in_flight:
+            yield in_flight.popleft().result()
+
+def _write_file(path: str, fmt: str, blocks: Iterator[List[str]], append: bool) -> int:
+    """Streams encoded students into a JSON array or JSON Lines file, after the existing ones if appending."""
+    count = 0
+    with FileLock(path), storage.atomic_open(path) as f:
+        # Read under the lock, so a student another process stores meanwhile is not dropped
+        existing = storage.iter_data(path) if append and os.path.exists(path) else iter(())
+        json_array = fmt == "json"
+        if json_array:
+            f.write("[")
+
+        def write(line: str):
+            nonlocal count
+            if json_array:
+                f.write(",\n" if count else "\n")
+            f.write(line)
+            if not json_array:
+                f.write("\n")
+            count += 1
+
+        for student in existing:
+            write(json.dumps(student, ensure_ascii=False, separators=(',', ':')))
+        for block in blocks:
+            for line in block:
+                write(line)
+        if json_array:
+            f.write("\n]\n")
+        # The journal (if any) was replayed into the file above
+        if os.path.exists(storage.journal_file(path)):
+            os.remove(storage.journal_file(path))
+    return count
+
+def _write_backend(backend: storage.StorageBackend, blocks: Iterator[List[Dict]], append: bool) -> int:
+    if not append:
+        backend.save_all([])
+    count = 0
+    for block in blocks:
+        backend.apply([{"op": "add", "id": s["id"], "value": s, "ts": s["updated_at"]} for s in block])
+        count += len(block)
+    return count
+
+def default_path(fmt: str) -> str:
+    if fmt == "sqlite":
+        from sqlite_storage import DB_FILE
+        return DB_FILE
+    return storage.JSONL_FILE if fmt == "jsonl" else storage.DATA_FILE
+
+def generate(count: int, path: str, fmt: str = "json", seed: int = 0, spec: Optional[DataSpec] = None,
+             workers: int = 1, append: bool = False) -> int:
+    """Writes `count` generated students to `path`. Returns the number of students in the output."""
+    spec = spec or DataSpec()
+    if fmt in ("json", "jsonl"):
+        return _write_file(path, fmt, iter_blocks(count, seed, spec, workers, encoded=True), append)
+    if fmt == "sqlite":
+        from sqlite_storage import SQLiteBackend
+        backend = SQLiteBackend(path)
+        try:
+            _write_backend(backend, iter_blocks(count, seed, spec, workers), append)
+            return len(backend.load()) if append else count
+        finally:
+            backend.close()
+    raise ValueError(f"Unknown format: {fmt} (expected one of {', '.join(FORMATS)})")
+
+def _range(text: str) -> Tuple[int, int]:
+    low, _, high = text.partition("-")
+    try:
+        low, high = int(low), int(high or low)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected a number or a range like 2-4, got {text!r}") from None
+    if low > high or low < 0:
+        raise argparse.ArgumentTypeError(f"invalid range {text!r}")
+    return low, high
+
+def _names(text: str) -> List[str]:
+    names = [n.strip() for n in text.split(",") if n.strip()]
+    if not names:
+        raise argparse.ArgumentTypeError("expected a comma-separated list")
+    return names
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate synthetic student data.")
+    parser.add_argument("--count", type=int, default=50, help="Students to generate (default: 50)")
+    parser.add_argument("--seed", type=int, help="Random seed; the same seed and options give the same data "
+                                                 "(default: random, printed)")
+    parser.add_argument("--format", choices=FORMATS, default="json")
+    parser.add_argument("--out", help="Output file (default: the application's data file for the format, "
+                                      "which is then appended to)")
+    parser.add_argument("--append", action="store_true", help="Keep the students already in --out")
+    parser.add_argument("--workers", type=int, default=1, help="Generator processes")
+    parser.add_argument("--subjects", type=_names, default=SUBJECTS, help="Comma-separated lessons")
+    parser.add_argument("--classes", type=_names, default=CLASSES, help="Comma-separated classes")
+    parser.add_argument("--subjects-per-student", type=_range, default=(4, 6), metavar="MIN-MAX")
+    parser.add_argument("--grades-per-subject", type=_range, default=(2, 4), metavar="MIN-MAX")
+    parser.add_argument("--grade-range", type=_range, default=(40, 100), metavar="MIN-MAX")
+    parser.add_argument("--grade-mean", type=float, help="Draw grades from a normal distribution with this mean")
+    parser.add_argument("--grade-sd", type=float, default=15.0, help="Standard deviation for --grade-mean")
+    parser.add_argument("--absence-range", type=_range, default=(0, 15), metavar="MIN-MAX")
+    parser.add_argument("--terms", type=_names, default=[],
+                        help="Comma-separated terms; gives every grade a term, date and weight")
+    args = parser.parse_args(argv)
+
+    if args.grade_range[1] > 100:
+        parser.error("grades cannot exceed 100")
+    seed = args.seed if args.seed is not None else random.randrange(2**32)
+    # Without --out this adds to the application's data, like the original 50-student script
+    path = args.out or default_path(args.format)
+    append = args.append or not args.out
+    spec = DataSpec(args.subjects, args.classes, args.subjects_per_student, args.grades_per_subject,
+                    args.grade_range, args.grade_mean, args.grade_sd, args.absence_range,
+                    args.terms)
+
+    start = datetime.now()
+    total = generate(args.count, path, args.format, seed, spec, args.workers, append)
+    elapsed = (datetime.now() - start).total_seconds()
+    print(f"Generated {args.count} students (seed {seed}) in {elapsed:.1f}s. {path} now holds {total} students.")
 
 if __name__ == "__main__":
-    generate_test_data()
+    main()
@@ -1,7 +1,13 @@
+import sys
+from datetime import date
 import tkinter as tk
 from tkinter import ttk, messagebox, simpledialog
 from services import StudentManager
 from models import Student
+from jobs import JobRunner
+from storage import ConflictError, StorageError
+import instrumentation
+import search
 
 # --- Color Palette ---
 BG_COLOR = "#f4f6f9"       # Light Grey Blue Background
@@ -10,6 +16,13 @@ ACCENT_COLOR = "#3498db"   # Bright Blue
 TEXT_COLOR = "#34495e"     # Dark Grey Text
 WHITE = "#ffffff"
 
+# --- Student table virtualization ---
+ROW_HEIGHT = 30   # Must match the Treeview rowheight style
+ROW_BUFFER = 50   # Rows formatted ahead of/behind the visible window
+SEARCH_DEBOUNCE_MS = 150   # Search runs once typing pauses this long
+JOB_POLL_MS = 100          # How often finished background jobs are picked up
+SYNC_INTERVAL_MS = 2000    # How often edits from other processes are picked up
+
 class StudentManagerApp:
     def __init__(self, root):
         self.root = root
@@ -17,11 +30,33 @@ class StudentManagerApp:
         self.root.geometry("1100x700")
         self.root.configure(bg=BG_COLOR)
         
-        self.manager = StudentManager()
+        # Loading, saving, backups and exports run on the job runner's worker
+        # thread; self.manager stays None until the first load finishes.
+        self.manager = None
+        self.jobs = JobRunner()
+        
+        # The table is virtualized: self._rows holds the ids of every matching
+        # student, but only a small pool of Treeview items (one per visible row)
+        # exists. Scrolling re-fills the pool from self._offset.
+        self._rows = []
+        self._offset = 0
+        self._pool_size = 0
+        self._selected_id = None
+        self._row_cache = {}
+        self._search_job = None
+        self._busy = False
+        self._idle_status = None
+        self._sync_busy = False
+        self._force_reload = False
         
         self.configure_styles()
         self.create_widgets()
         self.refresh_list()
+        
+        self.jobs.submit(StudentManager, label="Loading students",
+                         on_done=self._on_loaded, on_error=self._on_load_failed)
+        self.root.protocol("WM_DELETE_WINDOW", self._on_close)
+        self._poll_jobs()
 
     def configure_styles(self):
         self.style = ttk.Style()
@@ -38,7 +73,7 @@ class StudentManagerApp:
                              background=WHITE,
                              fieldbackground=WHITE,
                              foreground=TEXT_COLOR,
-                             rowheight=30,
+                             rowheight=ROW_HEIGHT,
                              font=("Segoe UI", 10),
                              borderwidth=0)
         self.style.configure("Treeview.Heading",
@@ -101,7 +136,7 @@ class StudentManagerApp:
         
         ttk.Label(search_container, text="Search:").pack(side=tk.LEFT, padx=5)
         self.search_var = tk.StringVar()
-        self.search_var.trace_add("write", lambda name, index, mode: self.refresh_list())
+        self.search_var.trace_add("write", lambda name, index, mode: self._schedule_search())
         search_entry = ttk.Entry(search_container, textvariable=self.search_var, width=25)
         search_entry.pack(side=tk.LEFT)
 
@@ -127,13 +162,26 @@ class StudentManagerApp:
         self.tree.column("absence", width=100, anchor=tk.CENTER)
         self.tree.column("average", width=100, anchor=tk.CENTER)
         
-        scrollbar = ttk.Scrollbar(table_card, orient=tk.VERTICAL, command=self.tree.yview)
-        self.tree.configure(yscroll=scrollbar.set)
+        # The scrollbar drives self._offset rather than the Treeview itself
+        self.scrollbar = ttk.Scrollbar(table_card, orient=tk.VERTICAL, command=self._on_scrollbar)
         
         self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        
+        # Striped rows
+        self.tree.tag_configure('odd', background=WHITE)
+        self.tree.tag_configure('even', background="#f8f9fa")
         
         self.tree.bind("<Double-1>", lambda event: self.view_details())
+        self.tree.bind("<<TreeviewSelect>>", self._on_select)
+        self.tree.bind("<Configure>", lambda event: self._render_window())
+        self.tree.bind("<MouseWheel>", lambda event: self._scroll_by(-3 if event.delta > 0 else 3))
+        self.tree.bind("<Button-4>", lambda event: self._scroll_by(-3))  # Linux wheel up
+        self.tree.bind("<Button-5>", lambda event: self._scroll_by(3))   # Linux wheel down
+        self.tree.bind("<Up>", lambda event: self._move_selection(-1))
+        self.tree.bind("<Down>", lambda event: self._move_selection(1))
+        self.tree.bind("<Prior>", lambda event: self._scroll_by(-self._visible_count()))
+        self.tree.bind("<Next>", lambda event: self._scroll_by(self._visible_count()))
 
         # 3. Footer / Secondary Actions
         footer_frame = ttk.Frame(self.root, padding=20)
@@ -141,38 +189,287 @@ class StudentManagerApp:
         
         ttk.Button(footer_frame, text="View Details / Grades", command=self.view_details).pack(side=tk.LEFT, padx=(0, 10))
         ttk.Button(footer_frame, text="Manage Attendance", command=self.manage_attendance).pack(side=tk.LEFT, padx=5)
+        ttk.Button(footer_frame, text="Statistics", command=self.show_statistics).pack(side=tk.LEFT, padx=5)
         
         ttk.Button(footer_frame, text="Export CSV", command=self.export_csv).pack(side=tk.RIGHT, padx=5)
         ttk.Button(footer_frame, text="Backup Data", command=self.backup_data).pack(side=tk.RIGHT, padx=5)
-
-    def refresh_list(self):
-        for item in self.tree.get_children():
-            self.tree.delete(item)
-            
-        search_term = self.search_var.get().lower()
-        students = self.manager.list_students()
         
-        # Apply striped row tags
-        self.tree.tag_configure('odd', background=WHITE)
-        self.tree.tag_configure('even', background="#f8f9fa")
+        # Background job status
+        self.progress = ttk.Progressbar(footer_frame, mode="indeterminate", length=120)
+        self.progress.pack(side=tk.RIGHT, padx=10)
+        self.status_var = tk.StringVar(value="")
+        ttk.Label(footer_frame, textvariable=self.status_var, foreground="#7f8c8d").pack(side=tk.RIGHT, padx=5)
+
+    # --- Background jobs ---
+
+    def _poll_jobs(self):
+        """Runs callbacks of finished jobs on the Tk thread and keeps the footer status current."""
+        self.jobs.drain()
+        if self.jobs.pending:
+            if not self._busy:
+                self.progress.start(10)
+                self._busy = True
+            self.status_var.set(f"{self.jobs.last_label}... ({self.jobs.pending} pending)")
+        elif self._busy:
+            self.progress.stop()
+            self._busy = False
+            self.status_var.set(self._idle_status or "All changes saved")
+            self._idle_status = None
+        self.root.after(JOB_POLL_MS, self._poll_jobs)
+
+    def _set_status(self, message):
+        """Shows a job outcome; it stays in the footer once the queue has emptied."""
+        self.status_var.set(message)
+        if self._busy:
+            self._idle_status = message
+
+    def _on_loaded(self, manager):
+        self.manager = manager
+        manager.writer = self._submit_write
+        self.refresh_list()
+        self._set_status(f"Loaded {len(self._rows)} students")
+        self.root.after(SYNC_INTERVAL_MS, self._sync_tick)
+
+    def _sync_tick(self):
+        self._request_sync()
+        self.root.after(SYNC_INTERVAL_MS, self._sync_tick)
+
+    def _request_sync(self):
+        """Asks the worker for edits other processes made; they are applied in _on_changes."""
+        if self._sync_busy:
+            return
+        self._sync_busy = True
+        writes = self.manager.write_count
+        self.jobs.submit(self.manager.fetch_changes, self._force_reload, quiet=True,
+                         on_done=lambda result: self._on_changes(result, writes),
+                         on_error=self._on_sync_failed)
+
+    def _on_changes(self, result, writes):
+        self._sync_busy = False
+        records, snapshot = result
+        if records is None and self.manager.write_count != writes:
+            # The snapshot predates edits made meanwhile; fetch a newer one next time
+            self._force_reload = True
+            return
+        self._force_reload = False
+        changed = self.manager.apply_changes(records, snapshot)
+        if changed:
+            if self._selected_id is not None and self.manager.get_student(self._selected_id) is None:
+                self._selected_id = None
+            self.refresh_list(keep_position=True)
+            self._set_status(f"Updated {changed} students changed elsewhere" if records is not None
+                             else "Reloaded data changed elsewhere")
+
+    def _on_sync_failed(self, error):
+        self._sync_busy = False
+        print(f"Could not check for changes: {error}")
+
+    def _on_load_failed(self, error):
+        self._set_status("Loading failed")
+        messagebox.showerror("Error", f"Could not load student data:\n{error}")
+
+    def _submit_write(self, fn, *args):
+        """StudentManager.writer hook: storage calls run on the worker, in order."""
+        return self.jobs.submit(fn, *args, label="Saving", on_done=self._on_saved, on_error=self._on_save_failed)
+
+    def _on_saved(self, result):
+        if result is False:
+            self._set_status("Last save failed - see console")
+
+    def _on_save_failed(self, error):
+        if isinstance(error, ConflictError):
+            # Someone else edited the same student: show their version instead
+            self._force_reload = True
+            self._request_sync()
+            self._set_status("Change rejected - reloading")
+            messagebox.showwarning("Changed Elsewhere", f"{error}.\nThe latest data is being loaded; please redo your change.")
+            return
+        if isinstance(error, StorageError):
+            # The change is shown but was not stored: go back to what storage holds
+            self._force_reload = True
+            self._request_sync()
+            self._set_status("Save failed - reloading")
+            messagebox.showerror("Save Error", f"{error}.\nThe stored data is being loaded; please redo your change.")
+            return
+        self._set_status("Last save failed")
+        messagebox.showerror("Save Error", str(error))
+
+    def _ready(self):
+        if self.manager is None:
+            messagebox.showinfo("Please Wait", "Student data is still loading.")
+            return False
+        return True
+
+    def _on_close(self):
+        # Pending writes must reach storage before the process exits
+        if self.jobs.pending:
+            self.status_var.set("Saving remaining changes...")
+            self.root.update_idletasks()
+        self.jobs.shutdown(wait=True)
+        self.root.destroy()
+
+    def _schedule_search(self):
+        """Restarts the debounce timer so a burst of keystrokes triggers one search."""
+        if self._search_job is not None:
+            self.root.after_cancel(self._search_job)
+        self._search_job = self.root.after(SEARCH_DEBOUNCE_MS, self._run_search)
+
+    def _run_search(self):
+        self._search_job = None
+        self.refresh_list()
 
-        count = 0
-        for s in students:
-            if search_term and (search_term not in s.name.lower() and 
-                                search_term not in s.surname.lower()):
-                continue
-                
-            avg = self.manager.calculate_average(s.id)
-            tag = 'even' if count % 2 == 0 else 'odd'
-            self.tree.insert("", tk.END, values=(s.id, s.name, s.surname, s.class_name, s.absence_count, f"{avg:.2f}"), tags=(tag,))
-            count += 1
+    def refresh_list(self, keep_position=False):
+        """Recomputes the matching rows (e.g. after a search change) and redraws the visible window."""
+        self._rows = [s.id for s in self.manager.search(self.search_var.get())] if self.manager else []
+        self._row_cache.clear()
+        if not keep_position:
+            self._offset = 0
+        self._render_window()
+
+    # --- Virtualized table ---
+
+    def _visible_count(self):
+        height = self.tree.winfo_height()
+        if height <= 1:
+            # Not laid out yet; fall back to the requested height
+            height = self.tree.winfo_reqheight()
+        return max(1, height // ROW_HEIGHT)
+
+    def _row_values(self, student_id):
+        values = self._row_cache.get(student_id)
+        if values is None:
+            s = self.manager.get_student(student_id)
+            values = (s.id, s.name, s.surname, s.class_name, s.absence_count, f"{s.average():.2f}")
+            self._row_cache[student_id] = values
+        return values
+
+    def _render_window(self):
+        """Fills the pool of Treeview items with the rows at self._offset."""
+        count = self._visible_count()
+        total = len(self._rows)
+        self._offset = max(0, min(self._offset, total - count))
+        
+        # Grow or shrink the item pool to the number of visible rows
+        for i in range(self._pool_size, count):
+            self.tree.insert("", tk.END, iid=f"row{i}")
+        for i in range(count, self._pool_size):
+            self.tree.delete(f"row{i}")
+        self._pool_size = count
+        
+        for i in range(count):
+            iid = f"row{i}"
+            index = self._offset + i
+            if index < total:
+                self.tree.move(iid, "", i)  # re-attaches it if it was detached
+                tag = 'even' if index % 2 == 0 else 'odd'
+                self.tree.item(iid, values=self._row_values(self._rows[index]), tags=(tag,))
+            else:
+                self.tree.detach(iid)
+        
+        # Keep the formatted-row cache to the window plus a buffer on each side
+        start = max(0, self._offset - ROW_BUFFER)
+        keep = self._rows[start:self._offset + count + ROW_BUFFER]
+        for student_id in keep:
+            self._row_values(student_id)
+        if len(self._row_cache) > 2 * len(keep):
+            kept = set(keep)
+            self._row_cache = {k: v for k, v in self._row_cache.items() if k in kept}
+        
+        if total:
+            self.scrollbar.set(self._offset / total, min(1.0, (self._offset + count) / total))
+        else:
+            self.scrollbar.set(0.0, 1.0)
+        self._restore_selection()
+
+    def _window_slot(self, student_id):
+        """Pool slot currently showing the student, or None if it is scrolled out of view."""
+        if student_id is None:
+            return None
+        window = self._rows[self._offset:self._offset + self._pool_size]
+        try:
+            return window.index(student_id)
+        except ValueError:
+            return None
+
+    def _restore_selection(self):
+        """Keeps the highlight on the selected student rather than on a pool slot."""
+        slot = self._window_slot(self._selected_id)
+        if slot is not None:
+            iid = f"row{slot}"
+            if self.tree.selection() != (iid,):
+                self.tree.selection_set(iid)
+                self.tree.focus(iid)
+        elif self.tree.selection():
+            self.tree.selection_remove(self.tree.selection())
+
+    def _on_select(self, event=None):
+        selection = self.tree.selection()
+        if selection:
+            index = self._offset + int(selection[0][3:])
+            if index < len(self._rows):
+                self._selected_id = self._rows[index]
+
+    def _on_scrollbar(self, action, amount, unit=None):
+        if action == "moveto":
+            self._offset = int(float(amount) * len(self._rows))
+            self._render_window()
+        elif action == "scroll":
+            step = self._visible_count() if unit == "pages" else 1
+            self._scroll_by(int(amount) * step)
+
+    def _scroll_by(self, rows):
+        self._offset += rows
+        self._render_window()
+        return "break"
+
+    def _move_selection(self, delta):
+        """Arrow keys: move the selection, scrolling when it leaves the window."""
+        if not self._rows:
+            return "break"
+        slot = self._window_slot(self._selected_id)
+        if slot is not None:
+            index = self._offset + slot
+        elif self._selected_id in self._rows:
+            index = self._rows.index(self._selected_id)
+        else:
+            index = self._offset - delta
+        index = max(0, min(len(self._rows) - 1, index + delta))
+        self._selected_id = self._rows[index]
+        count = self._visible_count()
+        if index < self._offset:
+            self._offset = index
+        elif index >= self._offset + count:
+            self._offset = index - count + 1
+        self._render_window()
+        return "break"
+
+    def _update_row(self, student_id):
+        """Redraws a single student's row in place after it changed."""
+        self._row_cache.pop(student_id, None)
+        slot = self._window_slot(student_id)
+        if slot is not None:
+            self.tree.item(f"row{slot}", values=self._row_values(student_id))
+
+    def _row_added(self, student):
+        if search.matches(student, self.search_var.get()):
+            self._rows.append(student.id)
+            self._render_window()
+
+    def _row_deleted(self, student_id):
+        if student_id in self._rows:
+            self._rows.remove(student_id)
+        self._row_cache.pop(student_id, None)
+        if self._selected_id == student_id:
+            self._selected_id = None
+        self._render_window()
 
     def get_selected_id(self):
-        selected_item = self.tree.selection()
-        if not selected_item:
+        if not self._ready():
+            return None
+        if self._selected_id is None:
             messagebox.showwarning("Selection Required", "Please select a student from the list.")
             return None
-        return self.tree.item(selected_item[0])['values'][0]
+        return self._selected_id
 
     def _create_popup_window(self, title, width=400, height=450):
         window = tk.Toplevel(self.root)
@@ -182,6 +479,8 @@ class StudentManagerApp:
         return window
 
     def add_student(self):
+        if not self._ready(): return
+        
         popup = self._create_popup_window("Add New Student", 350, 400)
         
         content = ttk.Frame(popup, padding=20, style="Card.TFrame")
@@ -207,8 +506,8 @@ class StudentManagerApp:
             cls = class_entry.get().strip()
             
             if name and surname and cls:
-                self.manager.add_student(name, surname, cls)
-                self.refresh_list()
+                student = self.manager.add_student(name, surname, cls)
+                self._row_added(student)
                 popup.destroy()
             else:
                 messagebox.showerror("Error", "All fields are required.")
@@ -245,7 +544,7 @@ class StudentManagerApp:
         
         def save():
             self.manager.update_student(s_id, name_entry.get(), surname_entry.get(), class_entry.get())
-            self.refresh_list()
+            self._update_row(s_id)
             popup.destroy()
             
         ttk.Button(content, text="Update Student", style="Accent.TButton", command=save).pack(fill=tk.X, pady=10)
@@ -256,7 +555,7 @@ class StudentManagerApp:
         
         if messagebox.askyesno("Confirm Deletion", "Are you sure you want to delete this student?\nThis action cannot be undone."):
             self.manager.delete_student(s_id)
-            self.refresh_list()
+            self._row_deleted(s_id)
 
     def view_details(self):
         s_id = self.get_selected_id()
@@ -295,8 +594,9 @@ class StudentManagerApp:
         def refresh_grades():
             for item in grades_tree.get_children():
                 grades_tree.delete(item)
-            for lesson, grades in student.grades.items():
-                grades_str = ", ".join(map(str, grades))
+            history = student.grade_history()
+            for lesson in student.grades:
+                grades_str = ", ".join(e.describe() for e in history if e.lesson == lesson)
                 grades_tree.insert("", tk.END, values=(lesson, grades_str))
 
         refresh_grades()
@@ -315,21 +615,33 @@ class StudentManagerApp:
         ttk.Label(input_row, text="Score:").pack(side=tk.LEFT)
         grade_entry = ttk.Entry(input_row, width=8)
         grade_entry.pack(side=tk.LEFT, padx=5)
+
+        # Optional term, date and weight of the grade
+        info_row = ttk.Frame(add_frame)
+        info_row.pack(fill=tk.X, pady=5)
+        info_entries = {}
+        for label, width in (("Term:", 10), ("Date:", 11), ("Weight:", 5)):
+            ttk.Label(info_row, text=label).pack(side=tk.LEFT)
+            info_entries[label] = ttk.Entry(info_row, width=width)
+            info_entries[label].pack(side=tk.LEFT, padx=(5, 10))
+        info_entries["Weight:"].insert(0, "1")
         
         def add_grade():
             try:
                 lesson = lesson_entry.get().strip()
                 grade = int(grade_entry.get().strip())
                 if 0 <= grade <= 100:
-                    self.manager.add_grade(s_id, lesson, grade)
+                    self.manager.add_grade(s_id, lesson, grade, info_entries["Term:"].get().strip() or None,
+                                           info_entries["Date:"].get().strip() or None,
+                                           float(info_entries["Weight:"].get().strip() or 1))
                     refresh_grades()
                     lesson_entry.delete(0, tk.END)
                     grade_entry.delete(0, tk.END)
-                    self.refresh_list()
+                    self._update_row(s_id)
                 else:
                     messagebox.showerror("Error", "Grade must be between 0 and 100.")
-            except ValueError:
-                messagebox.showerror("Error", "Invalid numeric input.")
+            except ValueError as e:
+                messagebox.showerror("Error", f"Invalid input: {e}")
         
         ttk.Button(input_row, text="Add", style="Accent.TButton", command=add_grade).pack(side=tk.LEFT, padx=15)
 
@@ -340,46 +652,153 @@ class StudentManagerApp:
         student = self.manager.get_student(s_id)
         
         # Custom Dialog for nicer look
-        popup = self._create_popup_window("Attendance", 300, 400)
+        popup = self._create_popup_window("Attendance", 320, 520)
         content = ttk.Frame(popup, padding=20)
         content.pack(fill=tk.BOTH, expand=True)
 
         days_var = tk.StringVar(value="1")
+        date_var = tk.StringVar(value=date.today().isoformat())
 
         def commit():
             try:
                 amount = int(days_var.get())
                 if self.manager.update_attendance(s_id, amount):
-                    self.refresh_list()
+                    self._update_row(s_id)
                     popup.destroy()
                 else:
                     messagebox.showerror("Error", "Result cannot be negative.")
             except ValueError:
                 messagebox.showerror("Error", "Invalid number.")
 
+        def mark(absent: bool):
+            try:
+                if absent:
+                    changed = self.manager.mark_absent(s_id, date_var.get())
+                else:
+                    changed = self.manager.mark_present(s_id, date_var.get())
+            except ValueError as e:
+                messagebox.showerror("Error", str(e))
+                return
+            if not changed:
+                messagebox.showinfo("Attendance", "Already recorded." if absent else "No absence on that date.")
+                return
+            self._update_row(s_id)
+            popup.destroy()
+
         # Pack button FIRST at the BOTTOM to ensure it's visible
         ttk.Button(content, text="Update Absence", style="Accent.TButton", command=commit).pack(side=tk.BOTTOM, fill=tk.X, pady=(20, 0))
 
         # Pack content top-down
         ttk.Label(content, text=f"Update Absence", style="SubHeader.TLabel").pack(side=tk.TOP, pady=(0, 10))
-        ttk.Label(content, text=f"Current Total: {student.absence_count}", foreground="#7f8c8d").pack(side=tk.TOP, pady=(0, 20))
-        
+        ttk.Label(content, text=f"Current Total: {student.absence_count}", foreground="#7f8c8d").pack(side=tk.TOP, pady=(0, 10))
+        if student.absence_dates:
+            days = student.absence_days()
+            ttk.Label(content, text="Latest: " + ", ".join(days[-3:]), foreground="#7f8c8d",
+                      font=("Segoe UI", 8)).pack(side=tk.TOP, pady=(0, 10))
+
+        date_frame = ttk.Frame(content)
+        date_frame.pack(side=tk.TOP, fill=tk.X)
+        ttk.Label(date_frame, text="Date (YYYY-MM-DD)").pack(anchor=tk.W)
+        ttk.Entry(date_frame, textvariable=date_var).pack(fill=tk.X, pady=5)
+        buttons = ttk.Frame(date_frame)
+        buttons.pack(fill=tk.X, pady=(0, 15))
+        ttk.Button(buttons, text="Mark Absent", command=lambda: mark(True)).pack(side=tk.LEFT, expand=True, fill=tk.X, padx=(0, 5))
+        ttk.Button(buttons, text="Remove Absence", command=lambda: mark(False)).pack(side=tk.LEFT, expand=True, fill=tk.X)
+
         val_frame = ttk.Frame(content)
         val_frame.pack(side=tk.TOP)
         
+        ttk.Label(val_frame, text="Undated change").pack()
         spinbox = ttk.Spinbox(val_frame, from_=-20, to=20, textvariable=days_var, width=10)
         spinbox.pack(pady=5)
-        ttk.Label(val_frame, text="(Use negative to reduce)").pack(pady=(0, 15), font=("Segoe UI", 8))
+        ttk.Label(val_frame, text="(Use negative to reduce)", font=("Segoe UI", 8)).pack(pady=(0, 15))
 
     def backup_data(self):
-        res = self.manager.backup_data()
-        messagebox.showinfo("Backup Status", res)
+        if not self._ready(): return
+        future = self.manager.backup_data()
+        self.jobs.last_label = "Creating backup"
+        self.jobs.watch(future, lambda res: messagebox.showinfo("Backup Status", res))
 
     def export_csv(self):
-        res = self.manager.export_csv()
-        messagebox.showinfo("Export Status", res)
+        if not self._ready(): return
+        future = self.manager.export_csv()
+        self.jobs.last_label = "Exporting CSV"
+        self.jobs.watch(future, lambda res: messagebox.showinfo("Export Status", res))
+
+    def show_statistics(self):
+        if not self._ready(): return
+        import analytics
+        if not analytics.available():
+            messagebox.showinfo("Statistics", "School statistics require NumPy (pip install numpy).")
+            return
+        # The students are only ever edited on this thread, so they are copied
+        # into the table here; just the NumPy work goes to the worker
+        table = self.manager.analytics()
+        self.jobs.submit(self._compute_statistics, table, label="Computing statistics",
+                         on_done=self._show_statistics, on_error=lambda e: messagebox.showerror("Error", str(e)))
+
+    @staticmethod
+    def _compute_statistics(table):
+        return table, table.school_stats(), table.class_stats(), table.lesson_stats(), table.absence_correlation()
+
+    def _show_statistics(self, result):
+        table, summary, class_rows, lesson_rows, corr = result
+        popup = self._create_popup_window("School Statistics", 760, 640)
+        content = ttk.Frame(popup, padding=20, style="Card.TFrame")
+        content.pack(fill=tk.BOTH, expand=True)
+
+        overview = f"{summary['students']} students  |  {summary['classes']} classes  |  {summary['lessons']} lessons"
+        if summary['count']:
+            overview += f"  |  {summary['count']} grades, mean {summary['mean']:.2f}, median {summary['p50']:.1f}"
+        ttk.Label(content, text=overview, background=WHITE).pack(anchor=tk.W)
+        if corr['r'] is not None:
+            ttk.Label(content, text=f"Absence vs. general average: r = {corr['r']:.3f} ({corr['slope']:+.2f} points per absence)",
+                      foreground="#7f8c8d", background=WHITE).pack(anchor=tk.W, pady=(5, 0))
+
+        notebook = ttk.Notebook(content)
+        notebook.pack(fill=tk.BOTH, expand=True, pady=(15, 0))
+
+        columns = ("name", "count", "mean", "std", "min", "p25", "p50", "p75", "max")
+        headings = ("Name", "Grades", "Mean", "Std", "Min", "P25", "Median", "P75", "Max")
+
+        def distribution_tab(title, rows):
+            tree = ttk.Treeview(notebook, columns=columns, show="headings")
+            for column, heading in zip(columns, headings):
+                tree.heading(column, text=heading)
+                tree.column(column, width=130 if column == "name" else 65, anchor=tk.W if column == "name" else tk.E)
+            for r in rows:
+                tree.insert("", tk.END, values=(r['name'], r['count'], f"{r['mean']:.2f}", f"{r['std']:.2f}", f"{r['min']:.0f}",
+                                                f"{r['p25']:.1f}", f"{r['p50']:.1f}", f"{r['p75']:.1f}", f"{r['max']:.0f}"))
+            notebook.add(tree, text=title)
+
+        distribution_tab("Classes", class_rows)
+        distribution_tab("Lessons", lesson_rows)
+
+        # Ranking within one class
+        ranking_frame = ttk.Frame(notebook)
+        class_var = tk.StringVar()
+        selector = ttk.Combobox(ranking_frame, textvariable=class_var, state="readonly",
+                                values=[r['name'] for r in class_rows])
+        selector.pack(anchor=tk.W, pady=10)
+        ranking_tree = ttk.Treeview(ranking_frame, columns=("rank", "name", "average"), show="headings")
+        for column, heading, width in (("rank", "Rank", 60), ("name", "Name", 300), ("average", "Average", 100)):
+            ranking_tree.heading(column, text=heading)
+            ranking_tree.column(column, width=width)
+        ranking_tree.pack(fill=tk.BOTH, expand=True)
+
+        def show_ranking(event=None):
+            ranking_tree.delete(*ranking_tree.get_children())
+            for entry in table.class_rankings(class_var.get()).get(class_var.get(), []):
+                ranking_tree.insert("", tk.END, values=(entry['rank'], entry['name'], f"{entry['average']:.2f}"))
+
+        selector.bind("<<ComboboxSelected>>", show_ranking)
+        if class_rows:
+            class_var.set(class_rows[0]['name'])
+            show_ranking()
+        notebook.add(ranking_frame, text="Class Ranking")
 
 if __name__ == "__main__":
+    instrumentation.setup(sys.argv[1:])
     root = tk.Tk()
     # Attempt to set High DPI awareness on Windows if applicable
     try:
@@ -0,0 +1,255 @@
+"""
+Bulk import of students and grades from CSV or JSON Lines (optionally .gz).
+
+The input is streamed in chunks of CHUNK_ROWS rows. Each chunk is parsed and
+validated on its own, in a process pool when the file is larger than
+PARALLEL_BYTES, and the results come back in file order so
+StudentManager.import_students/import_grades can skip duplicate ids and
+persist every chunk as one batch. Invalid rows are reported with their line
+number instead of aborting the import.
+
+    students  CSV with the csv_export headers (ID, Name, Surname, Class,
+              Absence, Absence Dates, Grades) or the field names (id, name,
+              surname, class_name, absence_count, absence_dates, grades); or
+              JSON Lines of student objects as stored in students.json. Rows
+              without an id get one.
+    grades    CSV (e.g. a --long export) or JSON Lines rows with id, lesson
+              and grade, and optionally term, date and weight.
+"""
+import csv
+import gzip
+import json
+import os
+import uuid
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from csv_export import COLUMNS
+from models import WEIGHT_SCALE, GradeInfo, parse_day, weight_units
+
+CHUNK_ROWS = 5000
+# Smaller inputs are parsed in-process: starting the pool costs more than it saves
+PARALLEL_BYTES = 16 * 2**20
+FORMATS = ("csv", "jsonl")
+KINDS = ("students", "grades")
+
+STUDENT_FIELDS = ("id", "name", "surname", "class_name", "absence_count", "absence_dates", "grades")
+# Accepted CSV headers (case-insensitive) -> field
+GRADE_FIELDS = ("lesson", "grade", "term", "date", "weight")
+HEADER_ALIASES = {**{f: f for f in STUDENT_FIELDS + GRADE_FIELDS},
+                  **{COLUMNS[f][0].lower(): f for f in STUDENT_FIELDS}}
+
+Chunk = List[Tuple[int, object]]          # (line number, raw row)
+Errors = List[Tuple[int, str]]            # (line number, message)
+
+class ImportReport:
+    """Outcome of an import: rows added, duplicate ids skipped and invalid rows."""
+
+    def __init__(self):
+        self.imported = 0
+        self.duplicates: List[Tuple[int, str]] = []
+        self.errors: Errors = []
+
+    def __str__(self) -> str:
+        return (f"Imported {self.imported} rows, skipped {len(self.duplicates)} duplicate ids, "
+                f"{len(self.errors)} invalid rows.")
+
+    def write(self, path: str):
+        """Writes the skipped rows as CSV (line, problem)."""
+        with open(path, 'w', encoding='utf-8', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(["Line", "Problem"])
+            writer.writerows(self.errors)
+            writer.writerows((line, f"duplicate id {student_id}") for line, student_id in self.duplicates)
+
+def detect_format(path: str) -> str:
+    name = path[:-3] if path.endswith('.gz') else path
+    ext = os.path.splitext(name)[1].lower()
+    if ext == '.csv':
+        return "csv"
+    if ext in ('.jsonl', '.ndjson'):
+        return "jsonl"
+    raise ValueError(f"Cannot tell the format of {path}; use a .csv or .jsonl name or pass the format")
+
+def _open(path: str):
+    if path.endswith('.gz'):
+        return gzip.open(path, 'rt', encoding='utf-8', newline='')
+    return open(path, 'r', encoding='utf-8', newline='')
+
+def read_chunks(path: str, fmt: str, chunk_size: int = CHUNK_ROWS) -> Iterator[Chunk]:
+    """Raw rows in chunks: JSON text lines, or dicts keyed by field for CSV."""
+    with _open(path) as f:
+        chunk: Chunk = []
+        if fmt == "jsonl":
+            rows = ((number, line) for number, line in enumerate(f, 1) if line.strip())
+        else:
+            reader = csv.reader(f)
+            header = next(reader, None) or []
+            fields = [HEADER_ALIASES.get(h.strip().lower()) for h in header]
+            # reader.line_num is the last line of the row (quoted fields can span lines)
+            rows = ((reader.line_num, {field: value for field, value in zip(fields, row) if field})
+                    for row in reader if row)
+        for row in rows:
+            chunk.append(row)
+            if len(chunk) == chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+# --- Validation (runs in worker processes, so module-level and picklable) ---
+
+def _integer(value, message: str) -> int:
+    if isinstance(value, str):
+        try:
+            value = int(value.strip())
+        except ValueError:
+            raise ValueError(f"{message}, got {value!r}") from None
+    if isinstance(value, bool) or not isinstance(value, int):
+        raise ValueError(f"{message}, got {value!r}")
+    return value
+
+def _grade(value) -> int:
+    grade = _integer(value, "grade must be an integer between 0 and 100")
+    if not (0 <= grade <= 100):
+        raise ValueError(f"grade must be an integer between 0 and 100, got {grade}")
+    return grade
+
+def _grade_list(values: list) -> List[int]:
+    # Fast path for the common case of already valid JSON integers
+    if all(type(g) is int and 0 <= g <= 100 for g in values):
+        return values
+    return [_grade(g) for g in values]
+
+def _parse_grades_text(text: str) -> Dict[str, List[int]]:
+    """Parses the export's Grades column: 'Math: 85 90; Physics: 70'."""
+    grades: Dict[str, List[int]] = {}
+    for part in text.split(";"):
+        if not part.strip():
+            continue
+        lesson, sep, values = part.rpartition(":")
+        if not sep or not lesson.strip():
+            raise ValueError(f"malformed grades {part.strip()!r}")
+        grades.setdefault(lesson.strip(), []).extend(_grade(v) for v in values.split())
+    return grades
+
+def _student(data) -> Dict:
+    if not isinstance(data, dict):
+        raise ValueError("expected an object")
+    record = {}
+    for field in ("name", "surname", "class_name"):
+        value = data.get(field)
+        if not isinstance(value, str) or not value.strip():
+            raise ValueError(f"{field} is required")
+        record[field] = value.strip()
+    student_id = data.get("id")
+    if student_id is not None and not isinstance(student_id, str):
+        raise ValueError("id must be a string")
+    record["id"] = (student_id or "").strip() or str(uuid.uuid4())
+
+    days = data.get("absence_dates") or []
+    if isinstance(days, str):
+        days = days.replace(",", " ").split()
+    if not isinstance(days, list):
+        raise ValueError("absence_dates must be a list of YYYY-MM-DD dates")
+    try:
+        days = sorted({date.fromisoformat(str(d).strip()).isoformat() for d in days})
+    except ValueError:
+        raise ValueError(f"absence_dates must be YYYY-MM-DD dates, got {data.get('absence_dates')!r}") from None
+    if days:
+        record["absence_dates"] = days
+
+    absence = data.get("absence_count")
+    absence = len(days) if absence in (None, "") else _integer(absence, "absence_count must be a non-negative integer")
+    if absence < 0:
+        raise ValueError(f"absence_count must be a non-negative integer, got {absence}")
+    if absence < len(days):
+        raise ValueError(f"absence_count {absence} is lower than the {len(days)} absence_dates")
+    record["absence_count"] = absence
+
+    grades = data.get("grades") or {}
+    if isinstance(grades, str):
+        grades = _parse_grades_text(grades)
+    elif isinstance(grades, dict) and all(isinstance(g, list) for g in grades.values()):
+        grades = {str(lesson).strip(): _grade_list(values) for lesson, values in grades.items()}
+    else:
+        raise ValueError("grades must map lessons to lists of grades")
+    if any(not lesson for lesson in grades):
+        raise ValueError("lesson names must not be empty")
+    record["grades"] = grades
+
+    grade_info = data.get("grade_info") or {}
+    if not isinstance(grade_info, dict) or not all(isinstance(i, dict) for i in grade_info.values()):
+        raise ValueError("grade_info must map lessons to {term, date, weight} lists")
+    infos = {}
+    for lesson, info in grade_info.items():
+        if any(info.get(key) is not None and not isinstance(info[key], list) for key in ("term", "date", "weight")):
+            raise ValueError(f"grade_info of {lesson} must hold term, date and weight lists")
+        if lesson in grades:
+            info = GradeInfo.from_dict(info, len(grades[lesson]))
+            if not info.is_default():
+                infos[lesson] = info.to_dict()
+    if infos:
+        record["grade_info"] = infos
+    now = datetime.now().isoformat()
+    for field in ("created_at", "updated_at"):
+        record[field] = data[field] if isinstance(data.get(field), str) else now
+    return record
+
+def _grade_row(data) -> Tuple[str, str, int, Optional[str], Optional[str], float]:
+    if not isinstance(data, dict):
+        raise ValueError("expected an object")
+    student_id, lesson = data.get("id"), data.get("lesson")
+    if not isinstance(student_id, str) or not student_id.strip():
+        raise ValueError("id is required")
+    if not isinstance(lesson, str) or not lesson.strip():
+        raise ValueError("lesson is required")
+    term = str(data.get("term") or "").strip() or None
+    day = data.get("date")
+    day = parse_day(day).isoformat() if day not in (None, "") else None
+    weight = data.get("weight")
+    weight = 1 if weight in (None, "") else weight_units(weight) / WEIGHT_SCALE
+    return student_id.strip(), lesson.strip(), _grade(data.get("grade")), term, day, weight
+
+def validate_chunk(chunk: Chunk, kind: str, fmt: str) -> Tuple[List[Tuple[int, object]], Errors]:
+    """Parses and validates one chunk. Returns ([(line, record)], [(line, error)])."""
+    convert = _student if kind == "students" else _grade_row
+    records, errors = [], []
+    for line, raw in chunk:
+        try:
+            data = json.loads(raw) if fmt == "jsonl" else raw
+            records.append((line, convert(data)))
+        except ValueError as e:   # json.JSONDecodeError is a ValueError too
+            errors.append((line, str(e)))
+    return records, errors
+
+def iter_validated(path: str, kind: str, fmt: Optional[str] = None, chunk_size: int = CHUNK_ROWS,
+                   workers: Optional[int] = None) -> Iterator[Tuple[List[Tuple[int, object]], Errors]]:
+    """
+    Validated chunks of `path`, in file order. workers=None uses a process
+    pool for inputs over PARALLEL_BYTES; workers=1 never does.
+    """
+    if kind not in KINDS:
+        raise ValueError(f"Unknown import kind: {kind} (expected one of {', '.join(KINDS)})")
+    fmt = fmt or detect_format(path)
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown import format: {fmt} (expected one of {', '.join(FORMATS)})")
+    chunks = read_chunks(path, fmt, chunk_size)
+    if workers is None:
+        workers = (os.cpu_count() or 1) if os.path.getsize(path) >= PARALLEL_BYTES else 1
+    if workers <= 1:
+        for chunk in chunks:
+            yield validate_chunk(chunk, kind, fmt)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        # A bounded window of chunks in flight keeps memory flat on huge inputs
+        in_flight = deque()
+        for chunk in chunks:
+            in_flight.append(pool.submit(validate_chunk, chunk, kind, fmt))
+            if len(in_flight) >= workers * 2:
+                yield in_flight.popleft().result()
+        while in_flight:
+            yield in_flight.popleft().result()
@@ -0,0 +1,329 @@
+"""
+Opt-in timers and counters for StudentManager operations and storage I/O.
+
+Off by default. STUDENT_STATS=1 (or --stats on main.py and gui.py) wraps the
+StudentManager methods, the storage backends and the storage file functions
+with timers when the program starts; without it nothing is wrapped and
+normal runs pay nothing. Collected per operation: calls, cumulative time and
+p50/p99/max latency (over the last SAMPLES calls). Counters: bytes read and
+written by the storage layer, and full-file rewrites per file name
+(atomic_open calls, i.e. snapshot folds, caches, exports; SQLite save_all).
+
+The numbers are printed when the program exits, shown by the CLI's
+"Performance Stats" option, or written as JSON to STUDENT_STATS=<file.json>
+(--stats-file). STUDENT_PROFILE=cprofile|tracemalloc (--profile) also
+captures the whole session: a cProfile dump (main thread only; the GUI's
+storage worker is covered by the timers) or the top allocation sites, written
+to STUDENT_PROFILE_FILE (--profile-file) or student_profile.prof/.txt.
+"""
+import argparse
+import atexit
+import functools
+import inspect
+import json
+import os
+import sys
+import threading
+import time
+from collections import Counter, deque
+from contextlib import contextmanager
+from types import GeneratorType
+from typing import Callable, Dict, List, Optional
+
+# Latency samples kept per operation for the percentiles
+SAMPLES = 10000
+PROFILE_MODES = ("cprofile", "tracemalloc")
+# StudentManager internals worth timing alongside its public methods
+MANAGER_INTERNALS = ("_load_from_storage", "_save_to_storage", "_store", "_compact_if_needed")
+BACKEND_METHODS = ("iter_students", "apply", "save_all", "replace_all", "changes", "backup")
+STORAGE_FUNCTIONS = ("load_data", "save_data", "append_journal", "read_journal", "read_journal_from",
+                     "atomic_write_json", "write_jsonl", "backup_data", "backup_records", "journal_length",
+                     "_read_json")
+
+class Timer:
+    __slots__ = ("calls", "total", "samples")
+
+    def __init__(self):
+        self.calls = 0
+        self.total = 0.0
+        self.samples = deque(maxlen=SAMPLES)
+
+    def summary(self) -> Dict:
+        ordered = sorted(self.samples)
+
+        def ms(fraction: float) -> float:
+            return round(ordered[min(len(ordered) - 1, int(fraction * len(ordered)))] * 1000, 3)
+
+        return {"calls": self.calls, "total_ms": round(self.total * 1000, 3),
+                "mean_ms": round(self.total / self.calls * 1000, 3),
+                "p50_ms": ms(0.50), "p99_ms": ms(0.99), "max_ms": round(ordered[-1] * 1000, 3)}
+
+class Stats:
+    """Timers and counters; safe to update from the GUI's worker thread."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.timers: Dict[str, Timer] = {}
+        self.counters: Counter = Counter()
+        self.rewrites: Counter = Counter()
+
+    def record(self, name: str, seconds: float):
+        with self._lock:
+            timer = self.timers.get(name)
+            if timer is None:
+                timer = self.timers[name] = Timer()
+            timer.calls += 1
+            timer.total += seconds
+            timer.samples.append(seconds)
+
+    def count(self, name: str, amount: int = 1):
+        with self._lock:
+            self.counters[name] += amount
+
+    def rewrite(self, path: str, size: int):
+        with self._lock:
+            self.rewrites[os.path.basename(path)] += 1
+            self.counters["full_rewrites"] += 1
+            self.counters["bytes_written"] += size
+
+    def reset(self):
+        with self._lock:
+            self.timers.clear()
+            self.counters.clear()
+            self.rewrites.clear()
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            return {
+                "operations": {name: t.summary() for name, t in sorted(self.timers.items())},
+                "counters": {name: self.counters.get(name, 0)
+                             for name in ("bytes_read", "bytes_written", "full_rewrites")},
+                "rewrites": dict(self.rewrites),
+            }
+
+    def report(self) -> str:
+        data = self.snapshot()
+        lines = [f"{'Operation':<40} {'Calls':>8} {'Total ms':>11} {'p50 ms':>9} {'p99 ms':>9} {'Max ms':>9}"]
+        for name, t in sorted(data["operations"].items(), key=lambda item: -item[1]["total_ms"]):
+            lines.append(f"{name:<40} {t['calls']:>8} {t['total_ms']:>11.1f} {t['p50_ms']:>9.3f} "
+                         f"{t['p99_ms']:>9.3f} {t['max_ms']:>9.3f}")
+        counters = data["counters"]
+        lines.append(f"Read {counters['bytes_read'] / 1024:.1f} KiB, wrote {counters['bytes_written'] / 1024:.1f} KiB, "
+                     f"{counters['full_rewrites']} full-file rewrites"
+                     + (" (" + ", ".join(f"{name}: {n}" for name, n in sorted(data["rewrites"].items())) + ")"
+                        if data["rewrites"] else ""))
+        return "\n".join(lines)
+
+    def dump(self, path: str):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.snapshot(), f, indent=2)
+
+STATS = Stats()
+_enabled = False
+_stats_file: Optional[str] = None
+
+def enabled() -> bool:
+    return _enabled
+
+# --- Wrapping ---
+
+def _size(path: str) -> int:
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return 0
+
+def _timed_iteration(name: str, items, elapsed: float):
+    """Yields from the generator `items`, recording the time spent producing them once it ends or is closed."""
+    try:
+        while True:
+            start = time.perf_counter()
+            try:
+                item = next(items)
+            except StopIteration as stop:
+                return stop.value
+            finally:
+                elapsed += time.perf_counter() - start
+            yield item
+    finally:
+        items.close()
+        STATS.record(name, elapsed)
+
+def _timed_context(name: str, fn: Callable) -> Callable:
+    """A @contextmanager function timed from entering the with block to leaving it."""
+    @functools.wraps(fn)
+    @contextmanager
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            with fn(*args, **kwargs) as value:
+                yield value
+        finally:
+            STATS.record(name, time.perf_counter() - start)
+    return wrapper
+
+def _timed(name: str, fn: Callable, after: Optional[Callable] = None) -> Callable:
+    """
+    fn timed under `name`; after(result, *args, **kwargs) may count bytes once it returns.
+    A generator it returns is timed until it is exhausted, and a @contextmanager
+    function over its with block, not just until the call returns.
+    """
+    if not inspect.isgeneratorfunction(fn) and inspect.isgeneratorfunction(inspect.unwrap(fn)):
+        return _timed_context(name, fn)
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            result = fn(*args, **kwargs)
+        except BaseException:
+            STATS.record(name, time.perf_counter() - start)
+            raise
+        elapsed = time.perf_counter() - start
+        if after is not None:
+            after(result, *args, **kwargs)
+        if isinstance(result, GeneratorType):
+            return _timed_iteration(name, result, elapsed)
+        STATS.record(name, elapsed)
+        return result
+    return wrapper
+
+def _wrap_atomic_open(storage):
+    atomic_open = storage.atomic_open
+
+    @functools.wraps(atomic_open)
+    def wrapper(path: str, binary: bool = False):
+        # Generator-based context manager: the rewrite is counted once the file is in place
+        start = time.perf_counter()
+        with atomic_open(path, binary) as f:
+            yield f
+        STATS.record("storage.atomic_open", time.perf_counter() - start)
+        # Backup manifests get a new name each time; count them together
+        manifest = os.path.basename(os.path.dirname(path)) == "manifests"
+        STATS.rewrite("backup manifests" if manifest else path, _size(path))
+    storage.atomic_open = contextmanager(wrapper)
+
+def _install():
+    import backup_store
+    import snapshot_cache
+    import storage
+    from services import StudentManager
+    from sqlite_storage import SQLiteBackend
+
+    for name, attr in list(vars(StudentManager).items()):
+        if inspect.isfunction(attr) and (not name.startswith("_") or name in MANAGER_INTERNALS):
+            setattr(StudentManager, name, _timed(f"StudentManager.{name}", attr))
+
+    # JsonBackend's rewrites are counted by atomic_open; SQLite rewrites the database in place
+    rewrites = {(SQLiteBackend, "save_all"): lambda ok, self, data: STATS.rewrite(self.path, _size(self.path))}
+    for cls in (storage.JsonBackend, SQLiteBackend):
+        for name in BACKEND_METHODS:
+            setattr(cls, name, _timed(f"{cls.__name__}.{name}", getattr(cls, name), rewrites.get((cls, name))))
+
+    bytes_read = {
+        "_read_json": lambda result, path: STATS.count("bytes_read", _size(path)),
+        "read_journal": lambda result, path=None: STATS.count("bytes_read", _size(storage.journal_file(path))),
+        "read_journal_from": lambda result, path, offset: STATS.count("bytes_read", result[1] - offset),
+    }
+    for name in STORAGE_FUNCTIONS:
+        setattr(storage, name, _timed(f"storage.{name}", getattr(storage, name), bytes_read.get(name)))
+
+    append_journal = storage.append_journal
+
+    def counted_append(records, path=None):
+        before = _size(storage.journal_file(path))
+        result = append_journal(records, path)
+        STATS.count("bytes_written", _size(storage.journal_file(path)) - before)
+        return result
+    storage.append_journal = counted_append
+
+    # JSON Lines snapshots are streamed; the whole file is counted when it is opened.
+    # iter_jsonl() goes through this too, so it is not wrapped itself.
+    storage._iter_jsonl_file = _timed("storage.iter_jsonl", storage._iter_jsonl_file,
+                                      lambda result, f, path: STATS.count("bytes_read", _size(path)))
+    _wrap_atomic_open(storage)
+
+    snapshot_cache.load_cache = _timed(
+        "snapshot_cache.load_cache", snapshot_cache.load_cache,
+        lambda result, path, plain_ids=(): STATS.count("bytes_read",
+                                                      _size(snapshot_cache.cache_file(path)) if result else 0))
+    snapshot_cache.write_cache = _timed(
+        "snapshot_cache.write_cache", snapshot_cache.write_cache,
+        lambda written, path, data: written and STATS.rewrite(snapshot_cache.cache_file(path),
+                                                              _size(snapshot_cache.cache_file(path))))
+    backup_store.BackupStore._write_object = _timed(
+        "BackupStore._write_object", backup_store.BackupStore._write_object,
+        lambda written, *args: STATS.count("bytes_written", written))
+
+def enable(stats_file: Optional[str] = None):
+    """Starts collecting. With stats_file the numbers are written there at exit, else printed."""
+    global _enabled, _stats_file
+    _stats_file = stats_file or _stats_file
+    if _enabled:
+        return
+    _install()
+    _enabled = True
+    atexit.register(_report_at_exit)
+
+def _report_at_exit():
+    if _stats_file:
+        STATS.dump(_stats_file)
+        print(f"Performance stats written to {_stats_file}", file=sys.stderr)
+    elif STATS.timers:
+        print(STATS.report(), file=sys.stderr)
+
+# --- Session profiling ---
+
+def start_profile(mode: str, path: Optional[str] = None):
+    """Profiles the rest of the session with cProfile or tracemalloc; the result is saved at exit."""
+    if mode not in PROFILE_MODES:
+        raise ValueError(f"Unknown profile mode: {mode} (expected one of {', '.join(PROFILE_MODES)})")
+    if mode == "cprofile":
+        import cProfile
+        path = path or "student_profile.prof"
+        profiler = cProfile.Profile()
+        profiler.enable()
+
+        def finish():
+            profiler.disable()
+            profiler.dump_stats(path)
+            print(f"cProfile data written to {path} (view with: python -m pstats {path})", file=sys.stderr)
+    else:
+        import tracemalloc
+        path = path or "student_profile.txt"
+        tracemalloc.start(5)
+
+        def finish():
+            snapshot = tracemalloc.take_snapshot()
+            current, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(f"Current {current / 2**20:.1f} MiB, peak {peak / 2**20:.1f} MiB\n\n")
+                for stat in snapshot.statistics("lineno")[:50]:
+                    f.write(f"{stat}\n")
+            print(f"Allocation profile written to {path} (peak {peak / 2**20:.1f} MiB)", file=sys.stderr)
+    atexit.register(finish)
+
+# --- Command line ---
+
+def add_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument("--stats", action="store_true", help="Time operations and storage I/O (see instrumentation.py)")
+    parser.add_argument("--stats-file", help="Write the stats to this JSON file at exit instead of printing them")
+    parser.add_argument("--profile", choices=PROFILE_MODES, help="Profile the whole session")
+    parser.add_argument("--profile-file", help="Where to write the profile")
+
+def setup(argv: List[str]) -> List[str]:
+    """
+    Applies the instrumentation options (and STUDENT_STATS / STUDENT_PROFILE)
+    for an entry point. Returns the remaining arguments.
+    """
+    parser = argparse.ArgumentParser(add_help=False, allow_abbrev=False)
+    add_arguments(parser)
+    args, rest = parser.parse_known_args(argv)
+    stats = os.environ.get("STUDENT_STATS", "")
+    if args.stats or args.stats_file or stats not in ("", "0"):
+        enable(args.stats_file or (stats if stats not in ("", "0", "1") else None))
+    profile = args.profile or os.environ.get("STUDENT_PROFILE")
+    if profile:
+        start_profile(profile, args.profile_file or os.environ.get("STUDENT_PROFILE_FILE"))
+    return rest
@@ -0,0 +1,81 @@
+"""
+Background job runner used by the GUI to keep storage and other slow work
+off the Tk main thread.
+
+Every job runs on one worker thread, in submission order, so writes reach
+storage in the order they were made and a backend (e.g. a SQLite
+connection) is only ever used from that thread. Completion callbacks are
+not run on the worker: they are queued and run by whoever calls drain(),
+which the GUI does from a root.after() loop.
+"""
+import queue
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Optional
+
+class JobRunner:
+    def __init__(self, name: str = "storage"):
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=name)
+        self._done: "queue.Queue[tuple]" = queue.Queue()
+        self._pending = 0
+        self._lock = threading.Lock()
+        # Label of the most recently submitted labelled job, for status displays
+        self.last_label: Optional[str] = None
+
+    @property
+    def pending(self) -> int:
+        """Jobs queued or running."""
+        return self._pending
+
+    def _finished(self, future: Future):
+        with self._lock:
+            self._pending -= 1
+
+    def submit(self, fn: Callable, *args, label: Optional[str] = None, on_done: Optional[Callable] = None,
+               on_error: Optional[Callable] = None, quiet: bool = False, **kwargs) -> Future:
+        """
+        Queues fn(*args, **kwargs) on the worker. on_done(result) or
+        on_error(exception) is called later from drain(). Quiet jobs (e.g.
+        periodic polling) are not counted in `pending`.
+        """
+        if not quiet:
+            with self._lock:
+                self._pending += 1
+        if label:
+            self.last_label = label
+        future = self._executor.submit(fn, *args, **kwargs)
+        if not quiet:
+            future.add_done_callback(self._finished)
+        self.watch(future, on_done, on_error)
+        return future
+
+    def watch(self, future: Future, on_done: Optional[Callable] = None, on_error: Optional[Callable] = None):
+        """Arranges for on_done(result) or on_error(exception) to run from drain() once future finishes."""
+        future.add_done_callback(lambda f: self._done.put((f, on_done, on_error)))
+
+    def __call__(self, fn: Callable, *args) -> Future:
+        """Lets the runner be used directly as StudentManager.writer."""
+        return self.submit(fn, *args)
+
+    def drain(self) -> int:
+        """Runs the callbacks of finished jobs in the calling thread. Returns how many ran."""
+        finished = 0
+        while True:
+            try:
+                future, on_done, on_error = self._done.get_nowait()
+            except queue.Empty:
+                return finished
+            finished += 1
+            error = future.exception()
+            if error is not None:
+                if on_error is not None:
+                    on_error(error)
+                else:
+                    print(f"Background job failed: {error}")
+            elif on_done is not None:
+                on_done(future.result())
+
+    def shutdown(self, wait: bool = True):
+        """Stops accepting jobs; with wait=True, blocks until every queued write has finished."""
+        self._executor.shutdown(wait=wait)
+        self.drain()
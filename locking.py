@@ -0,0 +1,95 @@
+"""
+Cross-process advisory lock used around every read-modify-write of the JSON
+storage files, so the CLI, the GUI and the server can share one data file.
+
+The lock is taken on a separate `<data file>.lock` file (never on the data
+file itself, which is replaced by rename on every snapshot write). It uses
+fcntl.flock on POSIX and msvcrt.locking on Windows. Locks are re-entrant
+within one FileLock object.
+"""
+import os
+import threading
+import time
+from typing import Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+LOCK_SUFFIX = '.lock'
+
+class LockTimeout(Exception):
+    pass
+
+def lock_file(path: str) -> str:
+    return path + LOCK_SUFFIX
+
+class FileLock:
+    """Exclusive lock on `path + '.lock'`. Use as a context manager."""
+
+    def __init__(self, path: str, timeout: Optional[float] = 30.0):
+        self.path = lock_file(path)
+        self.timeout = timeout
+        self._fd: Optional[int] = None
+        self._depth = 0
+        # flock() is per open file, so threads sharing this object must also exclude each other
+        self._thread_lock = threading.RLock()
+
+    def _try_lock(self, fd: int) -> bool:
+        try:
+            if fcntl is not None:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            else:
+                os.lseek(fd, 0, os.SEEK_SET)
+                msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+            return True
+        except OSError:
+            return False
+
+    def acquire(self):
+        if not self._thread_lock.acquire(timeout=-1 if self.timeout is None else self.timeout):
+            raise LockTimeout(f"Timed out waiting for {self.path}")
+        if self._depth:
+            self._depth += 1
+            return
+        try:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+            deadline = None if self.timeout is None else time.monotonic() + self.timeout
+            delay = 0.001
+            while not self._try_lock(fd):
+                if deadline is not None and time.monotonic() >= deadline:
+                    os.close(fd)
+                    raise LockTimeout(f"Timed out waiting for {self.path}; another process is holding it")
+                time.sleep(delay)
+                delay = min(delay * 2, 0.05)
+        except BaseException:
+            self._thread_lock.release()
+            raise
+        self._fd = fd
+        self._depth = 1
+
+    def release(self):
+        if not self._depth:
+            raise RuntimeError("release() called on an unlocked FileLock")
+        self._depth -= 1
+        if not self._depth:
+            fd, self._fd = self._fd, None
+            try:
+                if fcntl is not None:
+                    fcntl.flock(fd, fcntl.LOCK_UN)
+                else:
+                    os.lseek(fd, 0, os.SEEK_SET)
+                    msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+            finally:
+                os.close(fd)
+        self._thread_lock.release()
+
+    def __enter__(self) -> 'FileLock':
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
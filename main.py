@@ -1,6 +1,10 @@
+import argparse
 import sys
 import os
+from typing import Optional
+import instrumentation
 from services import StudentManager
+from storage import ConflictError, StorageError
 
 def print_menu():
     print("\n--- Student Management System ---")
@@ -14,7 +18,9 @@ def print_menu():
     print("8. Calculate General Average")
     print("9. Update Attendance")
     print("10. Backup Data / Export CSV")
-    print("11. Exit")
+    print("11. School Statistics")
+    print("12. Performance Stats")
+    print("13. Exit")
     print("---------------------------------")
 
 def get_input(prompt: str, required: bool = True) -> str:
@@ -24,6 +30,148 @@ def get_input(prompt: str, required: bool = True) -> str:
             return value
         print("This field is required.")
 
+def print_distribution(title: str, rows):
+    print(f"\n{title:<15} | {'Grades':>6} | {'Mean':>6} | {'Std':>6} | {'Min':>5} | {'P25':>5} | {'Median':>6} | {'P75':>5} | {'Max':>5}")
+    print("-" * 88)
+    for r in rows:
+        print(f"{r['name']:<15} | {r['count']:>6} | {r['mean']:>6.2f} | {r['std']:>6.2f} | {r['min']:>5.0f} | "
+              f"{r['p25']:>5.1f} | {r['p50']:>6.1f} | {r['p75']:>5.1f} | {r['max']:>5.0f}")
+
+def print_backups(store, last: Optional[int] = None) -> bool:
+    backups = store.list()
+    if not backups:
+        print("No backups yet.")
+        return False
+    print(f"\n{'ID':<23} | {'Created':<19} | {'Students':>8} | Source")
+    print("-" * 70)
+    for backup in backups[-last if last else 0:]:
+        print(f"{backup['id']:<23} | {backup['created'][:19]:<19} | {backup['students']:>8} | {backup.get('source') or ''}")
+    return True
+
+def show_statistics(manager: StudentManager):
+    import analytics
+    if not analytics.available():
+        print("School statistics require NumPy (pip install numpy).")
+        return
+    # Built once; every view below is computed from the same arrays
+    table = manager.analytics()
+    while True:
+        sub_choice = input("\n1. School Summary\n2. Class Statistics\n3. Lesson Distributions\n"
+                           "4. Class Ranking\n5. Absence vs. Grades\n6. Back\nSelect: ")
+        if sub_choice == '1':
+            summary = table.school_stats()
+            print(f"\nStudents: {summary['students']}  Classes: {summary['classes']}  Lessons: {summary['lessons']}")
+            if summary['count']:
+                print_distribution("School", [summary])
+        elif sub_choice == '2':
+            print_distribution("Class", table.class_stats())
+        elif sub_choice == '3':
+            print_distribution("Lesson", table.lesson_stats())
+        elif sub_choice == '4':
+            class_name = get_input("Class: ")
+            ranking = table.class_rankings(class_name).get(class_name, [])
+            if not ranking:
+                print("No graded students in that class.")
+            for entry in ranking:
+                print(f"{entry['rank']:>3}. {entry['name']:<31} {entry['average']:.2f}")
+        elif sub_choice == '5':
+            corr = table.absence_correlation()
+            if corr['r'] is None:
+                print("Not enough data for a correlation.")
+            else:
+                print(f"Correlation between absences and general average: r = {corr['r']:.3f} "
+                      f"over {corr['students']} students ({corr['slope']:+.2f} points per absence)")
+        elif sub_choice == '6':
+            return
+        else:
+            print("Invalid selection.")
+
+def get_average_options():
+    """Asks for the optional term filter and weighting of an average."""
+    term = get_input("Term (blank for all): ", required=False) or None
+    weighted = input("Weighted average? (y/n): ").lower() == 'y'
+    return term, weighted
+
+def manage_attendance(manager: StudentManager):
+    while True:
+        sub_choice = input("\n1. Change Absence Count\n2. Mark Absent on a Date\n3. Remove an Absence\n"
+                           "4. Class Roll Call\n5. Absences in a Date Range\n6. Absence Streaks\n7. Back\nSelect: ")
+        if sub_choice == '1':
+            s_id = get_input("Student ID: ")
+            try:
+                amount = int(get_input("Absence change (e.g., 1 or -1): "))
+            except ValueError:
+                print("Invalid number.")
+                continue
+            if manager.update_attendance(s_id, amount):
+                print("Attendance updated.")
+            else:
+                print("Update failed (check ID or if result is negative).")
+        elif sub_choice == '2':
+            s_id = get_input("Student ID: ")
+            day = get_input("Date (YYYY-MM-DD, blank for today): ", required=False) or None
+            if manager.mark_absent(s_id, day):
+                print("Absence recorded.")
+            else:
+                print("Nothing changed (check ID or if the absence is already recorded).")
+        elif sub_choice == '3':
+            s_id = get_input("Student ID: ")
+            day = get_input("Date (YYYY-MM-DD): ")
+            if manager.mark_present(s_id, day):
+                print("Absence removed.")
+            else:
+                print("No absence recorded for that student on that date.")
+        elif sub_choice == '4':
+            class_name = get_input("Class: ")
+            roster = manager.get_class_roster(class_name)
+            if not roster:
+                print("No students in that class.")
+                continue
+            day = get_input("Date (YYYY-MM-DD, blank for today): ", required=False) or None
+            for i, s in enumerate(roster, 1):
+                print(f"{i:>3}. {s.name} {s.surname}")
+            picks = get_input("Numbers of the absent students (space separated, blank for none): ", required=False)
+            try:
+                absent = [roster[int(n) - 1].id for n in picks.replace(",", " ").split()]
+            except (ValueError, IndexError):
+                print("Invalid selection.")
+                continue
+            changed = manager.roll_call(class_name, absent, day)
+            print(f"Roll call saved: {len(absent)} absent, {changed} students changed.")
+        elif sub_choice == '5':
+            start = get_input("From (YYYY-MM-DD, blank for the start): ", required=False) or None
+            end = get_input("To (YYYY-MM-DD, blank for the end): ", required=False) or None
+            class_name = get_input("Class (blank for all): ", required=False) or None
+            rows = manager.absences_between(start, end, class_name)
+            if not rows:
+                print("No absences in that range.")
+            for s, count in rows:
+                print(f"{s.id:<36} | {s.name:<15} | {s.surname:<15} | {s.class_name:<5} | {count}")
+        elif sub_choice == '6':
+            try:
+                min_days = int(get_input("Minimum consecutive school days (default 3): ", required=False) or 3)
+            except ValueError:
+                print("Invalid number.")
+                continue
+            class_name = get_input("Class (blank for all): ", required=False) or None
+            rows = manager.absence_streaks(min_days, class_name=class_name)
+            if not rows:
+                print("No such streaks.")
+            for s, streak in rows:
+                print(f"{s.id:<36} | {s.name:<15} | {s.surname:<15} | {s.class_name:<5} | {streak} days")
+        elif sub_choice == '7':
+            return
+        else:
+            print("Invalid selection.")
+
+def show_performance_stats():
+    if not instrumentation.enabled():
+        print("Instrumentation is off. Start with --stats (or STUDENT_STATS=1) to collect timings.")
+        return
+    print(instrumentation.STATS.report())
+    if input("Reset the counters? (y/n): ").lower() == 'y':
+        instrumentation.STATS.reset()
+
 def main():
     manager = StudentManager()
 
@@ -45,9 +193,11 @@ def main():
 
     while True:
         print_menu()
-        choice = input("Select an option (1-11): ")
+        choice = input("Select an option (1-13): ")
 
         try:
+            # Pick up edits made by other running instances (GUI, server, ...)
+            manager.sync()
             if choice == '1':
                 name = get_input("Name: ")
                 surname = get_input("Surname: ")
@@ -60,12 +210,23 @@ def main():
                 sort_key = None
                 if sort_opt == '2': sort_key = 'average'
                 elif sort_opt == '3': sort_key = 'absence'
-                
-                students = manager.list_students(sort_by=sort_key)
+
+                lesson, term, weighted = None, None, False
+                if sort_key:
+                    class_name = get_input("Class (blank for all): ", required=False) or None
+                    if sort_key == 'average':
+                        lesson = get_input("Lesson (blank for general average): ", required=False) or None
+                        term, weighted = get_average_options()
+                    limit = get_input("How many (blank for all): ", required=False)
+                    students = manager.rank_students(sort_key, limit=int(limit) if limit else None,
+                                                     class_name=class_name, lesson=lesson,
+                                                     term=term, weighted=weighted)
+                else:
+                    students = manager.list_students()
                 print(f"\n{'ID':<36} | {'Name':<15} | {'Surname':<15} | {'Class':<5} | {'Absence':<7} | {'Avg':<5}")
                 print("-" * 100)
                 for s in students:
-                    avg = manager.calculate_average(s.id)
+                    avg = s.average(lesson, term, weighted)
                     print(f"{s.id:<36} | {s.name:<15} | {s.surname:<15} | {s.class_name:<5} | {s.absence_count:<7} | {avg:.2f}")
 
             elif choice == '3':
@@ -74,9 +235,13 @@ def main():
                 if student:
                     print(f"\n--- {student.name} {student.surname} ({student.class_name}) ---")
                     print(f"Absence: {student.absence_count}")
+                    if student.absence_dates:
+                        days = student.absence_days()
+                        print(f"Absent on: {', '.join(days[-10:])}" + (f" (and {len(days) - 10} earlier)" if len(days) > 10 else ""))
                     print("Grades:")
-                    for lesson, grades in student.grades.items():
-                        print(f"  {lesson}: {grades}")
+                    history = student.grade_history()
+                    for lesson in student.grades:
+                        print(f"  {lesson}: {', '.join(e.describe() for e in history if e.lesson == lesson)}")
                 else:
                     print("Student not found.")
 
@@ -106,7 +271,10 @@ def main():
                 lesson = get_input("Lesson Name: ")
                 try:
                     grade = int(get_input("Grade (0-100): "))
-                    if manager.add_grade(s_id, lesson, grade):
+                    term = get_input("Term (optional): ", required=False) or None
+                    day = get_input("Date (YYYY-MM-DD, optional): ", required=False) or None
+                    weight = float(get_input("Weight (blank for 1): ", required=False) or 1)
+                    if manager.add_grade(s_id, lesson, grade, term, day, weight):
                         print("Grade added.")
                     else:
                         print("Failed to add grade.")
@@ -116,43 +284,176 @@ def main():
             elif choice == '7':
                 s_id = get_input("Student ID: ")
                 lesson = get_input("Lesson Name: ")
-                avg = manager.calculate_average(s_id, lesson)
+                term, weighted = get_average_options()
+                avg = manager.calculate_average(s_id, lesson, term, weighted)
                 print(f"Average for {lesson}: {avg:.2f}")
 
             elif choice == '8':
                 s_id = get_input("Student ID: ")
-                avg = manager.calculate_average(s_id)
+                term, weighted = get_average_options()
+                avg = manager.calculate_average(s_id, term=term, weighted=weighted)
                 print(f"General Average: {avg:.2f}")
 
             elif choice == '9':
-                s_id = get_input("Student ID: ")
-                try:
-                    amount = int(get_input("Absence change (e.g., 1 or -1): "))
-                    if manager.update_attendance(s_id, amount):
-                        print("Attendance updated.")
-                    else:
-                        print("Update failed (check ID or if result is negative).")
-                except ValueError:
-                    print("Invalid number.")
+                manage_attendance(manager)
 
             elif choice == '10':
-                sub_choice = input("1. Backup Data\n2. Export CSV\nSelect: ")
+                sub_choice = input("1. Backup Data\n2. Export CSV\n3. Restore Backup\nSelect: ")
                 if sub_choice == '1':
                     print(manager.backup_data())
                 elif sub_choice == '2':
                     print(manager.export_csv())
+                elif sub_choice == '3':
+                    if print_backups(manager.backend.backup_store(), last=10):
+                        backup_id = get_input("Backup ID (blank for the newest): ", required=False) or None
+                        if input("This replaces all current data. Continue? (y/n): ").lower() == 'y':
+                            print(manager.restore_backup(backup_id))
                 else:
                     print("Invalid selection.")
 
             elif choice == '11':
+                show_statistics(manager)
+
+            elif choice == '12':
+                show_performance_stats()
+
+            elif choice == '13':
                 print("Exiting...")
                 break
 
             else:
                 print("Invalid option.")
 
+        except ConflictError as e:
+            print(f"{e}. The latest data has been loaded; please try again.")
+        except StorageError as e:
+            print(f"{e}. The stored data has been reloaded; please try again.")
         except Exception as e:
             print(f"An error occurred: {e}")
 
+def run_command(argv) -> int:
+    """Non-interactive commands, e.g. `python main.py migrate`."""
+    parser = argparse.ArgumentParser(prog="main.py", description="Student Management System")
+    # Applied by instrumentation.setup() before this runs; listed here for --help
+    instrumentation.add_arguments(parser)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    migrate = commands.add_parser("migrate", help="Import students.json into the SQLite database")
+    migrate.add_argument("--json", dest="json_path", help="Source JSON file (default: data/students.json)")
+    migrate.add_argument("--db", dest="db_path", help="Target database (default: data/students.db)")
+
+    convert = commands.add_parser("convert-jsonl", help="Convert students.json to the JSON Lines format")
+    convert.add_argument("--src", help="Source JSON file (default: data/students.json)")
+    convert.add_argument("--dst", help="Target file (default: data/students.jsonl)")
+
+    export = commands.add_parser("export", help="Export the students to CSV, streaming from storage")
+    export.add_argument("--out", help="Target file; a .gz name is compressed (default: data/students_export.csv)")
+    export.add_argument("--columns", help="Comma-separated columns (id, name, surname, class_name, "
+                                          "absence_count, absence_dates, average, grades, created_at, updated_at)")
+    export.add_argument("--long", action="store_true", help="One row per grade instead of one per student")
+    export.add_argument("--lesson-averages", action="store_true", help="Add an average column per lesson")
+    export.add_argument("--gzip", action="store_true", help="Compress the output")
+
+    imports = commands.add_parser("import", help="Import students (or grades) from a CSV or JSON Lines file")
+    imports.add_argument("path", help="Input file (.csv or .jsonl, optionally .gz)")
+    imports.add_argument("--grades", action="store_true", help="Rows are id, lesson, grade instead of students")
+    imports.add_argument("--format", choices=("csv", "jsonl"), help="Input format (default: from the file name)")
+    imports.add_argument("--chunk-size", type=int, help="Rows validated and saved together (default: 5000)")
+    imports.add_argument("--workers", type=int, help="Parser processes (default: one per CPU for large files)")
+    imports.add_argument("--report", help="Write the skipped rows to this CSV file")
+
+    backups = commands.add_parser("backups", help="List the backups, optionally pruning old ones")
+    backups.add_argument("--prune", action="store_true", help="Apply the retention policy now")
+    backups.add_argument("--keep-last", type=int, help="Backups to keep regardless of age (default: 10)")
+    backups.add_argument("--keep-daily", type=int, help="Days for which the last backup is kept (default: 30)")
+
+    restore = commands.add_parser("restore", help="Restore a backup (the newest by default)")
+    restore.add_argument("backup_id", nargs="?", help="Backup ID or a prefix of it, e.g. a date (20260118)")
+    restore.add_argument("--to", help="Write the backup to this file instead of replacing the current data")
+
+    serve = commands.add_parser("serve", help="Serve the student data over an HTTP/JSON API")
+    serve.add_argument("--host", default="127.0.0.1")
+    serve.add_argument("--port", type=int, default=8080)
+
+    args = parser.parse_args(argv)
+
+    if args.command == "migrate":
+        import sqlite_storage
+        count = sqlite_storage.migrate_json(args.json_path, args.db_path)
+        print(f"Migrated {count} students to {args.db_path or sqlite_storage.DB_FILE}.")
+        print("Set STUDENT_STORAGE=sqlite to use the database.")
+    elif args.command == "convert-jsonl":
+        import storage
+        dst = args.dst or os.path.splitext(args.src or storage.DATA_FILE)[0] + '.jsonl'
+        count = storage.convert_to_jsonl(args.src, dst)
+        print(f"Wrote {count} students to {dst}.")
+        print("Set STUDENT_STORAGE=jsonl to use it.")
+    elif args.command == "export":
+        import csv_export
+        import storage
+        from models import get_model
+        backend, model = storage.get_backend(), get_model()
+
+        def students():
+            return (model.from_dict(data) for data in backend.iter_students())
+
+        out = args.out or csv_export.default_path()
+        columns = args.columns.split(",") if args.columns else None
+        lessons = csv_export.lessons_of(students()) if args.lesson_averages else None
+        try:
+            count = csv_export.write_csv(students(), out, columns, args.long, args.lesson_averages, lessons,
+                                         compress=args.gzip or None)
+        except ValueError as e:
+            parser.error(str(e))
+        print(f"Wrote {count} rows to {out}.")
+    elif args.command == "import":
+        import importer
+        manager = StudentManager()
+        run_import = manager.import_grades if args.grades else manager.import_students
+        try:
+            report = run_import(args.path, args.format, args.chunk_size or importer.CHUNK_ROWS, args.workers)
+        except (OSError, ValueError) as e:
+            parser.error(str(e))
+        print(report)
+        for line, problem in report.errors[:10]:
+            print(f"  line {line}: {problem}")
+        if len(report.errors) > 10:
+            print(f"  ... {len(report.errors) - 10} more")
+        if args.report:
+            report.write(args.report)
+            print(f"Skipped rows written to {args.report}.")
+    elif args.command == "backups":
+        import backup_store
+        import storage
+        store = storage.get_backend().backup_store()
+        if args.prune:
+            keep_last = backup_store.KEEP_LAST if args.keep_last is None else args.keep_last
+            keep_daily = backup_store.KEEP_DAILY if args.keep_daily is None else args.keep_daily
+            removed = store.prune(keep_last, keep_daily)
+            print(f"Removed {removed['backups']} backups and {removed['chunks']} chunks "
+                  f"({removed['bytes'] / 1024:.1f} KiB).")
+        print_backups(store)
+        print(f"Backup store: {store.root} ({store.disk_usage() / 1024:.1f} KiB)")
+    elif args.command == "restore":
+        from backup_store import BackupNotFound
+        try:
+            if args.to:
+                import storage
+                store = storage.get_backend().backup_store()
+                manifest = store.find(args.backup_id)
+                storage.save_data(list(store.iter_records(manifest["id"])), args.to)
+                print(f"Wrote backup {manifest['id']} ({manifest['students']} students) to {args.to}.")
+            else:
+                print(StudentManager().restore_backup(args.backup_id))
+        except BackupNotFound as e:
+            parser.error(str(e))
+    elif args.command == "serve":
+        import server
+        server.run(args.host, args.port)
+    return 0
+
 if __name__ == "__main__":
+    argv = instrumentation.setup(sys.argv[1:])
+    if argv:
+        sys.exit(run_command(argv))
     main()
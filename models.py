@@ -1,33 +1,340 @@
+import os
+import sys
 import uuid
+from array import array
+from bisect import bisect_left, bisect_right
 from dataclasses import dataclass, field
-from datetime import datetime
-from typing import Dict, List, Optional
+from functools import lru_cache
+from itertools import compress
+from operator import mul
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
 
-@dataclass
-class Student:
-    name: str
-    surname: str
-    class_name: str
-    id: str = field(default_factory=lambda: str(uuid.uuid4()))
-    grades: Dict[str, List[int]] = field(default_factory=dict)
-    absence_count: int = 0
-    created_at: str = field(default_factory=lambda: datetime.now().isoformat())
-    updated_at: str = field(default_factory=lambda: datetime.now().isoformat())
+from detail_store import DetailStore
+
+# Grade weights are kept as integer hundredths, so weighted sums stay exact integers
+WEIGHT_SCALE = 100
+MAX_WEIGHT = 10
+
+def weight_units(weight) -> int:
+    """A grade weight (e.g. 1, 0.5, 2) in hundredths. Raises ValueError outside (0, MAX_WEIGHT]."""
+    try:
+        units = round(float(weight) * WEIGHT_SCALE)
+    except (TypeError, ValueError):
+        raise ValueError(f"Invalid weight {weight!r}") from None
+    if not 0 < units <= MAX_WEIGHT * WEIGHT_SCALE:
+        raise ValueError(f"Weight must be greater than 0 and at most {MAX_WEIGHT}")
+    return units
+
+def _weight_value(units: int):
+    return units // WEIGHT_SCALE if units % WEIGHT_SCALE == 0 else units / WEIGHT_SCALE
+
+class GradeStats:
+    """
+    Running aggregate of a set of grades, updated in O(1) per grade. wsum and
+    weight are the weighted sum and the total weight, in hundredths; without
+    weights every grade counts once.
+    """
+    __slots__ = ("sum", "count", "min", "max", "wsum", "weight")
+
+    def __init__(self, sum: int = 0, count: int = 0, min: Optional[int] = None, max: Optional[int] = None,
+                 wsum: Optional[int] = None, weight: Optional[int] = None):
+        self.sum = sum
+        self.count = count
+        self.min = min
+        self.max = max
+        self.wsum = sum * WEIGHT_SCALE if wsum is None else wsum
+        self.weight = count * WEIGHT_SCALE if weight is None else weight
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, GradeStats):
+            return NotImplemented
+        return ((self.sum, self.count, self.min, self.max, self.wsum, self.weight) ==
+                (other.sum, other.count, other.min, other.max, other.wsum, other.weight))
+
+    def __repr__(self) -> str:
+        return (f"GradeStats(sum={self.sum}, count={self.count}, min={self.min}, max={self.max}, "
+                f"wsum={self.wsum}, weight={self.weight})")
+
+    def add(self, grade: int, weight: int = WEIGHT_SCALE):
+        self.sum += grade
+        self.count += 1
+        self.wsum += grade * weight
+        self.weight += weight
+        if self.min is None or grade < self.min:
+            self.min = grade
+        if self.max is None or grade > self.max:
+            self.max = grade
+
+    def merge(self, other: 'GradeStats'):
+        if not other.count:
+            return
+        self.sum += other.sum
+        self.count += other.count
+        self.wsum += other.wsum
+        self.weight += other.weight
+        if other.min is not None:
+            self.min = other.min if self.min is None else min(self.min, other.min)
+            self.max = other.max if self.max is None else max(self.max, other.max)
+
+    @classmethod
+    def combined(cls, stats: Iterable['GradeStats']) -> 'GradeStats':
+        """The aggregates of several sets of grades together (a fresh object)."""
+        # Summed attribute by attribute rather than merged: this runs for every student at start-up
+        counted = [s for s in stats if s.count]
+        if not counted:
+            return cls()
+        return cls(sum(s.sum for s in counted), sum(s.count for s in counted),
+                   min(s.min for s in counted), max(s.max for s in counted),
+                   sum(s.wsum for s in counted), sum(s.weight for s in counted))
+
+    @property
+    def average(self) -> float:
+        return self.sum / self.count if self.count else 0.0
+
+    @property
+    def weighted_average(self) -> float:
+        return self.wsum / self.weight if self.weight else 0.0
+
+    @classmethod
+    def from_grades(cls, grades: Iterable[int], weights: Optional[Iterable[int]] = None) -> 'GradeStats':
+        if weights is not None:
+            stats = cls()
+            for grade, weight in zip(grades, weights):
+                stats.add(grade, weight)
+            return stats
+        grades = list(grades)
+        if not grades:
+            return cls()
+        return cls(sum(grades), len(grades), min(grades), max(grades))
+
+    def to_dict(self) -> dict:
+        return {"sum": self.sum, "count": self.count, "min": self.min, "max": self.max,
+                "wsum": self.wsum, "weight": self.weight}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'GradeStats':
+        return cls(sum=data.get("sum", 0), count=data.get("count", 0),
+                   min=data.get("min"), max=data.get("max"),
+                   wsum=data.get("wsum"), weight=data.get("weight"))
+
+def parse_day(value) -> date:
+    """A date from a date or an ISO 'YYYY-MM-DD' string. Raises ValueError otherwise."""
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    try:
+        return date.fromisoformat(str(value).strip())
+    except ValueError:
+        raise ValueError(f"Invalid date {value!r}; use YYYY-MM-DD") from None
+
+# Shared by every student without dated absences; the arrays are replaced, never modified
+NO_DAYS = array('I')
+
+def day_ordinals(days) -> array:
+    """
+    Sorted, de-duplicated date ordinals of an iterable of dates or ISO
+    strings. An array is taken to hold such ordinals already (snapshot cache).
+    """
+    if not days:
+        return NO_DAYS
+    if isinstance(days, array):
+        return days
+    return array('I', sorted({parse_day(d).toordinal() for d in days}))
+
+def _next_school_day(ordinal: int) -> int:
+    # Weekends do not break a streak: Friday is followed by Monday
+    weekday = date.fromordinal(ordinal).weekday()
+    return ordinal + (3 if weekday == 4 else 2 if weekday == 5 else 1)
+
+class LessonTable:
+    """Interns names (lessons, terms) as small integer codes shared by all students."""
+
+    def __init__(self):
+        self._codes: Dict[str, int] = {}
+        self._names: List[str] = []
+
+    def code(self, name: str) -> int:
+        code = self._codes.get(name)
+        if code is None:
+            code = len(self._names)
+            self._codes[name] = code
+            self._names.append(sys.intern(name))
+        return code
+
+    def find(self, name: str) -> Optional[int]:
+        return self._codes.get(name)
+
+    def name(self, code: int) -> str:
+        return self._names[code]
+
+LESSONS = LessonTable()
+# Code 0 stands for "no term"
+TERMS = LessonTable()
+TERMS.code("")
+
+class GradeEntry(NamedTuple):
+    lesson: str
+    grade: int
+    term: Optional[str]
+    date: Optional[str]
+    weight: float
+
+    def describe(self) -> str:
+        """The grade with whatever it has of term, date and weight, e.g. '90 (2025-1, 2025-10-01, x2)'."""
+        extras = [value for value in (self.term, self.date) if value]
+        if self.weight != 1:
+            extras.append(f"x{self.weight}")
+        return f"{self.grade} ({', '.join(extras)})" if extras else str(self.grade)
+
+class GradeInfo:
+    """
+    Term, date and weight of a run of grades, as typed arrays parallel to the
+    grade values: term codes (TERMS, 0 = no term), date ordinals (0 = no
+    date) and weights in hundredths. Lessons whose grades were all entered
+    without these have no GradeInfo at all.
+    """
+    __slots__ = ("terms", "days", "weights")
+
+    def __init__(self, size: int = 0):
+        self.terms = array('H', bytes(2 * size))
+        self.days = array('I', bytes(4 * size))
+        self.weights = array('H', [WEIGHT_SCALE]) * size
+
+    def __len__(self) -> int:
+        return len(self.weights)
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, GradeInfo):
+            return NotImplemented
+        return (self.terms, self.days, self.weights) == (other.terms, other.days, other.weights)
+
+    def append(self, term: Optional[str], day, units: int):
+        self.terms.append(TERMS.code(term) if term else 0)
+        self.days.append(parse_day(day).toordinal() if day else 0)
+        self.weights.append(units)
+
+    def extend(self, other: 'GradeInfo'):
+        self.terms.extend(other.terms)
+        self.days.extend(other.days)
+        self.weights.extend(other.weights)
+
+    def take(self, positions: Iterable[int]) -> 'GradeInfo':
+        info = GradeInfo()
+        for i in positions:
+            info.terms.append(self.terms[i])
+            info.days.append(self.days[i])
+            info.weights.append(self.weights[i])
+        return info
+
+    def is_default(self) -> bool:
+        return not any(self.terms) and not any(self.days) and self.weights.count(WEIGHT_SCALE) == len(self.weights)
+
+    def entry(self, i: int) -> Tuple[Optional[str], Optional[str], float]:
+        day = self.days[i]
+        return (TERMS.name(self.terms[i]) or None, date.fromordinal(day).isoformat() if day else None,
+                _weight_value(self.weights[i]))
+
+    def to_dict(self) -> Dict[str, list]:
+        return {"term": [TERMS.name(code) or None for code in self.terms],
+                "date": [date.fromordinal(day).isoformat() if day else None for day in self.days],
+                "weight": [_weight_value(units) for units in self.weights]}
+
+    @classmethod
+    def from_arrays(cls, terms: array, days: array, weights: array) -> 'GradeInfo':
+        """Wraps columns that are already in GradeInfo's form (term codes from TERMS)."""
+        info = cls.__new__(cls)
+        info.terms, info.days, info.weights = terms, days, weights
+        return info
+
+    @classmethod
+    def from_dict(cls, data: Dict, size: int) -> 'GradeInfo':
+        """
+        Parses the to_dict() form for a lesson with `size` grades: shorter
+        lists are padded with the defaults, longer ones cut.
+        """
+        # Column by column: this runs for every termed lesson at start-up
+        info = cls.__new__(cls)
+        info.terms = _info_column('H', data.get("term"), size, _term_code, 0)
+        info.days = _info_column('I', data.get("date"), size, _day_ordinal, 0)
+        info.weights = _info_column('H', data.get("weight"), size, _units, WEIGHT_SCALE)
+        return info
+
+def _info_column(typecode: str, values, size: int, convert, default: int) -> array:
+    column = array(typecode, map(convert, values[:size]) if values else ())
+    if len(column) < size:
+        column.extend(array(typecode, [default]) * (size - len(column)))
+    return column
+
+def _term_code(term) -> int:
+    return TERMS.code(str(term)) if term else 0
+
+def _day_ordinal(day) -> int:
+    if not day:
+        return 0
+    return _iso_ordinal(day) if isinstance(day, str) else parse_day(day).toordinal()
+
+@lru_cache(maxsize=4096)
+def _iso_ordinal(day: str) -> int:
+    # Called per grade while loading; a roster's grades share a few hundred days
+    return parse_day(day).toordinal()
+
+def _units(weight) -> int:
+    return WEIGHT_SCALE if weight is None or weight == 1 else weight_units(weight)
+
+def _term_groups(grades: List[int], info: GradeInfo) -> List[Tuple[int, List[int], array]]:
+    """A lesson's (term code, grades, weights) per term, in first-seen order; usually just one."""
+    codes = info.terms
+    if not codes:
+        return []
+    if codes.count(codes[0]) == len(codes):
+        return [(codes[0], grades, info.weights)]
+    groups = []
+    for code in dict.fromkeys(codes):
+        picked = [c == code for c in codes]
+        groups.append((code, list(compress(grades, picked)), array('H', compress(info.weights, picked))))
+    return groups
+
+def parse_grade_info(grade_info, grades: Dict) -> Dict[str, GradeInfo]:
+    """GradeInfo per lesson from to_dict() forms (or GradeInfo objects), dropping lessons without grades."""
+    return {lesson: info if isinstance(info, GradeInfo) else GradeInfo.from_dict(info, len(grades[lesson]))
+            for lesson, info in (grade_info or {}).items() if lesson in grades}
+
+class StudentBase:
+    """Serialization, grade and attendance queries shared by the Student representations."""
+    __slots__ = ()
+
+    @classmethod
+    def start_load(cls):
+        """Called before a full (re)load builds every student of a roster."""
 
     def to_dict(self) -> dict:
-        return {
+        data = {
             "id": self.id,
             "name": self.name,
             "surname": self.surname,
             "class_name": self.class_name,
-            "grades": self.grades,
+            # Copied: saves and journal records are serialized on a background
+            # writer while the caller may keep adding grades
+            "grades": {lesson: list(grades) for lesson, grades in self.grades.items()},
             "absence_count": self.absence_count,
             "created_at": self.created_at,
-            "updated_at": self.updated_at
+            "updated_at": self.updated_at,
+            "grade_stats": {lesson: s.to_dict() for lesson, s in self.lesson_stats.items()}
         }
+        if self.absence_dates:
+            data["absence_dates"] = self.absence_days()
+        grade_info = self._grade_info_dict()
+        if grade_info:
+            data["grade_info"] = grade_info
+        return data
+
+    def _grade_info_dict(self) -> Dict[str, Dict]:
+        return {lesson: info.to_dict() for lesson, info in self.grade_info.items()}
 
     @classmethod
-    def from_dict(cls, data: dict) -> 'Student':
+    def from_dict(cls, data: dict) -> 'StudentBase':
         return cls(
             id=data.get("id"),
             name=data.get("name"),
@@ -36,8 +343,626 @@ class Student:
             grades=data.get("grades", {}),
             absence_count=data.get("absence_count", 0),
             created_at=data.get("created_at"),
-            updated_at=data.get("updated_at")
+            updated_at=data.get("updated_at"),
+            lesson_stats={lesson: s if isinstance(s, GradeStats) else GradeStats.from_dict(s)
+                          for lesson, s in data.get("grade_stats", {}).items()},
+            absence_dates=data.get("absence_dates"),
+            grade_info=data.get("grade_info"),
+            # Only the snapshot cache supplies these (see snapshot_cache)
+            term_stats=data.get("term_stats")
         )
 
+    # --- Grades ---
+    # grades holds the grade values per lesson; grade_info the term, date and
+    # weight of each (see GradeInfo), for the lessons that have any.
+    # grade_stats() answers lesson and term queries from cached aggregates.
+
+    def grade_history(self, lesson: Optional[str] = None) -> List[GradeEntry]:
+        """Every grade with its term, date and weight, lesson by lesson in the order entered."""
+        grade_info = self.grade_info
+        entries = []
+        for name, grades in self.grades.items():
+            if lesson and name != lesson:
+                continue
+            info = grade_info.get(name)
+            for i, grade in enumerate(grades):
+                term, day, weight = info.entry(i) if info else (None, None, 1)
+                entries.append(GradeEntry(name, grade, term, day, weight))
+        return entries
+
+    def has_grades(self, lesson: Optional[str] = None, term: Optional[str] = None) -> bool:
+        return self.grade_stats(lesson, term).count > 0
+
+    def average(self, lesson: Optional[str] = None, term: Optional[str] = None, weighted: bool = False) -> float:
+        """Mean of the grades, optionally of one lesson and/or term; weighted=True weighs each grade."""
+        stats = self.grade_stats(lesson, term)
+        return stats.weighted_average if weighted else stats.average
+
+    # --- Attendance ---
+    # absence_dates holds the date ordinals of the recorded absences, sorted.
+    # absence_count is derived: those plus absences counted without a date
+    # (files from before dates were recorded, update_attendance adjustments).
+
+    @property
+    def undated_absences(self) -> int:
+        return self.absence_count - len(self.absence_dates)
+
+    def absence_days(self) -> List[str]:
+        return [date.fromordinal(o).isoformat() for o in self.absence_dates]
+
+    def is_absent(self, day) -> bool:
+        ordinal = parse_day(day).toordinal()
+        days = self.absence_dates
+        i = bisect_left(days, ordinal)
+        return i < len(days) and days[i] == ordinal
+
+    def mark_absent(self, day) -> bool:
+        """Records an absence on `day`. Returns False if one was already recorded."""
+        ordinal = parse_day(day).toordinal()
+        days = self.absence_dates
+        i = bisect_left(days, ordinal)
+        if i < len(days) and days[i] == ordinal:
+            return False
+        self.absence_dates = days[:i] + array('I', (ordinal,)) + days[i:]
+        self.absence_count += 1
+        return True
+
+    def mark_present(self, day) -> bool:
+        """Removes the absence recorded on `day`. Returns False if there was none."""
+        ordinal = parse_day(day).toordinal()
+        days = self.absence_dates
+        i = bisect_left(days, ordinal)
+        if i == len(days) or days[i] != ordinal:
+            return False
+        self.absence_dates = (days[:i] + days[i + 1:]) or NO_DAYS
+        self.absence_count -= 1
+        return True
+
+    def absences_between(self, start=None, end=None) -> int:
+        """Dated absences from `start` to `end`, inclusive (either may be None)."""
+        days = self.absence_dates
+        low = bisect_left(days, parse_day(start).toordinal()) if start else 0
+        high = bisect_right(days, parse_day(end).toordinal()) if end else len(days)
+        return max(0, high - low)
+
+    def absence_streak(self, start=None, end=None) -> int:
+        """Longest run of absences on consecutive school days (Mon-Fri) within the range."""
+        days = self.absence_dates
+        low = bisect_left(days, parse_day(start).toordinal()) if start else 0
+        high = bisect_right(days, parse_day(end).toordinal()) if end else len(days)
+        longest = run = 0
+        previous = None
+        for ordinal in days[low:high]:
+            run = run + 1 if previous is not None and ordinal == _next_school_day(previous) else 1
+            longest = max(longest, run)
+            previous = ordinal
+        return longest
+
+@dataclass
+class Student(StudentBase):
+    name: str
+    surname: str
+    class_name: str
+    id: str = field(default_factory=lambda: str(uuid.uuid4()))
+    grades: Dict[str, List[int]] = field(default_factory=dict)
+    absence_count: int = 0
+    created_at: str = field(default_factory=lambda: datetime.now().isoformat())
+    updated_at: str = field(default_factory=lambda: datetime.now().isoformat())
+    # Per-lesson and overall aggregates, kept in step with grades by add_grade()
+    lesson_stats: Dict[str, GradeStats] = field(default_factory=dict, repr=False, compare=False)
+    stats: GradeStats = field(default_factory=GradeStats, repr=False, compare=False)
+    # Date ordinals of the recorded absences (see StudentBase); accepts ISO strings
+    absence_dates: array = field(default_factory=lambda: NO_DAYS, repr=False)
+    # Lesson -> term, date and weight of its grades (see GradeInfo); accepts the to_dict() form
+    grade_info: Dict[str, GradeInfo] = field(default_factory=dict, repr=False)
+    # Term -> lesson -> aggregates of the grades entered for that term; None
+    # (not known) has them rebuilt from grade_info
+    term_stats: Optional[Dict[str, Dict[str, GradeStats]]] = field(default=None, repr=False, compare=False)
+    # Term -> aggregates of all its grades (term_stats merged over the lessons)
+    term_totals: Dict[str, GradeStats] = field(default_factory=dict, repr=False, compare=False)
+
+    def __post_init__(self):
+        if not isinstance(self.absence_dates, array):
+            self.absence_dates = day_ordinals(self.absence_dates)
+        self.absence_count = max(self.absence_count, len(self.absence_dates))
+        self.grade_info = parse_grade_info(self.grade_info, self.grades)
+        # Aggregates missing or out of date (older files, replayed journal) are
+        # rebuilt; so are those of weighted or termed grades unless term_stats
+        # came with them, as only the snapshot cache stores those
+        stale = ((self.grade_info and self.term_stats is None) or self.lesson_stats.keys() != self.grades.keys() or
+                 any(self.lesson_stats[lesson].count != len(grades) for lesson, grades in self.grades.items()))
+        if stale:
+            self.rebuild_stats()
+        else:
+            if self.term_stats is None:
+                self.term_stats = {}
+            self._total_from_lessons()
+
+    def rebuild_stats(self):
+        # Inlined rather than built from GradeStats.from_grades/merge: this runs
+        # for every student at start-up.
+        grade_info = self.grade_info
+        self.lesson_stats = {}
+        self.term_stats = {}
+        for lesson, grades in self.grades.items():
+            if not grades:
+                self.lesson_stats[lesson] = GradeStats()
+                continue
+            info = grade_info.get(lesson)
+            if info is None:
+                self.lesson_stats[lesson] = GradeStats(sum(grades), len(grades), min(grades), max(grades))
+                continue
+            weights = info.weights
+            self.lesson_stats[lesson] = GradeStats(sum(grades), len(grades), min(grades), max(grades),
+                                                   sum(map(mul, grades, weights)), sum(weights))
+            for term, term_grades, term_weights in _term_groups(grades, info):
+                if term:
+                    self.term_stats.setdefault(TERMS.name(term), {})[lesson] = GradeStats(
+                        sum(term_grades), len(term_grades), min(term_grades), max(term_grades),
+                        sum(map(mul, term_grades, term_weights)), sum(term_weights))
+        self._total_from_lessons()
+
+    def _total_from_lessons(self):
+        self.term_totals = {term: GradeStats.combined(by_lesson.values())
+                            for term, by_lesson in self.term_stats.items()}
+        self.stats = GradeStats.combined(self.lesson_stats.values())
+
+    def add_grade(self, lesson: str, grade: int, term: Optional[str] = None, day=None, weight: float = 1):
+        units = weight_units(weight)
+        grades = self.grades.setdefault(lesson, [])
+        info = self.grade_info.get(lesson)
+        if info is None and (term or day or units != WEIGHT_SCALE):
+            info = self.grade_info[lesson] = GradeInfo(len(grades))
+        grades.append(grade)
+        if info is not None:
+            info.append(term, day, units)
+        self.lesson_stats.setdefault(lesson, GradeStats()).add(grade, units)
+        self.stats.add(grade, units)
+        if term:
+            self.term_stats.setdefault(term, {}).setdefault(lesson, GradeStats()).add(grade, units)
+            self.term_totals.setdefault(term, GradeStats()).add(grade, units)
+
+    def has_lesson(self, lesson: str) -> bool:
+        return lesson in self.lesson_stats
+
+    def terms(self) -> List[str]:
+        return sorted(self.term_stats)
+
+    def grade_stats(self, lesson: Optional[str] = None, term: Optional[str] = None) -> GradeStats:
+        """Aggregates of the grades of one lesson and/or term (all grades by default). Read-only."""
+        if term is None:
+            if lesson:
+                return self.lesson_stats.get(lesson) or GradeStats()
+            return self.stats
+        if lesson:
+            return self.term_stats.get(term, {}).get(lesson) or GradeStats()
+        return self.term_totals.get(term) or GradeStats()
+
     def update_timestamp(self):
         self.updated_at = datetime.now().isoformat()
+
+# Timestamps are kept as seconds since this naive epoch, which keeps the
+# isoformat() round-trip exact and independent of the local timezone.
+_EPOCH = datetime(1970, 1, 1)
+
+def _to_epoch(value: Optional[str]) -> Optional[float]:
+    if not value:
+        return None
+    return (datetime.fromisoformat(value) - _EPOCH).total_seconds()
+
+def _from_epoch(value: Optional[float]) -> Optional[str]:
+    if value is None:
+        return None
+    return (_EPOCH + timedelta(seconds=value)).isoformat()
+
+class CompactStudent(StudentBase):
+    """
+    Memory-lean Student for large rosters: slotted, interned strings, grades
+    in two parallel arrays (lesson code, grade) and epoch-float timestamps.
+    Term, date and weight, once any grade has them, live in a GradeInfo
+    parallel to those arrays; per-term totals are built from it on the first
+    term query and kept up to date afterwards. Exposes the same attributes
+    and dict format as Student.
+    """
+    __slots__ = ("id", "name", "surname", "class_name", "absence_count", "absence_dates",
+                 "_lessons", "_grades", "_info", "_created", "_updated",
+                 "_sum", "_count", "_min", "_max", "_term_totals")
+
+    def __init__(self, name: str, surname: str, class_name: str, id: Optional[str] = None,
+                 grades: Optional[Dict[str, List[int]]] = None, absence_count: int = 0,
+                 created_at: Optional[str] = None, updated_at: Optional[str] = None,
+                 lesson_stats: Optional[Dict[str, GradeStats]] = None, absence_dates=None, grade_info=None,
+                 term_stats: Optional[Dict[str, Dict[str, GradeStats]]] = None):
+        now = datetime.now().isoformat()
+        self.id = id or str(uuid.uuid4())
+        self.name = sys.intern(name) if name else name
+        self.surname = sys.intern(surname) if surname else surname
+        self.class_name = sys.intern(class_name) if class_name else class_name
+        self.absence_dates = day_ordinals(absence_dates)
+        self.absence_count = max(absence_count, len(self.absence_dates))
+        self._created = _to_epoch(created_at or now)
+        self._updated = _to_epoch(updated_at or now)
+        self._lessons = array('H')
+        self._grades = array('B')
+        self._info: Optional[GradeInfo] = None
+        grades = grades or {}
+        grade_info = parse_grade_info(grade_info, grades)
+        for lesson, lesson_grades in grades.items():
+            info = grade_info.get(lesson)
+            if info is not None and self._info is None:
+                self._info = GradeInfo(len(self._grades))
+            self._lessons.extend([LESSONS.code(lesson)] * len(lesson_grades))
+            self._grades.extend(lesson_grades)
+            if self._info is not None:
+                self._info.extend(info or GradeInfo(len(lesson_grades)))
+        # lesson_stats and term_stats are accepted for signature compatibility
+        # only: the aggregates are cheap to derive from the grade array.
+        self.rebuild_stats()
+
+    @property
+    def created_at(self) -> Optional[str]:
+        return _from_epoch(self._created)
+
+    @created_at.setter
+    def created_at(self, value: Optional[str]):
+        self._created = _to_epoch(value)
+
+    @property
+    def updated_at(self) -> Optional[str]:
+        return _from_epoch(self._updated)
+
+    @updated_at.setter
+    def updated_at(self, value: Optional[str]):
+        self._updated = _to_epoch(value)
+
+    @property
+    def grades(self) -> Dict[str, List[int]]:
+        """Lesson -> grades, rebuilt on access. Use add_grade() to modify."""
+        grades: Dict[str, List[int]] = {}
+        for code, grade in zip(self._lessons, self._grades):
+            grades.setdefault(LESSONS.name(code), []).append(grade)
+        return grades
+
+    @property
+    def grade_info(self) -> Dict[str, GradeInfo]:
+        """Lesson -> GradeInfo for the lessons with a term, date or weight, rebuilt on access."""
+        if self._info is None:
+            return {}
+        positions: Dict[int, List[int]] = {}
+        for i, code in enumerate(self._lessons):
+            positions.setdefault(code, []).append(i)
+        infos = {LESSONS.name(code): self._info.take(indexes) for code, indexes in positions.items()}
+        return {lesson: info for lesson, info in infos.items() if not info.is_default()}
+
+    @property
+    def lesson_stats(self) -> Dict[str, GradeStats]:
+        return {lesson: self.grade_stats(lesson) for lesson in self.grades}
+
+    @property
+    def stats(self) -> GradeStats:
+        if self._info is not None:
+            return self.grade_stats()
+        return GradeStats(self._sum, self._count, self._min, self._max)
+
+    def rebuild_stats(self):
+        grades = self._grades
+        self._sum = sum(grades)
+        self._count = len(grades)
+        self._min = min(grades) if grades else None
+        self._max = max(grades) if grades else None
+        self._term_totals: Optional[Dict[int, GradeStats]] = None
+
+    def _totals_by_term(self) -> Dict[int, GradeStats]:
+        """Term code -> aggregates of that term's grades; call only when _info is set."""
+        if self._term_totals is None:
+            totals: Dict[int, GradeStats] = {}
+            for grade, term_code, weight in zip(self._grades, self._info.terms, self._info.weights):
+                if term_code:
+                    stats = totals.get(term_code)
+                    if stats is None:
+                        stats = totals[term_code] = GradeStats()
+                    stats.add(grade, weight)
+            self._term_totals = totals
+        return self._term_totals
+
+    def add_grade(self, lesson: str, grade: int, term: Optional[str] = None, day=None, weight: float = 1):
+        units = weight_units(weight)
+        if self._info is None and (term or day or units != WEIGHT_SCALE):
+            self._info = GradeInfo(len(self._grades))
+        self._lessons.append(LESSONS.code(lesson))
+        self._grades.append(grade)
+        if self._info is not None:
+            self._info.append(term, day, units)
+        self._sum += grade
+        self._count += 1
+        if self._min is None or grade < self._min:
+            self._min = grade
+        if self._max is None or grade > self._max:
+            self._max = grade
+        if term and self._term_totals is not None:
+            self._term_totals.setdefault(TERMS.code(term), GradeStats()).add(grade, units)
+
+    def has_lesson(self, lesson: str) -> bool:
+        code = LESSONS.find(lesson)
+        return code is not None and code in self._lessons
+
+    def terms(self) -> List[str]:
+        if self._info is None:
+            return []
+        return sorted(TERMS.name(code) for code in set(self._info.terms) if code)
+
+    def grade_stats(self, lesson: Optional[str] = None, term: Optional[str] = None) -> GradeStats:
+        """
+        Aggregates of the grades of one lesson and/or term, computed from the
+        arrays; a whole term's come from the per-term totals. Read-only.
+        """
+        code = LESSONS.find(lesson) if lesson else None
+        term_code = TERMS.find(term) if term else None
+        stats = GradeStats()
+        if (lesson and code is None) or (term and (not term_code or self._info is None)):
+            return stats
+        if term_code and code is None:
+            return self._totals_by_term().get(term_code) or stats
+        if self._info is None:
+            for c, grade in zip(self._lessons, self._grades):
+                if code is None or c == code:
+                    stats.add(grade)
+            return stats
+        for c, grade, t, weight in zip(self._lessons, self._grades, self._info.terms, self._info.weights):
+            if (code is None or c == code) and (term_code is None or t == term_code):
+                stats.add(grade, weight)
+        return stats
+
+    def average(self, lesson: Optional[str] = None, term: Optional[str] = None, weighted: bool = False) -> float:
+        if term or (weighted and self._info is not None):
+            return StudentBase.average(self, lesson, term, weighted)
+        if lesson:
+            code = LESSONS.find(lesson)
+            lesson_grades = [g for c, g in zip(self._lessons, self._grades) if c == code]
+            return sum(lesson_grades) / len(lesson_grades) if lesson_grades else 0.0
+        return self._sum / self._count if self._count else 0.0
+
+    def update_timestamp(self):
+        self._updated = (datetime.now() - _EPOCH).total_seconds()
+
+    def __repr__(self) -> str:
+        return (f"CompactStudent(name={self.name!r}, surname={self.surname!r}, "
+                f"class_name={self.class_name!r}, id={self.id!r})")
+
+# SummaryStudent._totals: (lesson code, term code, sum, count, weighted sum, weight) per lesson and term
+TOTALS_STRIDE = 6
+
+class SummaryStudent(StudentBase):
+    """
+    Roster summary for rosters whose grade histories outgrow memory. Only
+    what listing, searching and ranking need stays resident: names, class,
+    absence, updated_at and the grade aggregates (overall, plus sum, count
+    and weighted sum per lesson and term in one array). The grade history,
+    its terms, dates and weights, and created_at are kept in a DetailStore
+    and read back through its LRU cache when something asks for them (a
+    details view, an export, a save).
+    """
+    __slots__ = ("id", "name", "surname", "class_name", "absence_count", "absence_dates", "_updated",
+                 "_totals", "_sum", "_count", "_min", "_max", "_store", "_detail", "_term_memo")
+
+    # Store for students created from now on; replaced by start_load()
+    _current_store: Optional[DetailStore] = None
+
+    def __init__(self, name: str, surname: str, class_name: str, id: Optional[str] = None,
+                 grades: Optional[Dict[str, List[int]]] = None, absence_count: int = 0,
+                 created_at: Optional[str] = None, updated_at: Optional[str] = None,
+                 lesson_stats: Optional[Dict[str, GradeStats]] = None, absence_dates=None, grade_info=None,
+                 term_stats: Optional[Dict[str, Dict[str, GradeStats]]] = None):
+        now = datetime.now().isoformat()
+        self.id = id or str(uuid.uuid4())
+        self.name = sys.intern(name) if name else name
+        self.surname = sys.intern(surname) if surname else surname
+        self.class_name = sys.intern(class_name) if class_name else class_name
+        self.absence_dates = day_ordinals(absence_dates)
+        self.absence_count = max(absence_count, len(self.absence_dates))
+        self._updated = _to_epoch(updated_at or now)
+        self._store = SummaryStudent._store_for_new()
+        grades = grades or {}
+        grade_info = {lesson: info for lesson, info in parse_grade_info(grade_info, grades).items()
+                      if not info.is_default()}
+        # lesson_stats and term_stats are accepted for signature compatibility only (see CompactStudent)
+        details = {"grades": grades, "created_at": created_at or now}
+        if grade_info:
+            details["grade_info"] = {lesson: info.to_dict() for lesson, info in grade_info.items()}
+        self._detail = self._store.put(details)
+        self._summarize(grades, grade_info)
+
+    @classmethod
+    def start_load(cls):
+        # A fresh store per load: the previous one is freed with the last student using it
+        cls._current_store = DetailStore()
+
+    @classmethod
+    def _store_for_new(cls) -> DetailStore:
+        if cls._current_store is None:
+            cls._current_store = DetailStore()
+        return cls._current_store
+
+    def _summarize(self, grades: Dict[str, List[int]], grade_info: Dict[str, GradeInfo]):
+        self._totals = array('I')
+        self._sum = self._count = 0
+        self._min = self._max = None
+        # (term code, its aggregates) of the last whole-term query: ranking or
+        # listing by a term asks for the same one of every student
+        self._term_memo: Optional[Tuple[int, GradeStats]] = None
+        for lesson, lesson_grades in grades.items():
+            code = LESSONS.code(lesson)
+            info = grade_info.get(lesson)
+            if info is None:
+                total = sum(lesson_grades)
+                self._totals.extend((code, 0, total, len(lesson_grades),
+                                     total * WEIGHT_SCALE, len(lesson_grades) * WEIGHT_SCALE))
+            else:
+                for term, term_grades, weights in _term_groups(lesson_grades, info):
+                    self._totals.extend((code, term, sum(term_grades), len(term_grades),
+                                         sum(map(mul, term_grades, weights)), sum(weights)))
+            if lesson_grades:
+                self._sum += sum(lesson_grades)
+                self._count += len(lesson_grades)
+                low, high = min(lesson_grades), max(lesson_grades)
+                self._min = low if self._min is None else min(self._min, low)
+                self._max = high if self._max is None else max(self._max, high)
+
+    def _add_total(self, code: int, term: int, grade: int, weight: int):
+        self._term_memo = None
+        totals = self._totals
+        for i in range(0, len(totals), TOTALS_STRIDE):
+            if totals[i] == code and totals[i + 1] == term:
+                totals[i + 2] += grade
+                totals[i + 3] += 1
+                totals[i + 4] += grade * weight
+                totals[i + 5] += weight
+                return
+        totals.extend((code, term, grade, 1, grade * weight, weight))
+
+    @property
+    def details(self) -> Dict:
+        """{"grades", "created_at", "grade_info"?}, read through the store's cache. Read-only."""
+        return self._store.get(self._detail)
+
+    def _replace_details(self, **changes):
+        self._detail = self._store.put({**self.details, **changes}, cache=True)
+
+    @property
+    def grades(self) -> Dict[str, List[int]]:
+        """Lesson -> grades, loaded on demand. Read-only; use add_grade() to modify."""
+        return self.details["grades"]
+
+    @property
+    def grade_info(self) -> Dict[str, GradeInfo]:
+        details = self.details
+        return parse_grade_info(details.get("grade_info"), details["grades"])
+
+    def _grade_info_dict(self) -> Dict[str, Dict]:
+        return self.details.get("grade_info", {})
+
+    @property
+    def created_at(self) -> Optional[str]:
+        return self.details["created_at"]
+
+    @created_at.setter
+    def created_at(self, value: Optional[str]):
+        self._replace_details(created_at=value)
+
+    @property
+    def updated_at(self) -> Optional[str]:
+        return _from_epoch(self._updated)
+
+    @updated_at.setter
+    def updated_at(self, value: Optional[str]):
+        self._updated = _to_epoch(value)
+
+    @property
+    def lesson_stats(self) -> Dict[str, GradeStats]:
+        grade_info = self.grade_info
+        return {lesson: GradeStats.from_grades(grades, grade_info[lesson].weights if lesson in grade_info else None)
+                for lesson, grades in self.grades.items()}
+
+    @property
+    def stats(self) -> GradeStats:
+        stats = self.grade_stats()
+        stats.min, stats.max = self._min, self._max
+        return stats
+
+    def rebuild_stats(self):
+        self._summarize(self.grades, self.grade_info)
+
+    def add_grade(self, lesson: str, grade: int, term: Optional[str] = None, day=None, weight: float = 1):
+        units = weight_units(weight)
+        details = self.details
+        previous = details["grades"].get(lesson, [])
+        changes = {"grades": {**details["grades"], lesson: previous + [grade]}}
+        stored_info = details.get("grade_info", {})
+        if lesson in stored_info or term or day or units != WEIGHT_SCALE:
+            info = (GradeInfo.from_dict(stored_info[lesson], len(previous)) if lesson in stored_info
+                    else GradeInfo(len(previous)))
+            info.append(term, day, units)
+            changes["grade_info"] = {**stored_info, lesson: info.to_dict()}
+        self._replace_details(**changes)
+        self._add_total(LESSONS.code(lesson), TERMS.code(term) if term else 0, grade, units)
+        self._sum += grade
+        self._count += 1
+        if self._min is None or grade < self._min:
+            self._min = grade
+        if self._max is None or grade > self._max:
+            self._max = grade
+
+    def _lesson_totals(self, lesson: str):
+        code = LESSONS.find(lesson)
+        totals = self._totals
+        found = None
+        if code is not None:
+            for i in range(0, len(totals), TOTALS_STRIDE):
+                if totals[i] == code:
+                    total, count = found or (0, 0)
+                    found = (total + totals[i + 2], count + totals[i + 3])
+        return found
+
+    def has_lesson(self, lesson: str) -> bool:
+        return self._lesson_totals(lesson) is not None
+
+    def terms(self) -> List[str]:
+        return sorted({TERMS.name(self._totals[i + 1]) for i in range(0, len(self._totals), TOTALS_STRIDE)
+                       if self._totals[i + 1]})
+
+    def grade_stats(self, lesson: Optional[str] = None, term: Optional[str] = None) -> GradeStats:
+        """
+        Aggregates of the grades of one lesson and/or term, from the resident
+        totals. min and max are only known for all grades together. Read-only.
+        """
+        code = LESSONS.find(lesson) if lesson else None
+        term_code = TERMS.find(term) if term else None
+        if (lesson and code is None) or (term and not term_code):
+            return GradeStats()
+        whole_term = term_code is not None and code is None
+        if whole_term and self._term_memo is not None and self._term_memo[0] == term_code:
+            return self._term_memo[1]
+        totals = self._totals
+        total = count = wsum = weight = 0
+        for i in range(0, len(totals), TOTALS_STRIDE):
+            if (code is None or totals[i] == code) and (term_code is None or totals[i + 1] == term_code):
+                total += totals[i + 2]
+                count += totals[i + 3]
+                wsum += totals[i + 4]
+                weight += totals[i + 5]
+        stats = GradeStats(total, count, wsum=wsum, weight=weight)
+        if whole_term:
+            self._term_memo = (term_code, stats)
+        return stats
+
+    def average(self, lesson: Optional[str] = None, term: Optional[str] = None, weighted: bool = False) -> float:
+        if term or weighted:
+            return StudentBase.average(self, lesson, term, weighted)
+        if lesson:
+            totals = self._lesson_totals(lesson)
+            return totals[0] / totals[1] if totals and totals[1] else 0.0
+        return self._sum / self._count if self._count else 0.0
+
+    def update_timestamp(self):
+        self._updated = (datetime.now() - _EPOCH).total_seconds()
+
+    def __deepcopy__(self, memo) -> 'SummaryStudent':
+        # Detail versions never change, so the copy shares the store and handle
+        copy = SummaryStudent.__new__(SummaryStudent)
+        for slot in SummaryStudent.__slots__:
+            setattr(copy, slot, getattr(self, slot))
+        copy._totals = array('I', self._totals)
+        return copy
+
+    def __repr__(self) -> str:
+        return (f"SummaryStudent(name={self.name!r}, surname={self.surname!r}, "
+                f"class_name={self.class_name!r}, id={self.id!r})")
+
+MODELS = {"default": Student, "compact": CompactStudent, "summary": SummaryStudent}
+
+def get_model(name: Optional[str] = None):
+    """Returns the Student class selected by name or the STUDENT_MODEL env var (default: Student)."""
+    name = (name or os.environ.get("STUDENT_MODEL") or "default").lower()
+    if name not in MODELS:
+        raise ValueError(f"Unknown student model: {name} (expected one of {', '.join(MODELS)})")
+    return MODELS[name]
@@ -0,0 +1,133 @@
+from typing import Dict, Iterable, List, Optional, Set
+
+# Turkish has two i's: I/ı (dotless) and İ/i (dotted). str.lower() maps 'I' to
+# 'i' and 'İ' to 'i' + a combining dot, so "IŞIK" and "ışık" would never
+# match. Folding every variant to plain 'i' keeps searches working whichever
+# keyboard or spelling was used.
+_TURKISH_FOLD = str.maketrans({"İ": "i", "I": "i", "ı": "i"})
+
+def fold(text: str) -> str:
+    """Turkish-aware case folding used for every search and name lookup."""
+    return (text or "").translate(_TURKISH_FOLD).casefold()
+
+def _trigrams(text: str) -> Set[str]:
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+def _searchable(student) -> str:
+    """Folded text a query is matched against; fields are separated so tokens never span them."""
+    return "\n".join((fold(student.name), fold(student.surname), fold(student.class_name), student.id.lower()))
+
+def _token_matches(token: str, text: str) -> bool:
+    # Short tokens match word prefixes only ("al" finds "Ali", not "Hal"),
+    # longer ones match anywhere, like the old substring search.
+    if len(token) >= 3:
+        return token in text
+    return any(word.startswith(token) for word in text.split())
+
+def matches(student, query: str) -> bool:
+    """True if the student matches the query (every whitespace-separated token must match)."""
+    text = _searchable(student)
+    return all(_token_matches(token, text) for token in fold(query).split())
+
+class SearchIndex:
+    """
+    Trigram + word-prefix index over name, surname, class and id. Queries of
+    three or more characters intersect trigram postings; shorter ones use the
+    prefix map. Candidates are then verified against the folded text.
+    """
+
+    def __init__(self, students: Iterable = ()):
+        self._text: Dict[str, str] = {}
+        self._order: Dict[str, int] = {}
+        self._trigrams: Dict[str, Set[str]] = {}
+        self._prefixes: Dict[str, Set[str]] = {}
+        self._counter = 0
+        # Last query and its (ordered) results, reused when the query is extended
+        self._last_query: Optional[str] = None
+        self._last_results: List[str] = []
+        for student in students:
+            self.add(student)
+
+    def __len__(self) -> int:
+        return len(self._text)
+
+    def _keys(self, text: str):
+        prefixes = {word[:n] for word in text.split() for n in (1, 2)}
+        return _trigrams(text), prefixes
+
+    def add(self, student):
+        if student.id in self._text:
+            self.remove(student.id)
+        text = _searchable(student)
+        self._text[student.id] = text
+        if student.id not in self._order:
+            self._order[student.id] = self._counter
+            self._counter += 1
+        trigrams, prefixes = self._keys(text)
+        for gram in trigrams:
+            self._trigrams.setdefault(gram, set()).add(student.id)
+        for prefix in prefixes:
+            self._prefixes.setdefault(prefix, set()).add(student.id)
+        self._last_query = None
+
+    def remove(self, student_id: str, keep_position: bool = True):
+        """Drops a student. keep_position=True (an update) keeps its place in the result order."""
+        if not keep_position:
+            self._order.pop(student_id, None)
+        text = self._text.pop(student_id, None)
+        if text is None:
+            return
+        trigrams, prefixes = self._keys(text)
+        for index, keys in ((self._trigrams, trigrams), (self._prefixes, prefixes)):
+            for key in keys:
+                bucket = index.get(key)
+                if bucket is not None:
+                    bucket.discard(student_id)
+                    if not bucket:
+                        del index[key]
+        self._last_query = None
+
+    def _candidates(self, token: str) -> Set[str]:
+        if len(token) < 3:
+            return self._prefixes.get(token, set())
+        postings = []
+        for gram in _trigrams(token):
+            bucket = self._trigrams.get(gram)
+            if not bucket:
+                return set()
+            postings.append(bucket)
+        postings.sort(key=len)
+        result = set(postings[0])
+        for bucket in postings[1:]:
+            result &= bucket
+        return result
+
+    def _narrows(self, folded: str, tokens: List[str]) -> bool:
+        """True if every match of `folded` must also have matched the previous query."""
+        last = self._last_query
+        if not last or not folded.startswith(last):
+            return False
+        last_tokens = last.split()
+        old, new = last_tokens[-1], tokens[len(last_tokens) - 1]
+        # A short token matches prefixes but a long one matches substrings, so
+        # growing a token past two characters can find new students.
+        return len(old) >= 3 or len(new) < 3
+
+    def search(self, query: str) -> List[str]:
+        """Ids of matching students, in the order they were indexed."""
+        folded = fold(query).strip()
+        tokens = folded.split()
+        if not tokens:
+            return sorted(self._text, key=self._order.__getitem__)
+
+        if self._narrows(folded, tokens):
+            # The user kept typing: the new matches are a subset of the old ones
+            candidates: Iterable[str] = self._last_results
+        else:
+            smallest = min((self._candidates(token) for token in tokens), key=len)
+            candidates = sorted(smallest, key=self._order.__getitem__)
+
+        results = [sid for sid in candidates
+                   if all(_token_matches(token, self._text[sid]) for token in tokens)]
+        self._last_query, self._last_results = folded, results
+        return results
@@ -0,0 +1,429 @@
+"""
+HTTP/JSON API for StudentManager, built on asyncio streams (standard library only).
+
+    python server.py [--host 127.0.0.1] [--port 8080]     (or: python main.py serve)
+
+Endpoints:
+    GET    /health
+    GET    /students?q=<search>&limit=<n>&offset=<n>
+    GET    /students?sort=average|absence&order=desc|asc&class=<class_name>&lesson=<lesson>&term=<term>
+                    &weighted=1&limit=<n>&offset=<n>
+    POST   /students                      {"name", "surname", "class_name"}
+    GET    /students/<id>
+    PATCH  /students/<id>                 {"name"?, "surname"?, "class_name"?}
+    DELETE /students/<id>
+    POST   /students/<id>/grades          {"lesson", "grade", "term"?, "date"?, "weight"?}
+    GET    /students/<id>/average?lesson=<lesson>&term=<term>&weighted=1
+    POST   /students/<id>/attendance      {"amount"} or {"date", "absent"?: true|false}
+    GET    /students/<id>/attendance?from=<date>&to=<date>
+    POST   /grades                        {"rows": [[student_id, lesson, grade, term?, date?, weight?], ...]}
+    GET    /classes/<class_name>
+    POST   /classes/<class_name>/roll-call {"date"?, "absent": [student_id, ...]}
+    GET    /absences?from=<date>&to=<date>&class=<class_name>
+    GET    /absences/streaks?min_days=<n>&from=<date>&to=<date>&class=<class_name>
+
+Dates are YYYY-MM-DD; a missing date means today (roll call, marking absent).
+
+Every StudentManager call runs on the event loop thread and never awaits,
+so requests cannot interleave inside an operation. Storage writes go through
+the manager's writer hook to a single worker thread (jobs.JobRunner), which
+keeps them in order without blocking the loop. A write request is only
+answered once its record has reached storage; if another process changed
+the same student first, it fails with 409 Conflict after the latest data
+has been loaded. Edits from other processes are picked up every
+SYNC_INTERVAL seconds. Connections are kept alive (HTTP/1.1 semantics)
+until the client closes them or they sit idle.
+
+The server starts listening once the data file has been read; students are
+then built and indexed LOAD_BATCH at a time between requests. A request for
+one student parses just far enough to find it, and one that needs the whole
+roster (listing, search, ranking) finishes the load first.
+"""
+import argparse
+import asyncio
+import json
+from concurrent.futures import Future
+from http import HTTPStatus
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from jobs import JobRunner
+from services import StudentManager
+from storage import ConflictError, StorageError
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8080
+KEEPALIVE_TIMEOUT = 15   # Seconds an idle connection is kept open
+MAX_BODY = 1024 * 1024   # Largest accepted request body (bytes)
+MAX_HEADERS = 100
+SYNC_INTERVAL = 1.0      # Seconds between checks for edits made by other processes
+LOAD_BATCH = 1000        # Students indexed per step of the start-up load
+
+class HTTPError(Exception):
+    def __init__(self, status: HTTPStatus, message: Optional[str] = None):
+        super().__init__(message or status.phrase)
+        self.status = status
+        self.message = message or status.phrase
+
+def _student_json(student) -> Dict:
+    data = student.to_dict()
+    data["average"] = student.average()
+    return data
+
+def _require(body: Dict, *fields: str):
+    missing = [f for f in fields if body.get(f) in (None, "")]
+    if missing:
+        raise HTTPError(HTTPStatus.BAD_REQUEST, f"Missing field(s): {', '.join(missing)}")
+
+def _int_field(body: Dict, field: str) -> int:
+    value = body.get(field)
+    if isinstance(value, bool) or not isinstance(value, int):
+        raise HTTPError(HTTPStatus.BAD_REQUEST, f"'{field}' must be an integer")
+    return value
+
+def _str_field(body: Dict, field: str) -> Optional[str]:
+    """An optional text field: absent or null gives None, anything but a non-empty string is rejected."""
+    value = body.get(field)
+    if value is None:
+        return None
+    if not isinstance(value, str) or not value.strip():
+        raise HTTPError(HTTPStatus.BAD_REQUEST, f"'{field}' must be a non-empty string")
+    return value.strip()
+
+def _flag(query: Dict[str, str], name: str) -> bool:
+    return query.get(name, "").lower() in ("1", "true", "yes")
+
+def _int_param(query: Dict[str, str], name: str) -> Optional[int]:
+    value = query.get(name)
+    if value is None:
+        return None
+    try:
+        number = int(value)
+    except ValueError:
+        number = -1
+    if number < 0:
+        raise HTTPError(HTTPStatus.BAD_REQUEST, f"'{name}' must be a non-negative integer")
+    return number
+
+class StudentServer:
+    def __init__(self, manager: StudentManager, jobs: Optional[JobRunner] = None):
+        self.manager = manager
+        self.jobs = jobs or JobRunner()
+        # Writes queued by the request being dispatched
+        self._request_writes: List[Future] = []
+        self._sync_lock: Optional[asyncio.Lock] = None
+        manager.writer = self._submit_write
+
+    def _submit_write(self, fn, *args) -> Future:
+        # Failures are reported to the client by _flushed, not printed by the runner
+        future = self.jobs.submit(fn, *args, on_error=lambda error: None)
+        self._request_writes.append(future)
+        return future
+
+    async def _flushed(self, writes: List[Future]) -> bool:
+        """
+        Waits for a request's writes. Raises HTTPError 409 if one was rejected as
+        a conflict, 500 if one could not be stored; either way after reloading.
+        """
+        results = await asyncio.gather(*(asyncio.wrap_future(f) for f in writes), return_exceptions=True)
+        self.jobs.drain()
+        for result in results:
+            if isinstance(result, ConflictError):
+                await self.sync(reload=True)
+                raise HTTPError(HTTPStatus.CONFLICT, f"{result}; reload and retry")
+            if isinstance(result, StorageError):
+                # The change was applied in memory only: go back to what storage holds
+                await self.sync(reload=True)
+                raise HTTPError(HTTPStatus.INTERNAL_SERVER_ERROR, str(result))
+            if isinstance(result, BaseException):
+                raise result
+        return all(result is not False for result in results)
+
+    async def sync(self, reload: bool = False) -> int:
+        """Applies edits other processes stored; the storage part runs on the worker."""
+        if self._sync_lock is None:
+            self._sync_lock = asyncio.Lock()
+        async with self._sync_lock:
+            while True:
+                writes = self.manager.write_count
+                records, snapshot = await asyncio.wrap_future(
+                    self.jobs.submit(self.manager.fetch_changes, reload, quiet=True))
+                self.jobs.drain()
+                if records is None and self.manager.write_count != writes:
+                    # Requests wrote meanwhile, so the snapshot is already behind: read again
+                    reload = True
+                    continue
+                return self.manager.apply_changes(records, snapshot)
+
+    async def _finish_loading(self):
+        """Indexes the rest of a lazy load in batches, yielding to requests in between."""
+        while not self.manager.fully_loaded:
+            self.manager.load_next(LOAD_BATCH)
+            await asyncio.sleep(0)
+        print(f"Loaded {self.manager.loaded_count} students")
+
+    async def _sync_loop(self):
+        while True:
+            await asyncio.sleep(SYNC_INTERVAL)
+            try:
+                await self.sync()
+            except Exception as e:
+                print(f"Could not check for changes: {e!r}")
+
+    def _student_or_404(self, student_id: str):
+        student = self.manager.get_student(student_id)
+        if student is None:
+            raise HTTPError(HTTPStatus.NOT_FOUND, f"Student not found: {student_id}")
+        return student
+
+    # --- Routing ---
+
+    def dispatch(self, method: str, path: str, query: Dict[str, str], body: Dict) -> Tuple[HTTPStatus, object]:
+        """Runs one API call. Returns (status, payload); writes it queued are in self._request_writes."""
+        parts = [unquote(p) for p in path.strip("/").split("/") if p]
+        manager = self.manager
+
+        if parts == ["health"] and method == "GET":
+            if not manager.fully_loaded:
+                return HTTPStatus.OK, {"status": "loading", "students": manager.loaded_count}
+            return HTTPStatus.OK, {"status": "ok", "students": manager.loaded_count}
+
+        if parts == ["students"]:
+            if method == "GET":
+                limit, offset = _int_param(query, "limit"), _int_param(query, "offset") or 0
+                if query.get("sort") and not query.get("q"):
+                    try:
+                        students = manager.rank_students(query["sort"], limit, offset, query.get("class"),
+                                                         query.get("lesson"), ascending=query.get("order") == "asc",
+                                                         term=query.get("term"), weighted=_flag(query, "weighted"))
+                    except ValueError as e:
+                        raise HTTPError(HTTPStatus.BAD_REQUEST, str(e))
+                else:
+                    students = manager.search(query["q"]) if query.get("q") else manager.students
+                    students = students[offset:None if limit is None else offset + limit]
+                return HTTPStatus.OK, [_student_json(s) for s in students]
+            if method == "POST":
+                _require(body, "name", "surname", "class_name")
+                student = manager.add_student(str(body["name"]).strip(), str(body["surname"]).strip(),
+                                              str(body["class_name"]).strip())
+                return HTTPStatus.CREATED, _student_json(student)
+            raise HTTPError(HTTPStatus.METHOD_NOT_ALLOWED)
+
+        if parts == ["grades"] and method == "POST":
+            rows = body.get("rows")
+            if not isinstance(rows, list) or not all(isinstance(r, list) and 3 <= len(r) <= 6 for r in rows):
+                raise HTTPError(HTTPStatus.BAD_REQUEST,
+                                "'rows' must be a list of [student_id, lesson, grade, term?, date?, weight?]")
+            try:
+                added = manager.add_grades_bulk(tuple(r) for r in rows)
+            except ValueError as e:
+                raise HTTPError(HTTPStatus.UNPROCESSABLE_ENTITY, str(e))
+            return HTTPStatus.OK, {"added": added}
+
+        if len(parts) == 2 and parts[0] == "classes" and method == "GET":
+            return HTTPStatus.OK, [_student_json(s) for s in manager.get_class_roster(parts[1])]
+
+        if len(parts) == 3 and parts[0] == "classes" and parts[2] == "roll-call" and method == "POST":
+            absent = body.get("absent", [])
+            if not isinstance(absent, list):
+                raise HTTPError(HTTPStatus.BAD_REQUEST, "'absent' must be a list of student ids")
+            try:
+                changed = manager.roll_call(parts[1], absent, body.get("date"))
+            except ValueError as e:
+                raise HTTPError(HTTPStatus.UNPROCESSABLE_ENTITY, str(e))
+            return HTTPStatus.OK, {"class_name": parts[1], "absent": len(absent), "changed": changed}
+
+        if parts and parts[0] == "absences" and method == "GET":
+            try:
+                if parts == ["absences"]:
+                    rows = manager.absences_between(query.get("from"), query.get("to"), query.get("class"))
+                    return HTTPStatus.OK, [{"id": s.id, "name": s.name, "surname": s.surname,
+                                            "class_name": s.class_name, "absences": n} for s, n in rows]
+                if parts == ["absences", "streaks"]:
+                    min_days = _int_param(query, "min_days")
+                    rows = manager.absence_streaks(3 if min_days is None else min_days, query.get("from"),
+                                                   query.get("to"), query.get("class"))
+                    return HTTPStatus.OK, [{"id": s.id, "name": s.name, "surname": s.surname,
+                                            "class_name": s.class_name, "streak": n} for s, n in rows]
+            except ValueError as e:
+                raise HTTPError(HTTPStatus.BAD_REQUEST, str(e))
+
+        if len(parts) >= 2 and parts[0] == "students":
+            student_id = parts[1]
+            student = self._student_or_404(student_id)
+            sub = parts[2:]
+
+            if not sub:
+                if method == "GET":
+                    return HTTPStatus.OK, _student_json(student)
+                if method in ("PATCH", "PUT"):
+                    manager.update_student(student_id, _str_field(body, "name"), _str_field(body, "surname"),
+                                           _str_field(body, "class_name"))
+                    return HTTPStatus.OK, _student_json(student)
+                if method == "DELETE":
+                    manager.delete_student(student_id)
+                    return HTTPStatus.NO_CONTENT, None
+                raise HTTPError(HTTPStatus.METHOD_NOT_ALLOWED)
+
+            if sub == ["grades"] and method == "POST":
+                _require(body, "lesson")
+                try:
+                    manager.add_grade(student_id, str(body["lesson"]).strip(), _int_field(body, "grade"),
+                                      body.get("term"), body.get("date"), body.get("weight", 1))
+                except ValueError as e:
+                    raise HTTPError(HTTPStatus.UNPROCESSABLE_ENTITY, str(e))
+                return HTTPStatus.OK, _student_json(student)
+
+            if sub == ["average"] and method == "GET":
+                lesson, term, weighted = query.get("lesson"), query.get("term"), _flag(query, "weighted")
+                return HTTPStatus.OK, {"id": student_id, "lesson": lesson, "term": term, "weighted": weighted,
+                                       "average": manager.calculate_average(student_id, lesson, term, weighted)}
+
+            if sub == ["attendance"] and method == "POST":
+                if "date" in body:
+                    try:
+                        if body.get("absent", True):
+                            manager.mark_absent(student_id, body["date"])
+                        else:
+                            manager.mark_present(student_id, body["date"])
+                    except ValueError as e:
+                        raise HTTPError(HTTPStatus.UNPROCESSABLE_ENTITY, str(e))
+                elif not manager.update_attendance(student_id, _int_field(body, "amount")):
+                    raise HTTPError(HTTPStatus.UNPROCESSABLE_ENTITY, "Absence count cannot be negative")
+                return HTTPStatus.OK, _student_json(student)
+
+            if sub == ["attendance"] and method == "GET":
+                try:
+                    start, end = query.get("from"), query.get("to")
+                    in_range = student.absences_between(start, end)
+                    streak = student.absence_streak(start, end)
+                except ValueError as e:
+                    raise HTTPError(HTTPStatus.BAD_REQUEST, str(e))
+                days = [d for d in student.absence_days() if (not start or d >= start) and (not end or d <= end)]
+                return HTTPStatus.OK, {"id": student_id, "absence_count": student.absence_count,
+                                       "undated": student.undated_absences, "absences": in_range,
+                                       "dates": days, "longest_streak": streak}
+
+        raise HTTPError(HTTPStatus.NOT_FOUND)
+
+    # --- HTTP ---
+
+    async def _read_request(self, reader: asyncio.StreamReader):
+        """Returns (method, target, version, headers, body), or None when the client closed the connection."""
+        line = await asyncio.wait_for(reader.readline(), KEEPALIVE_TIMEOUT)
+        if not line:
+            return None
+        try:
+            method, target, version = line.decode("latin-1").split()
+        except ValueError:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "Malformed request line")
+
+        headers: Dict[str, str] = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            if len(headers) >= MAX_HEADERS:
+                raise HTTPError(HTTPStatus.REQUEST_HEADER_FIELDS_TOO_LARGE)
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        try:
+            length = int(headers.get("content-length", 0))
+        except ValueError:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "Invalid Content-Length")
+        if length > MAX_BODY:
+            raise HTTPError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE)
+        body = await reader.readexactly(length) if length else b""
+        return method.upper(), target, version, headers, body
+
+    @staticmethod
+    def _keep_alive(version: str, headers: Dict[str, str]) -> bool:
+        connection = headers.get("connection", "").lower()
+        if version == "HTTP/1.0":
+            return connection == "keep-alive"
+        return connection != "close"
+
+    async def _respond(self, writer: asyncio.StreamWriter, status: HTTPStatus, payload, keep_alive: bool):
+        body = b"" if payload is None else json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        head = [f"HTTP/1.1 {status.value} {status.phrase}",
+                f"Content-Length: {len(body)}",
+                f"Connection: {'keep-alive' if keep_alive else 'close'}"]
+        if body:
+            head.append("Content-Type: application/json; charset=utf-8")
+        writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1") + body)
+        await writer.drain()
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        keep_alive = True
+        try:
+            while keep_alive:
+                try:
+                    request = await self._read_request(reader)
+                    if request is None:
+                        break
+                    method, target, version, headers, raw = request
+                    keep_alive = self._keep_alive(version, headers)
+                    url = urlsplit(target)
+                    query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+                    try:
+                        body = json.loads(raw) if raw else {}
+                    except (json.JSONDecodeError, UnicodeDecodeError):
+                        raise HTTPError(HTTPStatus.BAD_REQUEST, "Body must be JSON")
+                    if not isinstance(body, dict):
+                        raise HTTPError(HTTPStatus.BAD_REQUEST, "Body must be a JSON object")
+                    self._request_writes = []
+                    status, payload = self.dispatch(method, url.path, query, body)
+                    writes, self._request_writes = self._request_writes, []
+                    if writes and not await self._flushed(writes):
+                        raise HTTPError(HTTPStatus.INTERNAL_SERVER_ERROR, "Change could not be saved")
+                except HTTPError as e:
+                    status, payload = e.status, {"error": e.message}
+                    if e.status in (HTTPStatus.BAD_REQUEST, HTTPStatus.REQUEST_ENTITY_TOO_LARGE,
+                                    HTTPStatus.REQUEST_HEADER_FIELDS_TOO_LARGE):
+                        # The rest of the stream can no longer be trusted
+                        keep_alive = False
+                except (asyncio.TimeoutError, asyncio.IncompleteReadError):
+                    break
+                except Exception as e:
+                    print(f"Error handling request: {e!r}")
+                    status, payload = HTTPStatus.INTERNAL_SERVER_ERROR, {"error": "Internal server error"}
+                await self._respond(writer, status, payload, keep_alive)
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT, ready: Optional[asyncio.Event] = None):
+        server = await asyncio.start_server(self.handle_connection, host, port)
+        self.address = server.sockets[0].getsockname()[:2]
+        print(f"Serving on http://{self.address[0]}:{self.address[1]}")
+        if ready is not None:
+            ready.set()
+        loader = asyncio.create_task(self._finish_loading())
+        syncer = asyncio.create_task(self._sync_loop())
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            loader.cancel()
+            syncer.cancel()
+            self.jobs.shutdown(wait=True)
+
+def run(host: str = DEFAULT_HOST, port: int = DEFAULT_PORT):
+    """Loads the configured backend and serves it until interrupted."""
+    jobs = JobRunner()
+    # Built on the worker so the backend (e.g. a SQLite connection) belongs to that
+    # thread. Lazily: only the file is read here, serve() indexes the students.
+    manager = jobs.submit(StudentManager, lazy=True).result()
+    try:
+        asyncio.run(StudentServer(manager, jobs).serve(host, port))
+    except KeyboardInterrupt:
+        print("Server stopped.")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Student Management HTTP/JSON API")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    args = parser.parse_args()
+    run(args.host, args.port)
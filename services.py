@@ -1,39 +1,370 @@
-from typing import List, Optional, Dict
-from models import Student
+import copy
+import heapq
+import itertools
+from concurrent.futures import Future
+from contextlib import contextmanager
+from datetime import date
+from operator import itemgetter
+from typing import Any, Callable, Iterable, Iterator, List, Optional, Dict, Tuple
+from models import WEIGHT_SCALE, Student, get_model, parse_day, weight_units
+from search import SearchIndex, fold
+import csv_export
+import importer
 import storage
 
+# Number of journal records after which the journal is folded into a full snapshot.
+COMPACT_THRESHOLD = 1000
+
+def _normalize(text: str) -> str:
+    """Normalizes a name for index lookups (Turkish-aware case, surrounding whitespace)."""
+    return fold(text).strip()
+
 class StudentManager:
-    def __init__(self):
-        self.students: List[Student] = []
-        self._load_from_storage()
+    def __init__(self, backend: Optional[storage.StorageBackend] = None, model=None, lazy: bool = False):
+        self.backend = backend or storage.get_backend()
+        # Student or CompactStudent (see models.get_model / STUDENT_MODEL)
+        self.model = model or get_model()
+        # id -> Student. Dicts keep insertion order, so this doubles as the roster.
+        self._by_id: Dict[str, Student] = {}
+        # Secondary indexes: key -> {id: Student}
+        self._by_class: Dict[str, Dict[str, Student]] = {}
+        self._by_name: Dict[str, Dict[str, Student]] = {}
+        self._by_surname: Dict[str, Dict[str, Student]] = {}
+        # Full-text search index, built on the first search() and maintained afterwards
+        self._search_index: Optional[SearchIndex] = None
+        # Batch state: records waiting to be persisted and the pre-batch copy of
+        # every touched student (None for students added inside the batch).
+        self._batch_depth = 0
+        self._pending: List[Dict] = []
+        self._undo: Dict[str, Optional[Student]] = {}
+        self._undo_order: Optional[List[str]] = None
+        # Remaining students of a lazy load (see load_next)
+        self._loader: Optional[Iterator[Student]] = None
+        # Optional hook that runs storage calls elsewhere, in order: writer(fn, *args)
+        # must return a Future (e.g. jobs.JobRunner). None means storage calls run inline.
+        self.writer: Optional[Callable[..., Future]] = None
+        # Outstanding snapshot rewrite when a writer is set, so it is not queued twice
+        self._compaction: Optional[Future] = None
+        # Storage calls issued so far; lets callers tell whether writes happened in between
+        self.write_count = 0
+        # Set during bulk imports, which compact once at the end instead of every few chunks
+        self._compaction_paused = False
+        self._load_from_storage(lazy)
+
+    @property
+    def students(self) -> List[Student]:
+        self._ensure_loaded()
+        return list(self._by_id.values())
+
+    def _load_from_storage(self, lazy: bool = False):
+        """
+        Load data from storage and convert to Student objects. With lazy=True
+        students are parsed on demand, so lookups can be served before the
+        whole file has been read.
+        """
+        self.model.start_load()
+        with storage.gc_paused():
+            loader = (self.model.from_dict(s) for s in self.backend.iter_students())
+        self._rebuild_indexes(())
+        self._loader = loader
+        if not lazy:
+            self._ensure_loaded()
+
+    @property
+    def fully_loaded(self) -> bool:
+        return self._loader is None
+
+    @property
+    def loaded_count(self) -> int:
+        """Students indexed so far, without finishing a lazy load."""
+        return len(self._by_id)
+
+    def load_next(self, count: int = 1000) -> int:
+        """Indexes up to `count` more students from a lazy load. Returns how many were loaded."""
+        if self._loader is None:
+            return 0
+        loaded = 0
+        for student in itertools.islice(self._loader, count):
+            self._index(student)
+            loaded += 1
+        if loaded < count:
+            self._loader = None
+        return loaded
+
+    def _ensure_loaded(self):
+        if self._loader is None:
+            return
+        with storage.gc_paused():
+            while self._loader is not None:
+                self.load_next(10000)
+
+    def _rebuild_indexes(self, students):
+        self._by_id = {}
+        self._by_class = {}
+        self._by_name = {}
+        self._by_surname = {}
+        self._search_index = None
+        for student in students:
+            self._index(student)
+
+    def _index(self, student: Student):
+        self._by_id[student.id] = student
+        self._index_secondary(student)
+
+    def _unindex(self, student: Student):
+        self._by_id.pop(student.id, None)
+        self._unindex_secondary(student)
+        if self._search_index is not None:
+            self._search_index.remove(student.id, keep_position=False)
+
+    def _index_secondary(self, student: Student):
+        self._by_class.setdefault(student.class_name, {})[student.id] = student
+        self._by_name.setdefault(_normalize(student.name), {})[student.id] = student
+        self._by_surname.setdefault(_normalize(student.surname), {})[student.id] = student
+        if self._search_index is not None:
+            self._search_index.add(student)
+
+    def _unindex_secondary(self, student: Student):
+        for index, key in ((self._by_class, student.class_name),
+                           (self._by_name, _normalize(student.name)),
+                           (self._by_surname, _normalize(student.surname))):
+            bucket = index.get(key)
+            if bucket is not None:
+                bucket.pop(student.id, None)
+                if not bucket:
+                    del index[key]
+        if self._search_index is not None:
+            self._search_index.remove(student.id)
 
-    def _load_from_storage(self):
-        """Load data from storage and convert to Student objects."""
-        data = storage.load_data()
-        self.students = [Student.from_dict(s) for s in data]
+    def _write(self, fn: Callable, *args) -> Any:
+        """Runs a storage call inline, or hands it to the writer hook (returning its Future)."""
+        self.write_count += 1
+        if self.writer is None:
+            return fn(*args)
+        return self.writer(fn, *args)
 
     def _save_to_storage(self):
         """Convert Student objects to dicts and save to storage."""
+        # The dicts are built here, not in the writer, and to_dict copies the
+        # grade lists, so a background save sees a consistent copy while the
+        # caller keeps editing students.
         data = [s.to_dict() for s in self.students]
-        storage.save_data(data)
+        result = self._write(self.backend.save_all, data)
+        if isinstance(result, Future):
+            self._compaction = result
+        return result
+
+    def _persist(self, op: str, student: Student, field: Optional[str] = None, value=None, **extra):
+        """Persists one mutation record, compacting once the backend's journal grows past the threshold."""
+        record = {"op": op, "id": student.id, "ts": student.updated_at}
+        if field is not None:
+            record["field"] = field
+        if value is not None:
+            record["value"] = value
+        record.update(extra)
+        if self._batch_depth:
+            self._pending.append(record)
+            return
+        self._store([record])
+        self._compact_if_needed()
+
+    def _store(self, records: List[Dict]):
+        try:
+            return self._write(self._apply, records)
+        except (storage.ConflictError, storage.StorageError):
+            # Our copy is out of date, or holds a change storage lost: take the
+            # stored state, the caller may retry
+            self.apply_changes(None)
+            raise
+
+    def _apply(self, records: List[Dict]) -> bool:
+        if not self.backend.apply(records):
+            raise storage.StorageError("The change could not be saved")
+        return True
+
+    def _compact_if_needed(self):
+        if self._compaction_paused:
+            return
+        if self._compaction is not None and not self._compaction.done():
+            return
+        if self.backend.pending_changes() >= COMPACT_THRESHOLD:
+            self._save_to_storage()
+
+    def _track(self, student_id: str, deleting: bool = False):
+        """Remembers a student's pre-batch state the first time a batch touches it."""
+        if not self._batch_depth:
+            return
+        if deleting and self._undo_order is None:
+            self._ensure_loaded()
+            self._undo_order = list(self._by_id)
+        if student_id not in self._undo:
+            student = self._by_id.get(student_id)
+            self._undo[student_id] = copy.deepcopy(student) if student else None
+
+    # --- Changes made by other processes ---
+
+    def sync(self) -> int:
+        """Picks up what other processes stored since the last load or sync. Returns the students updated."""
+        return self.apply_changes(self.backend.changes())
+
+    def fetch_changes(self, reload: bool = False) -> Tuple[Optional[List[Dict]], Optional[List[Dict]]]:
+        """
+        The storage half of sync(), for running on a writer thread: returns
+        (records, snapshot) to pass to apply_changes() on the owning thread.
+        """
+        records = None if reload else self.backend.changes()
+        return records, (self.backend.load() if records is None else None)
+
+    def apply_changes(self, records: Optional[List[Dict]], snapshot: Optional[List[Dict]] = None) -> int:
+        """
+        Applies records from backend.changes() to the loaded students, rebuilding
+        only the students they touch. None means reload everything, from
+        `snapshot` if the caller already read it (e.g. on a worker thread).
+        """
+        if records is None:
+            if snapshot is None:
+                self._load_from_storage()
+            else:
+                self.model.start_load()
+                with storage.gc_paused():
+                    self._rebuild_indexes(self.model.from_dict(s) for s in snapshot)
+                self._loader = None
+            return len(self._by_id)
+        if not records:
+            # Nothing to apply, so a lazy load can carry on at its own pace
+            return 0
+
+        self._ensure_loaded()
+        by_id: Dict[str, List[Dict]] = {}
+        for rec in records:
+            by_id.setdefault(rec.get("id"), []).append(rec)
+        for student_id, student_records in by_id.items():
+            current = self._by_id.get(student_id)
+            data = storage.apply_records(current.to_dict() if current else None, student_records)
+            if current is not None:
+                self._unindex_secondary(current)
+            if data is None:
+                if current is not None:
+                    self._unindex(current)
+                continue
+            student = self.model.from_dict(data)
+            # Assigning over an existing key keeps the student's place in the roster
+            self._by_id[student_id] = student
+            self._index_secondary(student)
+        return len(by_id)
+
+    # --- Batches ---
+
+    def begin(self):
+        """Starts deferring persistence. Nested batches join the outermost one."""
+        self._batch_depth += 1
+
+    def commit(self):
+        """
+        Ends a batch; the outermost commit persists every deferred change at once.
+        Returns the backend's result, or a Future for it when a writer is set.
+        """
+        if not self._batch_depth:
+            raise RuntimeError("commit() called without begin()")
+        self._batch_depth -= 1
+        if self._batch_depth:
+            return True
+        pending, self._pending = self._pending, []
+        self._undo, self._undo_order = {}, None
+        ok = self._store(pending)
+        self._compact_if_needed()
+        return ok
+
+    def rollback(self):
+        """Ends a batch; the outermost rollback restores the in-memory state from before begin()."""
+        if not self._batch_depth:
+            raise RuntimeError("rollback() called without begin()")
+        self._batch_depth -= 1
+        if self._batch_depth:
+            return
+        for student_id, original in self._undo.items():
+            if original is None:
+                self._by_id.pop(student_id, None)
+            else:
+                self._by_id[student_id] = original
+        if self._undo_order is not None:
+            self._by_id = {sid: self._by_id[sid] for sid in self._undo_order if sid in self._by_id}
+        if self._undo:
+            # Re-adding the originals would put them last in their class and
+            # name buckets, so those are rebuilt in roster order
+            self._rebuild_indexes(list(self._by_id.values()))
+        self._pending = []
+        self._undo, self._undo_order = {}, None
+
+    @contextmanager
+    def batch(self):
+        """
+        Defers persistence until the block exits. If an exception escapes, the
+        in-memory changes made inside the block are rolled back and nothing is saved.
+        """
+        self.begin()
+        try:
+            yield self
+        except BaseException:
+            self.rollback()
+            raise
+        self.commit()
 
     def add_student(self, name: str, surname: str, class_name: str) -> Student:
-        student = Student(name=name, surname=surname, class_name=class_name)
-        self.students.append(student)
-        self._save_to_storage()
+        self._ensure_loaded()
+        student = self.model(name=name, surname=surname, class_name=class_name)
+        self._track(student.id)
+        self._index(student)
+        self._persist("add", student, value=student.to_dict())
         return student
 
     def get_student(self, student_id: str) -> Optional[Student]:
-        for student in self.students:
-            if student.id == student_id:
-                return student
-        return None
+        student = self._by_id.get(student_id)
+        if student is None and self._loader is not None:
+            # Keep parsing until the student shows up (or the file ends)
+            for student in self._loader:
+                self._index(student)
+                if student.id == student_id:
+                    return student
+            self._loader = None
+            return None
+        return student
+
+    def get_class_roster(self, class_name: str) -> List[Student]:
+        """Returns the students of a class in insertion order."""
+        self._ensure_loaded()
+        return list(self._by_class.get(class_name, {}).values())
+
+    def find_by_name(self, name: Optional[str] = None, surname: Optional[str] = None) -> List[Student]:
+        """Exact (case-insensitive) lookup by name and/or surname."""
+        self._ensure_loaded()
+        buckets = []
+        if name:
+            buckets.append(self._by_name.get(_normalize(name), {}))
+        if surname:
+            buckets.append(self._by_surname.get(_normalize(surname), {}))
+        if not buckets:
+            return []
+        buckets.sort(key=len)
+        smallest, others = buckets[0], buckets[1:]
+        return [s for sid, s in smallest.items() if all(sid in b for b in others)]
+
+    def search(self, query: str) -> List[Student]:
+        """
+        Students whose name, surname, class or id match every word of the query
+        (Turkish-aware, case-insensitive), in roster order.
+        """
+        self._ensure_loaded()
+        if self._search_index is None:
+            self._search_index = SearchIndex(self._by_id.values())
+        return [self._by_id[sid] for sid in self._search_index.search(query)]
 
     def delete_student(self, student_id: str) -> bool:
         student = self.get_student(student_id)
         if student:
-            self.students.remove(student)
-            self._save_to_storage()
+            self._track(student_id, deleting=True)
+            self._unindex(student)
+            self._persist("delete", student, base=student.updated_at)
             return True
         return False
 
@@ -43,46 +374,78 @@ class StudentManager:
         if not student:
             return False
         
-        if name: student.name = name
-        if surname: student.surname = surname
-        if class_name: student.class_name = class_name
+        changes = {field: value for field, value in
+                   (("name", name), ("surname", surname), ("class_name", class_name)) if value}
+        # Checked before anything is unindexed, so a bad value leaves the indexes intact
+        for field, value in changes.items():
+            if not isinstance(value, str):
+                raise ValueError(f"{field} must be a string")
+        
+        self._track(student_id)
+        self._unindex_secondary(student)
+        for field, value in changes.items():
+            setattr(student, field, value)
+        self._index_secondary(student)
         
+        base = student.updated_at
         student.update_timestamp()
-        self._save_to_storage()
+        # Stored together: each record carries the same base, so stored one by
+        # one the second would conflict with the first
+        with self.batch():
+            for field, value in changes.items():
+                self._persist("set", student, field, value, base=base)
         return True
 
-    def add_grade(self, student_id: str, lesson: str, grade: int) -> bool:
+    @staticmethod
+    def _grade_info(term: Optional[str], day, weight) -> Dict:
+        """The optional keys of a grade record, validated. Raises ValueError."""
+        info = {}
+        term = str(term).strip() if term is not None else ""
+        if term:
+            info["term"] = term
+        if day:
+            info["date"] = parse_day(day).isoformat()
+        units = weight_units(weight)
+        if units != WEIGHT_SCALE:
+            info["weight"] = units / WEIGHT_SCALE
+        return info
+
+    def add_grade(self, student_id: str, lesson: str, grade: int, term: Optional[str] = None,
+                  day=None, weight: float = 1) -> bool:
+        """
+        Adds a grade, optionally for a term, on a date (a date or 'YYYY-MM-DD')
+        and with a weight (e.g. 2 for an exam that counts double).
+        """
         student = self.get_student(student_id)
         if not student:
             return False
         
         if not (0 <= grade <= 100):
             raise ValueError("Grade must be between 0 and 100")
+        info = self._grade_info(term, day, weight)
 
-        if lesson not in student.grades:
-            student.grades[lesson] = []
-        
-        student.grades[lesson].append(grade)
+        self._track(student_id)
+        base = student.updated_at
+        student.add_grade(lesson, grade, info.get("term"), info.get("date"), weight)
         student.update_timestamp()
-        self._save_to_storage()
+        self._persist("grade", student, lesson, grade, pos=len(student.grades[lesson]) - 1, base=base, **info)
         return True
 
-    def calculate_average(self, student_id: str, lesson: Optional[str] = None) -> float:
+    def calculate_average(self, student_id: str, lesson: Optional[str] = None, term: Optional[str] = None,
+                          weighted: bool = False) -> float:
         student = self.get_student(student_id)
         if not student:
             return 0.0
         
-        if lesson:
-            grades = student.grades.get(lesson, [])
-            return sum(grades) / len(grades) if grades else 0.0
-        else:
-            # General average (average of all grades flattened)
-            all_grades = []
-            for grades in student.grades.values():
-                all_grades.extend(grades)
-            return sum(all_grades) / len(all_grades) if all_grades else 0.0
+        # Read from the running aggregates; the general average is over all grades flattened
+        return student.average(lesson, term, weighted)
 
     def update_attendance(self, student_id: str, amount: int) -> bool:
+        """
+        Adds `amount` (may be negative) to the absence count without a date.
+        Undated absences are taken off first; a larger decrease removes the
+        most recent dated absences.
+        """
         student = self.get_student(student_id)
         if not student:
             return False
@@ -91,27 +454,322 @@ class StudentManager:
         if new_absence < 0:
             return False # Cannot be negative
         
-        student.absence_count = new_absence
+        self._track(student_id)
+        base = student.updated_at
+        removed = student.absence_days()[new_absence:]
         student.update_timestamp()
-        self._save_to_storage()
+        if removed:
+            student.absence_count = len(student.absence_dates)
+        for day in reversed(removed):
+            student.mark_present(day)
+            self._persist("present", student, value=day, count=student.absence_count, base=base)
+        if not removed:
+            student.absence_count = new_absence
+            self._persist("set", student, "absence_count", new_absence, base=base)
         return True
 
-    def list_students(self, sort_by: str = None) -> List[Student]:
+    def add_grades_bulk(self, rows: Iterable[Tuple]) -> int:
         """
-        List students, optionally sorted by 'average' or 'absence'.
+        Adds many (student_id, lesson, grade[, term[, date[, weight]]]) rows.
+        Every row is validated before anything changes, then all of them are
+        persisted once.
         """
-        if sort_by == 'average':
-            # Calculate average for sorting without modifying actual student record just for sort
-            return sorted(self.students, 
-                          key=lambda s: self.calculate_average(s.id), 
-                          reverse=True)
-        elif sort_by == 'absence':
-            return sorted(self.students, key=lambda s: s.absence_count, reverse=True)
-        
+        rows = list(rows)
+        errors = []
+        for i, (student_id, lesson, grade, *info) in enumerate(rows):
+            if self.get_student(student_id) is None:
+                errors.append(f"row {i}: unknown student {student_id}")
+            elif not lesson:
+                errors.append(f"row {i}: lesson is required")
+            elif isinstance(grade, bool) or not isinstance(grade, int) or not (0 <= grade <= 100):
+                errors.append(f"row {i}: grade must be between 0 and 100")
+            elif len(info) > 3:
+                errors.append(f"row {i}: too many values")
+            else:
+                try:
+                    self._grade_info(*info, *(None, None, 1)[len(info):])
+                except ValueError as e:
+                    errors.append(f"row {i}: {e}")
+        if errors:
+            raise ValueError(f"{len(errors)} invalid rows: " + "; ".join(errors[:10]))
+
+        with self.batch():
+            for student_id, lesson, grade, *info in rows:
+                self.add_grade(student_id, lesson, grade, *info)
+        return len(rows)
+
+    def update_attendance_bulk(self, rows: Iterable[Tuple[str, int]]) -> int:
+        """
+        Applies many (student_id, amount) absence changes, validated up front
+        (unknown ids, negative totals) and persisted once.
+        """
+        rows = list(rows)
+        errors = []
+        totals: Dict[str, int] = {}
+        for i, (student_id, amount) in enumerate(rows):
+            student = self.get_student(student_id)
+            if student is None:
+                errors.append(f"row {i}: unknown student {student_id}")
+                continue
+            if not isinstance(amount, int):
+                errors.append(f"row {i}: amount must be an integer")
+                continue
+            totals[student_id] = totals.get(student_id, student.absence_count) + amount
+            if totals[student_id] < 0:
+                errors.append(f"row {i}: absence count of {student_id} would become negative")
+        if errors:
+            raise ValueError(f"{len(errors)} invalid rows: " + "; ".join(errors[:10]))
+
+        with self.batch():
+            for student_id, amount in rows:
+                self.update_attendance(student_id, amount)
+        return len(rows)
+
+    # --- Dated attendance ---
+
+    def _mark(self, student: Student, day: date, absent: bool) -> bool:
+        """Records or removes the absence of one student on one day. False if it was already so."""
+        if student.is_absent(day) == absent:
+            return False
+        self._track(student.id)
+        base = student.updated_at
+        if absent:
+            student.mark_absent(day)
+        else:
+            student.mark_present(day)
+        student.update_timestamp()
+        # The record carries the resulting count so that replaying it is idempotent
+        self._persist("absent" if absent else "present", student, value=day.isoformat(),
+                      count=student.absence_count, base=base)
+        return True
+
+    def mark_absent(self, student_id: str, day=None) -> bool:
+        """Records an absence on `day` (a date or 'YYYY-MM-DD', default today)."""
+        student = self.get_student(student_id)
+        if not student:
+            return False
+        return self._mark(student, parse_day(day) if day else date.today(), True)
+
+    def mark_present(self, student_id: str, day) -> bool:
+        """Removes the absence recorded on `day`. False if there was none."""
+        student = self.get_student(student_id)
+        if not student:
+            return False
+        return self._mark(student, parse_day(day), False)
+
+    def roll_call(self, class_name: str, absent_ids: Iterable[str], day=None) -> int:
+        """
+        Enters a class's attendance for one day (default today) as one batch:
+        the listed students are marked absent and absences recorded that day
+        for the rest of the class are removed, so entering a roll call again
+        corrects it. Returns the number of students whose attendance changed.
+        """
+        day = parse_day(day) if day else date.today()
+        self._ensure_loaded()
+        roster = self._by_class.get(class_name)
+        if not roster:
+            raise ValueError(f"Unknown class: {class_name}")
+        absent = set(absent_ids)
+        unknown = absent.difference(roster)
+        if unknown:
+            raise ValueError(f"Not in class {class_name}: {', '.join(sorted(unknown))}")
+
+        with self.batch():
+            return sum(self._mark(student, day, student.id in absent) for student in list(roster.values()))
+
+    def absences_between(self, start=None, end=None, class_name: Optional[str] = None) -> List[Tuple[Student, int]]:
+        """
+        (student, dated absences from start to end inclusive) for every
+        student absent in the range, most absences first. Either bound may be
+        None; class_name keeps one class.
+        """
+        start = parse_day(start) if start else None
+        end = parse_day(end) if end else None
+        self._ensure_loaded()
+        candidates = self._by_id.values() if class_name is None else self._by_class.get(class_name, {}).values()
+        counts = ((s, s.absences_between(start, end)) for s in candidates if s.absence_dates)
+        return sorted((row for row in counts if row[1]), key=lambda row: -row[1])
+
+    def absence_streaks(self, min_days: int = 3, start=None, end=None,
+                        class_name: Optional[str] = None) -> List[Tuple[Student, int]]:
+        """
+        (student, longest streak) for the students absent on at least
+        min_days consecutive school days within the range, longest first.
+        """
+        if min_days < 1:
+            raise ValueError("min_days must be at least 1")
+        start = parse_day(start) if start else None
+        end = parse_day(end) if end else None
+        self._ensure_loaded()
+        candidates = self._by_id.values() if class_name is None else self._by_class.get(class_name, {}).values()
+        streaks = ((s, s.absence_streak(start, end)) for s in candidates if len(s.absence_dates) >= min_days)
+        return sorted((row for row in streaks if row[1] >= min_days), key=lambda row: -row[1])
+
+    # --- Bulk import ---
+
+    @contextmanager
+    def _bulk_import(self):
+        self._ensure_loaded()
+        self._compaction_paused = True
+        try:
+            yield
+        finally:
+            self._compaction_paused = False
+            self._compact_if_needed()
+
+    def import_students(self, path: str, fmt: Optional[str] = None, chunk_size: int = importer.CHUNK_ROWS,
+                        workers: Optional[int] = None) -> importer.ImportReport:
+        """
+        Streams students from a CSV or JSON Lines file (see importer). Ids
+        that already exist, in the roster or earlier in the file, are skipped;
+        invalid rows are reported. Each chunk is persisted as one batch.
+        """
+        report = importer.ImportReport()
+        with self._bulk_import():
+            for records, errors in importer.iter_validated(path, "students", fmt, chunk_size, workers):
+                report.errors.extend(errors)
+                with self.batch():
+                    for line, data in records:
+                        if data["id"] in self._by_id:
+                            report.duplicates.append((line, data["id"]))
+                            continue
+                        student = self.model.from_dict(data)
+                        self._track(student.id)
+                        self._index(student)
+                        self._persist("add", student, value=student.to_dict())
+                        report.imported += 1
+        return report
+
+    def import_grades(self, path: str, fmt: Optional[str] = None, chunk_size: int = importer.CHUNK_ROWS,
+                      workers: Optional[int] = None) -> importer.ImportReport:
+        """
+        Streams (id, lesson, grade[, term, date, weight]) rows from a CSV or JSON Lines file and adds
+        the grades; rows for unknown students are reported. Each chunk is
+        persisted as one batch.
+        """
+        report = importer.ImportReport()
+        with self._bulk_import():
+            for rows, errors in importer.iter_validated(path, "grades", fmt, chunk_size, workers):
+                report.errors.extend(errors)
+                with self.batch():
+                    for line, (student_id, lesson, grade, *info) in rows:
+                        if student_id not in self._by_id:
+                            report.errors.append((line, f"unknown student {student_id}"))
+                            continue
+                        self.add_grade(student_id, lesson, grade, *info)
+                        report.imported += 1
+        report.errors.sort()
+        return report
+
+    def list_students(self, sort_by: str = None, term: Optional[str] = None, weighted: bool = False) -> List[Student]:
+        """
+        List students, optionally sorted by 'average' (of one term, weighted)
+        or 'absence'.
+        """
+        if sort_by in ('average', 'absence'):
+            return self.rank_students(sort_by, term=term, weighted=weighted)
+
         return self.students
 
-    def backup_data(self) -> str:
-        return storage.backup_data()
+    def rank_students(self, by: str = 'average', limit: Optional[int] = None, offset: int = 0,
+                      class_name: Optional[str] = None, lesson: Optional[str] = None,
+                      ascending: bool = False, term: Optional[str] = None,
+                      weighted: bool = False) -> List[Student]:
+        """
+        Students ranked by 'average' or 'absence', highest first (lowest first
+        with ascending=True), returning the page [offset:offset + limit].
+        class_name keeps one class; lesson keeps the students graded in that
+        lesson and ranks them by their lesson average; term likewise keeps
+        the students graded in that term and ranks them by its grades only.
+        weighted=True ranks by weighted averages. With a limit only the best
+        offset + limit students are selected (heapq), so the roster is never
+        fully sorted. Ties keep roster order.
+        """
+        if by == 'average':
+            if term or weighted:
+                key = lambda s: s.average(lesson, term, weighted)
+            else:
+                key = (lambda s: s.average(lesson)) if lesson else (lambda s: s.average())
+        elif by == 'absence':
+            key = lambda s: s.absence_count
+        else:
+            raise ValueError(f"Cannot rank by {by!r}; use 'average' or 'absence'")
+        if offset < 0 or (limit is not None and limit < 0):
+            raise ValueError("limit and offset must not be negative")
+
+        self._ensure_loaded()
+        candidates = self._by_id.values() if class_name is None else self._by_class.get(class_name, {}).values()
+        if term:
+            # One grade_stats() lookup per student both filters and scores it
+            def term_score(s):
+                stats = s.grade_stats(lesson, term)
+                if not stats.count:
+                    return None
+                if by == 'absence':
+                    return s.absence_count
+                return stats.weighted_average if weighted else stats.average
+            scored = ((score, s) for s in candidates for score in (term_score(s),) if score is not None)
+            if limit is None:
+                ranked = sorted(scored, key=itemgetter(0), reverse=not ascending)
+            else:
+                select = heapq.nsmallest if ascending else heapq.nlargest
+                ranked = select(offset + limit, scored, key=itemgetter(0))
+            return [s for _, s in ranked[offset:]]
+        if lesson:
+            candidates = (s for s in candidates if s.has_lesson(lesson))
+        if limit is None:
+            return sorted(candidates, key=key, reverse=not ascending)[offset:]
+        select = heapq.nsmallest if ascending else heapq.nlargest
+        return select(offset + limit, candidates, key=key)[offset:]
+
+    def analytics(self):
+        """Columnar snapshot of the current grades for school-wide statistics (requires NumPy)."""
+        from analytics import GradeTable
+        return GradeTable.from_students(self.students)
+
+    def backup_data(self):
+        """Returns the backup status message, or a Future for it when a writer is set."""
+        # Backups read the snapshot plus the journal, and a writer runs this
+        # after every write queued before it, so nothing needs folding first.
+        return self._write(self.backend.backup)
+
+    def restore_backup(self, backup_id: Optional[str] = None):
+        """
+        Replaces all data with a backup: the newest one, or the newest whose
+        id starts with backup_id (see BackupStore.find). Returns the status
+        message, or a Future for it when a writer is set. Raises
+        storage.StorageError (in the Future) if it could not be written.
+        """
+        store = self.backend.backup_store()
+        manifest = store.find(backup_id)
+        data = list(store.iter_records(manifest["id"]))
+        result = self._write(self._restore, data, manifest)
+        self.apply_changes(None, snapshot=data)
+        return result
+
+    def _restore(self, data: List[Dict], manifest: Dict) -> str:
+        if not self.backend.replace_all(data):
+            raise storage.StorageError(f"Backup {manifest['id']} could not be restored")
+        return f"Restored backup {manifest['id']} ({manifest['students']} students)."
+
+    def export_csv(self, path: Optional[str] = None, **options):
+        """
+        Exports the roster with csv_export.write_csv (options: columns, long,
+        lesson_averages, compress). Returns the status message, or a Future
+        for it when a writer is set.
+        """
+        students = self.students
+        if self.writer is not None:
+            # The worker reads them while this thread may keep editing the originals
+            students = [copy.deepcopy(s) for s in students]
+        return self._write(self._export, students, path, options)
 
-    def export_csv(self) -> str:
-        return storage.export_to_csv([s.to_dict() for s in self.students])
+    def _export(self, students: List[Student], path: Optional[str], options: Dict) -> str:
+        if not students:
+            return "No data to export."
+        path = path or csv_export.default_path()
+        try:
+            csv_export.write_csv(students, path, **options)
+        except OSError as e:
+            return f"Export failed: {e}"
+        return f"Data exported to {path}"
@@ -0,0 +1,300 @@
+"""
+Binary, columnar cache of a students.json snapshot, stored next to it as
+students.json.cache. Loading it avoids the JSON parser: every column is
+decoded in one C-level call (bytes.split / array.frombytes).
+
+The cache is keyed on the snapshot's size, mtime and a hash of its first
+and last 64 KiB; any mismatch means it is stale and the caller rebuilds it.
+Grade terms, dates and weights (grade_info) are stored as columns too, only
+for the lessons that have them, and so are absence dates (as ordinals) and
+the grade aggregates per lesson and per lesson and term.
+
+Loaded students come in the form models.StudentBase.from_dict() builds
+from without re-deriving anything: absence_dates as an array of ordinals,
+grade_info as GradeInfo objects, grade_stats and term_stats as GradeStats.
+Students named in load_cache()'s `plain_ids` come in the JSON form instead,
+for journal records to be applied to.
+"""
+import hashlib
+import itertools
+import json
+import os
+import struct
+from array import array
+from datetime import date
+from itertools import compress
+from operator import mul
+from typing import Collection, Dict, List, Optional
+
+from models import TERMS, WEIGHT_SCALE, GradeInfo, GradeStats
+
+MAGIC = b'SMC3'
+CACHE_SUFFIX = '.cache'
+# Separates values inside a string column; values containing it are not cached
+SEP = '\x1f'
+HASH_WINDOW = 64 * 1024
+
+STRING_COLUMNS = ("id", "name", "surname", "class_name", "created_at", "updated_at")
+# Keys stored natively; anything else goes into the per-student JSON 'extra' column
+CORE_KEYS = set(STRING_COLUMNS) | {"grades", "absence_count", "absence_dates", "grade_stats", "grade_info"}
+
+def cache_file(path: str) -> str:
+    return path + CACHE_SUFFIX
+
+def source_key(path: str) -> bytes:
+    """Identifies one version of the snapshot file."""
+    st = os.stat(path)
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        digest.update(f.read(HASH_WINDOW))
+        if st.st_size > HASH_WINDOW:
+            f.seek(max(HASH_WINDOW, st.st_size - HASH_WINDOW))
+            digest.update(f.read(HASH_WINDOW))
+    return struct.pack('<qq', st.st_size, st.st_mtime_ns) + digest.digest()
+
+def _pack_block(data: bytes) -> bytes:
+    return struct.pack('<Q', len(data)) + data
+
+# Typecodes of the array columns, in file order after the string columns:
+# per student the absence count, lesson entries and absence days; per lesson
+# entry its lesson code, size, grade_info flag and aggregates (sum, min, max,
+# weighted sum, weight; min and max are 0 without grades) and, if flagged,
+# its number of term rows; the grades; the grade_info of flagged entries;
+# the absence day ordinals; per term row its term code and aggregates
+# (count, sum, min, max, weighted sum, weight).
+STUDENT_COLUMNS = 'qII'
+ENTRY_COLUMNS = 'IIBQBBQQ'
+TERM_ROW_COLUMNS = 'HIQBBQQ'
+
+def _aggregates(grades: List[int], units: Optional[List[int]]) -> tuple:
+    if not grades:
+        return 0, 0, 0, 0, 0
+    if units is None:
+        total = sum(grades)
+        return total, min(grades), max(grades), total * WEIGHT_SCALE, len(grades) * WEIGHT_SCALE
+    return sum(grades), min(grades), max(grades), sum(map(mul, grades, units)), sum(units)
+
+def _encode(data: List[Dict]) -> Optional[bytes]:
+    """Encodes students column by column. Returns None if something cannot be represented."""
+    strings = {column: [] for column in STRING_COLUMNS}
+    lesson_codes: Dict[str, int] = {}
+    student_columns = [array(typecode) for typecode in STUDENT_COLUMNS]
+    absences, lessons_per_student, days_per_student = student_columns
+    entry_columns = [array(typecode) for typecode in ENTRY_COLUMNS]
+    entry_lessons, entry_sizes, entry_info = entry_columns[:3]
+    entry_stats = entry_columns[3:]
+    entry_term_rows = array('I')
+    grades = array('B')
+    # grade_info of the lesson entries flagged in entry_info: per grade a term code, date ordinal and weight
+    term_codes: Dict[str, int] = {"": 0}
+    info_terms = array('H')
+    info_days = array('I')
+    info_weights = array('H')
+    absence_days = array('I')
+    term_rows = [array(typecode) for typecode in TERM_ROW_COLUMNS]
+    extras = []
+
+    try:
+        for student in data:
+            for column in STRING_COLUMNS:
+                value = student.get(column)
+                value = '' if value is None else str(value)
+                if SEP in value:
+                    return None
+                strings[column].append(value)
+            absences.append(student.get("absence_count", 0))
+            ordinals = sorted({date.fromisoformat(day).toordinal() for day in student.get("absence_dates") or ()})
+            days_per_student.append(len(ordinals))
+            absence_days.extend(ordinals)
+            student_grades = student.get("grades", {})
+            grade_info = student.get("grade_info") or {}
+            if not grade_info.keys() <= student_grades.keys():
+                return None
+            lessons_per_student.append(len(student_grades))
+            for lesson, lesson_grades in student_grades.items():
+                entry_lessons.append(lesson_codes.setdefault(lesson, len(lesson_codes)))
+                entry_sizes.append(len(lesson_grades))
+                grades.extend(lesson_grades)
+                info = grade_info.get(lesson)
+                entry_info.append(info is not None)
+                units = None
+                if info is not None:
+                    terms, days, weights = info["term"], info["date"], info["weight"]
+                    if not len(terms) == len(days) == len(weights) == len(lesson_grades):
+                        return None
+                    units = [round(w * 100) for w in weights]
+                    if any(abs(u - w * 100) > 1e-6 for u, w in zip(units, weights)):
+                        return None
+                    codes = [term_codes.setdefault(t or "", len(term_codes)) for t in terms]
+                    info_terms.extend(codes)
+                    info_days.extend(date.fromisoformat(d).toordinal() if d else 0 for d in days)
+                    info_weights.extend(units)
+                    # One row per term, as models.Student.term_stats has them
+                    rows = [code for code in dict.fromkeys(codes) if code]
+                    entry_term_rows.append(len(rows))
+                    for code in rows:
+                        picked = [c == code for c in codes]
+                        term_grades = list(compress(lesson_grades, picked))
+                        for column, value in zip(term_rows, (code, len(term_grades)) + _aggregates(
+                                term_grades, list(compress(units, picked)))):
+                            column.append(value)
+                for column, value in zip(entry_stats, _aggregates(lesson_grades, units)):
+                    column.append(value)
+            extra = {k: v for k, v in student.items() if k not in CORE_KEYS}
+            extras.append(json.dumps(extra, ensure_ascii=False, separators=(',', ':')) if extra else '')
+    except (TypeError, OverflowError, ValueError, KeyError, AttributeError):
+        # Non-integer or out-of-range grades, malformed grade_info or dates: leave this file to the JSON path
+        return None
+
+    if any(SEP in name for name in itertools.chain(lesson_codes, term_codes)) or any(SEP in extra for extra in extras):
+        return None
+
+    blocks = [struct.pack('<Q', len(absences))]
+    for column in STRING_COLUMNS:
+        blocks.append(_pack_block(SEP.join(strings[column]).encode('utf-8')))
+    blocks.append(_pack_block(SEP.join(lesson_codes).encode('utf-8')))
+    blocks.append(_pack_block(SEP.join(term_codes).encode('utf-8')))
+    for arr in (*student_columns, *entry_columns, entry_term_rows, grades,
+                info_terms, info_days, info_weights, absence_days, *term_rows):
+        blocks.append(_pack_block(arr.tobytes()))
+    blocks.append(_pack_block(SEP.join(extras).encode('utf-8')))
+    return b''.join(blocks)
+
+def _decode(buf: memoryview, plain_ids: Collection[str] = ()) -> List[Dict]:
+    offset = 0
+
+    def block() -> memoryview:
+        nonlocal offset
+        (size,) = struct.unpack_from('<Q', buf, offset)
+        offset += 8 + size
+        return buf[offset - size:offset]
+
+    def arrays(typecodes: str) -> List[array]:
+        columns = []
+        for typecode in typecodes:
+            arr = array(typecode)
+            arr.frombytes(block())
+            columns.append(arr)
+        return columns
+
+    (count,) = struct.unpack_from('<Q', buf, offset)
+    offset += 8
+    columns = {}
+    for column in STRING_COLUMNS:
+        columns[column] = bytes(block()).decode('utf-8').split(SEP) if count else []
+    lesson_blob = bytes(block()).decode('utf-8')
+    lesson_names = lesson_blob.split(SEP) if lesson_blob else []
+    term_names = bytes(block()).decode('utf-8').split(SEP)
+    absences, lessons_per_student, days_per_student = (arr.tolist() for arr in arrays(STUDENT_COLUMNS))
+    entry_lessons, entry_sizes, entry_info, *entry_stats = (arr.tolist() for arr in arrays(ENTRY_COLUMNS))
+    entry_term_rows, grades = (arr.tolist() for arr in arrays('IB'))
+    info_columns = arrays('HIH')
+    (absence_days,) = arrays('I')
+    term_rows = [arr.tolist() for arr in arrays(TERM_ROW_COLUMNS)]
+    extras = bytes(block()).decode('utf-8').split(SEP) if count else []
+
+    # Cut the flat grade list into per-lesson lists, then group lessons per student.
+    # Comprehensions over precomputed offsets keep the per-item work minimal.
+    starts = list(itertools.accumulate(entry_sizes, initial=0))
+    lesson_lists = [grades[a:b] for a, b in zip(starts, starts[1:])]
+    lesson_keys = [lesson_names[code] for code in entry_lessons]
+    lesson_stats = [GradeStats(total, size, low, high, wsum, weight) if size else GradeStats()
+                    for size, total, low, high, wsum, weight in zip(entry_sizes, *entry_stats)]
+    bounds = list(itertools.accumulate(lessons_per_student, initial=0))
+    student_grades = [dict(zip(lesson_keys[a:b], lesson_lists[a:b])) for a, b in zip(bounds, bounds[1:])]
+    student_stats = [dict(zip(lesson_keys[a:b], lesson_stats[a:b])) for a, b in zip(bounds, bounds[1:])]
+
+    created = [value or None for value in columns["created_at"]]
+    updated = [value or None for value in columns["updated_at"]]
+    data = [{"id": i, "name": n, "surname": s, "class_name": c, "grades": g,
+             "absence_count": a, "created_at": ca, "updated_at": ua, "grade_stats": gs}
+            for i, n, s, c, g, a, ca, ua, gs in zip(columns["id"], columns["name"], columns["surname"],
+                                                    columns["class_name"], student_grades, absences,
+                                                    created, updated, student_stats)]
+    start = 0
+    for student, days in zip(data, days_per_student):
+        if days:
+            student["absence_dates"] = absence_days[start:start + days]
+            start += days
+    for student, extra in zip(data, extras):
+        if extra:
+            student.update(json.loads(extra))
+    _decode_grade_info(data, lessons_per_student, lesson_keys, entry_sizes, entry_info, entry_term_rows,
+                       term_names, info_columns, term_rows)
+    if plain_ids:
+        for student in data:
+            if student["id"] in plain_ids:
+                _plain(student)
+    return data
+
+def _decode_grade_info(data: List[Dict], lessons_per_student: List[int], lesson_keys: List[str],
+                       entry_sizes: List[int], entry_info: List[int], entry_term_rows: List[int],
+                       term_names: List[str], info_columns: List[array], term_rows: List[list]):
+    flagged = [i for i, flag in enumerate(entry_info) if flag]
+    if not flagged:
+        return
+    owners = list(itertools.chain.from_iterable(itertools.repeat(k, n) for k, n in enumerate(lessons_per_student)))
+    terms, days, weights = info_columns
+    # Cache term codes -> TERMS codes; usually the same numbers
+    codes = [TERMS.code(name) for name in term_names]
+    same_codes = codes == list(range(len(codes)))
+    rows = iter(zip(*term_rows))
+    start = 0
+    for i, row_count in zip(flagged, entry_term_rows):
+        end = start + entry_sizes[i]
+        lesson = lesson_keys[i]
+        student = data[owners[i]]
+        term_codes = terms[start:end] if same_codes else array('H', [codes[code] for code in terms[start:end]])
+        student.setdefault("grade_info", {})[lesson] = GradeInfo.from_arrays(
+            term_codes, days[start:end], weights[start:end])
+        term_stats = student.setdefault("term_stats", {})
+        for code, size, total, low, high, wsum, weight in itertools.islice(rows, row_count):
+            term_stats.setdefault(term_names[code], {})[lesson] = GradeStats(total, size, low, high, wsum, weight)
+        start = end
+
+def _plain(student: Dict):
+    """Turns a decoded student into the JSON form: journal records can only be applied to that."""
+    # May not match once the records are applied; the student rebuilds them then
+    student.pop("term_stats", None)
+    student["grade_stats"] = {lesson: stats.to_dict() for lesson, stats in student["grade_stats"].items()}
+    if "absence_dates" in student:
+        student["absence_dates"] = [date.fromordinal(day).isoformat() for day in student["absence_dates"]]
+    if "grade_info" in student:
+        student["grade_info"] = {lesson: info.to_dict() for lesson, info in student["grade_info"].items()}
+
+def write_cache(path: str, data: List[Dict]) -> bool:
+    """Writes the cache for the current version of `path`. Returns False if it was skipped."""
+    try:
+        payload = _encode(data)
+        if payload is None:
+            return False
+        key = source_key(path)
+        tmp_path = cache_file(path) + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(MAGIC + struct.pack('<H', len(key)) + key + payload)
+        os.replace(tmp_path, cache_file(path))
+        return True
+    except OSError as e:
+        print(f"Warning: could not write snapshot cache: {e}")
+        return False
+
+def load_cache(path: str, plain_ids: Collection[str] = ()) -> Optional[List[Dict]]:
+    """
+    Returns the cached snapshot if the cache matches the current file, else
+    None. The students whose id is in plain_ids come in the JSON form.
+    """
+    cache_path = cache_file(path)
+    if not (os.path.exists(cache_path) and os.path.exists(path)):
+        return None
+    try:
+        with open(cache_path, 'rb') as f:
+            buf = f.read()
+        if buf[:4] != MAGIC:
+            return None
+        (key_size,) = struct.unpack_from('<H', buf, 4)
+        if buf[6:6 + key_size] != source_key(path):
+            return None
+        return _decode(memoryview(buf)[6 + key_size:], plain_ids)
+    except (OSError, struct.error, UnicodeDecodeError, ValueError, IndexError) as e:
+        print(f"Warning: ignoring unreadable snapshot cache: {e}")
+        return None
@@ -0,0 +1,254 @@
+import os
+import sqlite3
+from typing import Dict, Iterator, List, Optional
+
+import storage
+
+DB_FILE = os.path.join(os.path.dirname(__file__), 'data', 'students.db')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS students (
+    id TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    surname TEXT NOT NULL,
+    class_name TEXT NOT NULL,
+    absence_count INTEGER NOT NULL DEFAULT 0,
+    created_at TEXT,
+    updated_at TEXT
+);
+CREATE TABLE IF NOT EXISTS grades (
+    student_id TEXT NOT NULL REFERENCES students(id) ON DELETE CASCADE,
+    lesson TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    grade INTEGER NOT NULL,
+    term TEXT,
+    day TEXT,
+    weight REAL NOT NULL DEFAULT 1,
+    PRIMARY KEY (student_id, lesson, position)
+);
+CREATE TABLE IF NOT EXISTS absences (
+    student_id TEXT NOT NULL REFERENCES students(id) ON DELETE CASCADE,
+    day TEXT NOT NULL,
+    PRIMARY KEY (student_id, day)
+);
+CREATE INDEX IF NOT EXISTS idx_students_class ON students(class_name);
+CREATE INDEX IF NOT EXISTS idx_grades_lesson ON grades(lesson);
+CREATE INDEX IF NOT EXISTS idx_absences_day ON absences(day);
+"""
+
+# Columns added to the grades table since its first version, for older databases
+GRADE_COLUMNS = (("term", "TEXT"), ("day", "TEXT"), ("weight", "REAL NOT NULL DEFAULT 1"))
+
+# Columns a "set" record may touch; anything else is rejected rather than
+# interpolated into SQL.
+UPDATABLE_FIELDS = ("name", "surname", "class_name", "absence_count")
+
+class SQLiteBackend(storage.StorageBackend):
+    """Normalized students/grades tables; every mutation is a single-row statement."""
+    name = "sqlite"
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or DB_FILE
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        self.conn = sqlite3.connect(self.path)
+        self.conn.execute("PRAGMA foreign_keys = ON")
+        self.conn.execute("PRAGMA journal_mode = WAL")
+        self.conn.executescript(SCHEMA)
+        self._upgrade()
+        # Bumped by SQLite whenever another connection commits (see changes())
+        self._data_version = self._current_data_version()
+
+    def _upgrade(self):
+        existing = {row[1] for row in self.conn.execute("PRAGMA table_info(grades)")}
+        with self.conn:
+            for column, definition in GRADE_COLUMNS:
+                if column not in existing:
+                    self.conn.execute(f"ALTER TABLE grades ADD COLUMN {column} {definition}")
+
+    def _current_data_version(self) -> int:
+        return self.conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def iter_students(self) -> Iterator[Dict]:
+        grades: Dict[str, Dict[str, List[int]]] = {}
+        # Built only for lessons with a term, date or weight, padded for the grades before
+        grade_info: Dict[str, Dict[str, Dict[str, list]]] = {}
+        # rowid order keeps lessons and grades in the order they were entered
+        for student_id, lesson, grade, term, day, weight in self.conn.execute(
+                "SELECT student_id, lesson, grade, term, day, weight FROM grades ORDER BY student_id, rowid"):
+            lesson_grades = grades.setdefault(student_id, {}).setdefault(lesson, [])
+            info = grade_info.get(student_id, {}).get(lesson)
+            if info is None and (term is not None or day is not None or weight != 1):
+                info = grade_info.setdefault(student_id, {})[lesson] = {
+                    "term": [None] * len(lesson_grades), "date": [None] * len(lesson_grades),
+                    "weight": [1] * len(lesson_grades)}
+            lesson_grades.append(grade)
+            if info is not None:
+                info["term"].append(term)
+                info["date"].append(day)
+                info["weight"].append(int(weight) if weight == int(weight) else weight)
+        absences: Dict[str, List[str]] = {}
+        for student_id, day in self.conn.execute("SELECT student_id, day FROM absences ORDER BY student_id, day"):
+            absences.setdefault(student_id, []).append(day)
+
+        # Fetched here rather than streamed, so the connection is only used on
+        # this thread while the students may be built on another (lazy loads)
+        rows = self.conn.execute(
+            "SELECT id, name, surname, class_name, absence_count, created_at, updated_at "
+            "FROM students ORDER BY rowid").fetchall()
+        return (self._student_dict(row, grades, grade_info, absences) for row in rows)
+
+    @staticmethod
+    def _student_dict(row: tuple, grades: Dict, grade_info: Dict, absences: Dict) -> Dict:
+        student = {
+            "id": row[0],
+            "name": row[1],
+            "surname": row[2],
+            "class_name": row[3],
+            "grades": grades.get(row[0], {}),
+            "absence_count": row[4],
+            "created_at": row[5],
+            "updated_at": row[6],
+        }
+        if row[0] in absences:
+            student["absence_dates"] = absences[row[0]]
+        if row[0] in grade_info:
+            student["grade_info"] = grade_info[row[0]]
+        return student
+
+    def _upsert(self, data: Dict):
+        self.conn.execute(
+            "INSERT INTO students (id, name, surname, class_name, absence_count, created_at, updated_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT(id) DO UPDATE SET name = excluded.name, surname = excluded.surname, "
+            "class_name = excluded.class_name, absence_count = excluded.absence_count, "
+            "created_at = excluded.created_at, updated_at = excluded.updated_at",
+            (data["id"], data.get("name"), data.get("surname"), data.get("class_name"),
+             data.get("absence_count", 0), data.get("created_at"), data.get("updated_at")))
+        self.conn.execute("DELETE FROM grades WHERE student_id = ?", (data["id"],))
+        grade_info = data.get("grade_info") or {}
+
+        def rows():
+            for lesson, grades in data.get("grades", {}).items():
+                info = grade_info.get(lesson) or {}
+                terms, days, weights = (info.get(key) or () for key, _ in storage.GRADE_INFO_KEYS)
+                for pos, grade in enumerate(grades):
+                    yield (data["id"], lesson, pos, grade, terms[pos] if pos < len(terms) else None,
+                           days[pos] if pos < len(days) else None, weights[pos] if pos < len(weights) else 1)
+        self.conn.executemany(
+            "INSERT INTO grades (student_id, lesson, position, grade, term, day, weight) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)", rows())
+        self.conn.execute("DELETE FROM absences WHERE student_id = ?", (data["id"],))
+        self.conn.executemany(
+            "INSERT OR IGNORE INTO absences (student_id, day) VALUES (?, ?)",
+            ((data["id"], day) for day in data.get("absence_dates", ())))
+
+    def _apply_one(self, rec: Dict):
+        op = rec.get("op")
+        student_id = rec.get("id")
+        if op == "add":
+            self._upsert(rec["value"])
+            return
+        if op == "delete":
+            self.conn.execute("DELETE FROM students WHERE id = ?", (student_id,))
+            return
+
+        if op == "set":
+            field = rec["field"]
+            if field not in UPDATABLE_FIELDS:
+                raise ValueError(f"Field cannot be updated: {field}")
+            self.conn.execute(f"UPDATE students SET {field} = ? WHERE id = ?", (rec["value"], student_id))
+        elif op == "grade":
+            position = rec.get("pos")
+            if position is None:
+                position = self.conn.execute(
+                    "SELECT COUNT(*) FROM grades WHERE student_id = ? AND lesson = ?",
+                    (student_id, rec["field"])).fetchone()[0]
+            self.conn.execute(
+                "INSERT OR IGNORE INTO grades (student_id, lesson, position, grade, term, day, weight) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (student_id, rec["field"], position, rec["value"], rec.get("term"), rec.get("date"),
+                 rec.get("weight", 1)))
+        elif op in ("absent", "present"):
+            if op == "absent":
+                self.conn.execute("INSERT OR IGNORE INTO absences (student_id, day) VALUES (?, ?)",
+                                  (student_id, rec["value"]))
+            else:
+                self.conn.execute("DELETE FROM absences WHERE student_id = ? AND day = ?",
+                                  (student_id, rec["value"]))
+            self.conn.execute("UPDATE students SET absence_count = ? WHERE id = ?", (rec["count"], student_id))
+        else:
+            raise ValueError(f"Unknown operation: {op}")
+        if rec.get("ts"):
+            self.conn.execute("UPDATE students SET updated_at = ? WHERE id = ?", (rec["ts"], student_id))
+
+    def _check_conflicts(self, records: List[Dict]):
+        """Rejects the batch if a student's updated_at no longer matches the record's base."""
+        bases: Dict[str, str] = {}
+        for rec in records:
+            if "base" in rec:
+                bases.setdefault(rec.get("id"), rec["base"])
+        conflicts = []
+        for student_id, base in bases.items():
+            row = self.conn.execute("SELECT updated_at FROM students WHERE id = ?", (student_id,)).fetchone()
+            if row is None or row[0] != base:
+                conflicts.append(student_id)
+        if conflicts:
+            raise storage.ConflictError(conflicts)
+
+    def apply(self, records: List[Dict]) -> bool:
+        """Applies records in one transaction. Raises storage.ConflictError if a base is out of date."""
+        try:
+            # One transaction per batch; rolled back as a whole on error.
+            # BEGIN IMMEDIATE takes the write lock before the version check.
+            with self.conn:
+                self.conn.execute("BEGIN IMMEDIATE")
+                self._check_conflicts(records)
+                for rec in records:
+                    self._apply_one(rec)
+            return True
+        except (sqlite3.Error, ValueError, KeyError) as e:
+            print(f"Error saving data: {e}")
+            return False
+
+    def save_all(self, data: List[Dict]) -> bool:
+        try:
+            with self.conn:
+                self.conn.execute("DELETE FROM grades")
+                self.conn.execute("DELETE FROM absences")
+                self.conn.execute("DELETE FROM students")
+                for student in data:
+                    self._upsert(student)
+            return True
+        except (sqlite3.Error, KeyError) as e:
+            print(f"Error saving data: {e}")
+            return False
+
+    def changes(self) -> Optional[List[Dict]]:
+        # data_version only says that another connection committed, not what
+        version = self._current_data_version()
+        if version == self._data_version:
+            return []
+        self._data_version = version
+        return None
+
+    def backup(self) -> str:
+        # Read in one transaction, so the backup is a consistent snapshot
+        with self.conn:
+            self.conn.execute("BEGIN")
+            data = self.load()
+        return storage.backup_records(data, storage.backup_dir(self.path), source=os.path.basename(self.path))
+
+    def close(self):
+        self.conn.close()
+
+def migrate_json(json_path: Optional[str] = None, db_path: Optional[str] = None) -> int:
+    """Imports students.json (plus its journal) into the SQLite database. Returns the student count."""
+    data = storage.load_data(json_path)
+    backend = SQLiteBackend(db_path)
+    try:
+        with backend.conn:
+            for student in data:
+                backend._upsert(student)
+    finally:
+        backend.close()
+    return len(data)
@@ -1,65 +1,644 @@
+import gc
+import glob
 import json
 import os
-import shutil
-from typing import List, Dict
-from datetime import datetime
+import tempfile
+import zlib
+from contextlib import contextmanager
+from typing import Iterable, List, Dict, Iterator, Optional, Tuple
+
+import snapshot_cache
+from backup_store import BackupStore
+from locking import FileLock, lock_file
 
 DATA_FILE = os.path.join(os.path.dirname(__file__), 'data', 'students.json')
+# JSON Lines variant: one student object per line, readable as a stream
+JSONL_FILE = os.path.join(os.path.dirname(__file__), 'data', 'students.jsonl')
+
+# Mutations are appended to the journal as one JSON record per line and folded
+# into DATA_FILE by save_data(). Every record is idempotent, so replaying a
+# journal that was already folded into the snapshot is harmless.
+JOURNAL_SUFFIX = '.journal'
+
+def journal_file(path: Optional[str] = None) -> str:
+    return (path or DATA_FILE) + JOURNAL_SUFFIX
+
+class ConflictError(Exception):
+    """
+    Raised when records are written against a student that another process
+    changed since this one last read it (its updated_at no longer matches
+    the record's "base").
+    """
+    def __init__(self, student_ids: List[str]):
+        super().__init__(f"{len(student_ids)} student(s) were changed by another process: "
+                         + ", ".join(student_ids[:5]))
+        self.student_ids = student_ids
+
+class StorageError(Exception):
+    """
+    Raised by StudentManager when the backend reports that it could not store
+    a change (e.g. a journal or SQLite write failed).
+    """
+
+@contextmanager
+def gc_paused():
+    """
+    Suspends the cyclic garbage collector while bulk-building objects. Loading
+    creates millions of containers and nothing cyclic, so the repeated
+    collections it would otherwise trigger are pure overhead.
+    """
+    was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if was_enabled:
+            gc.enable()
+
+def is_jsonl(path: str) -> bool:
+    return path.endswith('.jsonl')
+
+def _read_json(path: str) -> List[Dict]:
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def _load_latest_backup(path: str) -> Optional[List[Dict]]:
+    """
+    Returns the contents of the newest backup that still reads back, if any:
+    the backup store's first, then the .bak files of older versions.
+    """
+    store = BackupStore(backup_dir(path), os.path.basename(path))
+    try:
+        backups = store.list()
+    except (OSError, ValueError):
+        backups = []
+    for backup in reversed(backups):
+        try:
+            # Chunks are checked against their digest as they are read
+            data = list(store.iter_records(backup["id"]))
+        except (OSError, ValueError, KeyError, zlib.error):
+            continue
+        print(f"Recovered data from backup: {backup['id']}")
+        return data
 
-def load_data() -> List[Dict]:
-    """Loads student data from the JSON file."""
-    if not os.path.exists(DATA_FILE):
+    # Backup names embed a sortable timestamp, so name order is age order
+    for backup in sorted(glob.glob(f"{glob.escape(path)}.*.bak"), reverse=True):
+        try:
+            data = _read_json(backup)
+        except (json.JSONDecodeError, IOError, UnicodeDecodeError):
+            continue
+        print(f"Recovered data from backup: {backup}")
+        return data
+    return None
+
+def _load_snapshot(path: str) -> List[Dict]:
+    if not os.path.exists(path):
         return []
     
     try:
-        with open(DATA_FILE, 'r', encoding='utf-8') as f:
-            return json.load(f)
-    except (json.JSONDecodeError, IOError) as e:
+        return _read_json(path)
+    except (json.JSONDecodeError, IOError, UnicodeDecodeError) as e:
         print(f"Error loading data: {e}")
+        recovered = _load_latest_backup(path)
+        return recovered if recovered is not None else []
+
+def _fsync_dir(path: str):
+    """Makes a rename durable. Not supported on Windows, where it is skipped."""
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+@contextmanager
+def atomic_open(path: str, binary: bool = False):
+    """
+    Yields a file (text, or bytes with binary=True) that replaces `path` only
+    once the block completes: the data goes to a temp file in the same
+    directory, is fsynced and then renamed over the target, so readers see
+    either the old file or the new one, never a truncated one.
+    """
+    directory = os.path.dirname(path) or '.'
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=os.path.basename(path) + '.', suffix='.tmp')
+    try:
+        with (os.fdopen(fd, 'wb') if binary else os.fdopen(fd, 'w', encoding='utf-8')) as f:
+            yield f
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    _fsync_dir(directory)
+
+def atomic_write_json(path: str, data, **dump_kwargs):
+    """Writes a JSON document through atomic_open()."""
+    with atomic_open(path) as f:
+        json.dump(data, f, **dump_kwargs)
+
+def iter_jsonl(path: str) -> Iterator[Dict]:
+    """Yields one student dict per line without reading the whole file. Corrupt lines are skipped."""
+    if not os.path.exists(path):
+        return iter(())
+    return _iter_jsonl_file(open(path, 'r', encoding='utf-8'), path)
+
+def _iter_jsonl_file(f, path: str) -> Iterator[Dict]:
+    # Takes an already open file so a caller can open it under a lock and stream it afterwards
+    with f:
+        for number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                print(f"Warning: skipping corrupt line {number} in {path}")
+
+def write_jsonl(students: Iterable, path: str) -> int:
+    """
+    Atomically writes students (dicts or objects with to_dict()) as JSON Lines,
+    consuming the iterable one item at a time. Returns the number written.
+    """
+    count = 0
+    with atomic_open(path) as f:
+        for student in students:
+            if hasattr(student, "to_dict"):
+                student = student.to_dict()
+            f.write(json.dumps(student, ensure_ascii=False, separators=(',', ':')))
+            f.write("\n")
+            count += 1
+    return count
+
+def read_students(path: Optional[str] = None, model=None) -> Iterator:
+    """Lazily yields Student objects (snapshot plus journal) from a JSON or JSON Lines file."""
+    if model is None:
+        from models import Student as model
+    for data in iter_data(path):
+        yield model.from_dict(data)
+
+def convert_to_jsonl(src: Optional[str] = None, dst: Optional[str] = None) -> int:
+    """One-time conversion of students.json (array format, plus journal) to JSON Lines."""
+    src = src or DATA_FILE
+    dst = dst or os.path.splitext(src)[0] + '.jsonl'
+    return write_jsonl(iter_data(src), dst)
+
+def read_journal(path: Optional[str] = None) -> List[Dict]:
+    """Reads all journal records. A torn last line (crash mid-append) is ignored."""
+    path = journal_file(path)
+    if not os.path.exists(path):
         return []
+    
+    records = []
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    records.append(json.loads(line))
+                except json.JSONDecodeError:
+                    print("Warning: skipping corrupt journal record.")
+    except IOError as e:
+        print(f"Error reading journal: {e}")
+    return records
+
+def read_journal_from(path: Optional[str], offset: int) -> Tuple[List[Dict], int]:
+    """
+    Reads the journal records appended after byte `offset`. Returns them with
+    the offset to continue from; an unfinished last line is left for next time.
+    """
+    records: List[Dict] = []
+    try:
+        with open(journal_file(path), 'rb') as f:
+            f.seek(offset)
+            chunk = f.read()
+    except FileNotFoundError:
+        return records, offset
+    end = chunk.rfind(b"\n") + 1
+    for line in chunk[:end].splitlines():
+        if line.strip():
+            try:
+                records.append(json.loads(line))
+            except json.JSONDecodeError:
+                print("Warning: skipping corrupt journal record.")
+    return records, offset + end
+
+# Optional keys of a "grade" record, with the value a grade has without them
+GRADE_INFO_KEYS = (("term", None), ("date", None), ("weight", 1))
+
+def _append_grade_info(student: Dict, lesson: str, position: int, rec: Dict):
+    """Adds a grade's term, date and weight to the student's grade_info (see models.GradeInfo)."""
+    grade_info = student.get("grade_info") or {}
+    info = grade_info.get(lesson)
+    if info is None and not any(key in rec for key, _ in GRADE_INFO_KEYS):
+        return
+    columns = {}
+    for key, default in GRADE_INFO_KEYS:
+        values = list((info or {}).get(key) or ())[:position]
+        columns[key] = values + [default] * (position - len(values)) + [rec.get(key, default)]
+    student["grade_info"] = {**grade_info, lesson: columns}
+
+def apply_records(student: Optional[Dict], records: List[Dict]) -> Optional[Dict]:
+    """Applies one student's journal records in order. Returns None if it ends up deleted."""
+    for rec in records:
+        op = rec.get("op")
+        if op == "add":
+            student = dict(rec["value"])
+            continue
+        if op == "delete":
+            student = None
+            continue
+        
+        if student is None:
+            continue
+        if op == "set":
+            student[rec["field"]] = rec["value"]
+        elif op == "grade":
+            lesson = rec["field"]
+            grades = student.get("grades") or {}
+            lesson_grades = grades.get(lesson, [])
+            pos = rec.get("pos", len(lesson_grades))
+            if pos > len(lesson_grades):
+                # A grade before this one is missing, so it would land at the wrong index
+                print("Warning: skipping corrupt journal record.")
+                continue
+            # 'pos' makes the append idempotent. Copies, not appends: the
+            # lists may be shared with a loaded student's details.
+            if pos == len(lesson_grades):
+                student["grades"] = {**grades, lesson: lesson_grades + [rec["value"]]}
+                _append_grade_info(student, lesson, len(lesson_grades), rec)
+        elif op in ("absent", "present"):
+            # Carries the resulting count, so replaying it twice is harmless
+            days = [d for d in student.get("absence_dates", []) if d != rec["value"]]
+            if op == "absent":
+                days.append(rec["value"])
+            student["absence_dates"] = sorted(days)
+            student["absence_count"] = rec["count"]
+        if rec.get("ts"):
+            student["updated_at"] = rec["ts"]
+    return student
 
-def save_data(data: List[Dict]) -> bool:
-    """Save student data to the JSON file."""
+def replay_stream(data: Iterable[Dict], records: List[Dict]) -> Iterator[Dict]:
+    """
+    Lazily applies journal records to a stream of snapshot students. Students
+    added by the journal are yielded after the snapshot ones.
+    """
+    by_id: Dict[str, List[Dict]] = {}
+    for rec in records:
+        by_id.setdefault(rec.get("id"), []).append(rec)
+    
+    for student in data:
+        student_records = by_id.pop(student.get("id"), None)
+        if student_records:
+            student = apply_records(student, student_records)
+        if student is not None:
+            yield student
+    
+    for student_records in by_id.values():
+        student = apply_records(None, student_records)
+        if student is not None:
+            yield student
+
+def replay_journal(data: List[Dict], records: List[Dict]) -> List[Dict]:
+    """Applies journal records on top of a snapshot and returns the result."""
+    return list(replay_stream(data, records))
+
+def iter_data(path: Optional[str] = None) -> Iterator[Dict]:
+    """
+    Yields student dicts from the snapshot plus the journal. JSON Lines
+    snapshots are streamed; array snapshots are parsed in one go.
+    """
+    path = path or DATA_FILE
+    snapshot = iter_jsonl(path) if is_jsonl(path) else _load_snapshot(path)
+    return replay_stream(snapshot, read_journal(path))
+
+def load_data(path: Optional[str] = None) -> List[Dict]:
+    """Loads student data from the JSON snapshot plus any pending journal records."""
+    return list(iter_data(path))
+
+def append_journal(records: List[Dict], path: Optional[str] = None) -> bool:
+    """Appends mutation records to the journal."""
+    path = path or DATA_FILE
     try:
-        os.makedirs(os.path.dirname(DATA_FILE), exist_ok=True)
-        with open(DATA_FILE, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=4, ensure_ascii=False)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(journal_file(path), 'a', encoding='utf-8') as f:
+            f.write("".join(json.dumps(r, ensure_ascii=False, separators=(',', ':')) + "\n"
+                            for r in records))
         return True
     except IOError as e:
-        print(f"Error saving data: {e}")
+        print(f"Error writing journal: {e}")
         return False
 
-def backup_data() -> str:
-    """Creates a backup of the current data file."""
-    if not os.path.exists(DATA_FILE):
-        return "No data to backup."
-    
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    backup_file = f"{DATA_FILE}.{timestamp}.bak"
-    
+def journal_length(path: Optional[str] = None) -> int:
+    """Number of records waiting in the journal."""
+    path = journal_file(path)
+    if not os.path.exists(path):
+        return 0
+    with open(path, 'rb') as f:
+        return sum(1 for line in f if line.strip())
+
+def save_data(data: List[Dict], path: Optional[str] = None) -> bool:
+    """Save student data to the JSON file. The journal is folded in and cleared."""
+    path = path or DATA_FILE
     try:
-        shutil.copy2(DATA_FILE, backup_file)
-        return f"Backup created: {backup_file}"
+        if is_jsonl(path):
+            write_jsonl(data, path)
+        else:
+            atomic_write_json(path, data, indent=4, ensure_ascii=False)
+        if os.path.exists(journal_file(path)):
+            os.remove(journal_file(path))
+        return True
     except IOError as e:
+        print(f"Error saving data: {e}")
+        return False
+
+def backup_dir(path: Optional[str] = None) -> str:
+    """The backup store shared by the data files in path's directory."""
+    return os.path.join(os.path.dirname(path or DATA_FILE), 'backups')
+
+def backup_records(records: Iterable[Dict], directory: str, compress: bool = True,
+                   source: Optional[str] = None) -> str:
+    """Adds a backup of `records` to the store in `directory`, then applies the retention policy."""
+    store = BackupStore(directory, source)
+    try:
+        result = store.create(records, compress)
+        store.prune()
+    except (OSError, ValueError) as e:
         return f"Backup failed: {e}"
+    return (f"Backup created: {result['id']} ({result['students']} students, "
+            f"{result['new_chunks']} of {len(result['chunks'])} chunks new, {result['new_bytes'] / 1024:.1f} KiB written)")
 
-def export_to_csv(data: List[Dict]) -> str:
-    """Exports student data to a CSV file."""
-    if not data:
-        return "No data to export."
-        
-    csv_file = os.path.join(os.path.dirname(DATA_FILE), 'students_export.csv')
-    
+def backup_data(path: Optional[str] = None, compress: bool = True) -> str:
+    """Backs up the current data (snapshot plus journal) into the deduplicated backup store."""
+    path = path or DATA_FILE
+    # Until the first compaction everything may still be in the journal
+    if not os.path.exists(path) and not os.path.exists(journal_file(path)):
+        return "No data to backup."
+    return backup_records(iter_data(path), backup_dir(path), compress, source=os.path.basename(path))
+
+class StorageBackend:
+    """
+    Interface StudentManager persists through. Mutations are passed as
+    journal-style records ({"op", "id", "field", "value", "pos", "ts"}).
+    """
+    name = "base"
+
+    def load(self) -> List[Dict]:
+        return list(self.iter_students())
+
+    def iter_students(self) -> Iterator[Dict]:
+        raise NotImplementedError
+
+    def apply(self, records: List[Dict]) -> bool:
+        """Persists a batch of mutation records."""
+        raise NotImplementedError
+
+    def save_all(self, data: List[Dict]) -> bool:
+        """Replaces the whole stored dataset."""
+        raise NotImplementedError
+
+    def replace_all(self, data: List[Dict]) -> bool:
+        """
+        Replaces the whole stored dataset with `data` as it is, dropping what
+        other processes stored meanwhile (a restore). save_all() may keep those.
+        """
+        return self.save_all(data)
+
+    def upsert(self, data: Dict) -> bool:
+        return self.apply([{"op": "add", "id": data["id"], "value": data, "ts": data.get("updated_at")}])
+
+    def delete(self, student_id: str) -> bool:
+        return self.apply([{"op": "delete", "id": student_id}])
+
+    def pending_changes(self) -> int:
+        """Number of applied records not yet folded into a full snapshot."""
+        return 0
+
+    def changes(self) -> Optional[List[Dict]]:
+        """
+        Records written by other processes since the last load or changes()
+        call, or None if they cannot be told apart and everything must be reloaded.
+        """
+        return []
+
+    def backup(self) -> str:
+        raise NotImplementedError
+
+    def backup_store(self) -> BackupStore:
+        # Every backend keeps its data at self.path
+        return BackupStore(backup_dir(self.path), os.path.basename(self.path))
+
+    def close(self):
+        pass
+
+def snapshot_stamp(path: str) -> Optional[Tuple[int, int, int]]:
+    """Cheap identity of a snapshot file: it changes whenever the file is rewritten."""
     try:
-        with open(csv_file, 'w', encoding='utf-8') as f:
-            # Header
-            f.write("ID,Name,Surname,Class,Absence,Grades\n")
-            
-            for student in data:
-                grades_str = "; ".join([f"{k}: {v}" for k, v in student.get('grades', {}).items()])
-                line = f"{student.get('id')},{student.get('name')},{student.get('surname')},{student.get('class_name')},{student.get('absence_count')},\"{grades_str}\"\n"
-                f.write(line)
-                
-        return f"Data exported to {csv_file}"
-    except IOError as e:
-        return f"Export failed: {e}"
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+class JsonBackend(StorageBackend):
+    """
+    students.json (or students.jsonl) snapshot plus an append-only journal.
+
+    Several processes may share the files: every read and write happens under
+    a FileLock, records carrying a "base" are rejected with ConflictError if
+    the student changed elsewhere, and changes() returns what other processes
+    appended to the journal since this one last looked (tracked as a byte
+    offset, so nothing is re-read).
+    """
+    name = "json"
+
+    def __init__(self, path: Optional[str] = None, use_cache: Optional[bool] = None):
+        self._path = path
+        self._journal_length = 0
+        # Binary snapshot cache (array format only); STUDENT_SNAPSHOT_CACHE=0 disables it
+        if use_cache is None:
+            use_cache = os.environ.get("STUDENT_SNAPSHOT_CACHE", "1") != "0"
+        self.use_cache = use_cache
+        self._lock: Optional[FileLock] = None
+        # What this process has seen: the snapshot it loaded and how far into the
+        # journal it has read. Foreign records read while writing wait in _unseen.
+        self._stamp: Optional[Tuple[int, int, int]] = None
+        self._journal_offset = 0
+        self._unseen: List[Dict] = []
+        self._stale = False
+        # Student id -> the updated_at the journal records since then left it
+        # with (None once deleted), whoever wrote them; see _check_conflicts()
+        self._versions: Dict[str, Optional[str]] = {}
+
+    @property
+    def path(self) -> str:
+        # Resolved lazily so that reassigning DATA_FILE still takes effect
+        return self._path or DATA_FILE
+
+    def lock(self) -> FileLock:
+        if self._lock is None or self._lock.path != lock_file(self.path):
+            self._lock = FileLock(self.path)
+        return self._lock
+
+    def _journal_size(self) -> int:
+        try:
+            return os.path.getsize(journal_file(self.path))
+        except FileNotFoundError:
+            return 0
+
+    def _mark_seen(self):
+        """Records the current files as this process's view. Call with the lock held."""
+        self._stamp = snapshot_stamp(self.path)
+        self._journal_offset = self._journal_size()
+        self._unseen = []
+        self._stale = False
+        self._versions = {}
+
+    def _note_versions(self, records: List[Dict]):
+        # Mirrors how apply_records() sets updated_at
+        for rec in records:
+            op, student_id = rec.get("op"), rec.get("id")
+            if op == "delete":
+                self._versions[student_id] = None
+                continue
+            if op == "add":
+                self._versions[student_id] = rec["value"].get("updated_at")
+            if rec.get("ts"):
+                self._versions[student_id] = rec["ts"]
+
+    def iter_students(self) -> Iterator[Dict]:
+        with self.lock():
+            records = read_journal(self.path)
+            self._journal_length = len(records)
+            self._mark_seen()
+            if is_jsonl(self.path) or not os.path.exists(self.path):
+                # Opened under the lock; a later rename does not affect the open file
+                snapshot = (_iter_jsonl_file(open(self.path, 'r', encoding='utf-8'), self.path)
+                            if os.path.exists(self.path) else [])
+            elif self.use_cache:
+                # Students the journal changes come in the JSON form, which apply_records() edits
+                snapshot = snapshot_cache.load_cache(self.path, {rec.get("id") for rec in records})
+                if snapshot is None:
+                    # Missing or stale: parse the JSON and rebuild the cache for next time
+                    snapshot = _load_snapshot(self.path)
+                    snapshot_cache.write_cache(self.path, snapshot)
+            else:
+                snapshot = _load_snapshot(self.path)
+        return replay_stream(snapshot, records)
+
+    def _read_foreign(self):
+        """Collects records other processes appended since we last looked. Call with the lock held."""
+        if self._stale or snapshot_stamp(self.path) != self._stamp or self._journal_size() < self._journal_offset:
+            # Another process rewrote the snapshot: its changes are no longer separable
+            self._stale = True
+            return
+        records, self._journal_offset = read_journal_from(self.path, self._journal_offset)
+        self._unseen.extend(records)
+        self._note_versions(records)
+        self._journal_length += len(records)
+
+    def _check_conflicts(self, records: List[Dict]):
+        # The first record per student carries the version the change was based on
+        bases: Dict[str, str] = {}
+        for rec in records:
+            if "base" in rec:
+                bases.setdefault(rec.get("id"), rec["base"])
+        if not bases:
+            return
+        if self._stale:
+            current = {s.get("id"): s.get("updated_at") for s in iter_data(self.path)}
+            conflicts = [sid for sid, base in bases.items() if current.get(sid) != base]
+        else:
+            # Records handed out by changes() may not be applied by the caller
+            # yet, so the versions are checked as well as what is still unseen
+            touched = {rec.get("id") for rec in self._unseen}
+            conflicts = [sid for sid, base in bases.items()
+                         if sid in touched or self._versions.get(sid, base) != base]
+        if conflicts:
+            raise ConflictError(conflicts)
+
+    def apply(self, records: List[Dict]) -> bool:
+        """Appends records to the journal. Raises ConflictError if a record's base is out of date."""
+        if not records:
+            return True
+        with self.lock():
+            self._read_foreign()
+            self._check_conflicts(records)
+            ok = append_journal(records, self.path)
+            if ok:
+                self._note_versions(records)
+                self._journal_length += len(records)
+                if not self._stale:
+                    self._journal_offset = self._journal_size()
+        return ok
+
+    def save_all(self, data: List[Dict]) -> bool:
+        with self.lock():
+            self._read_foreign()
+            if self._stale or self._unseen:
+                # `data` lacks other processes' changes: fold the files instead.
+                # Everything written through apply() is in the journal already.
+                data = load_data(self.path)
+            unseen, versions = self._unseen, self._versions
+            ok = save_data(data, self.path)
+            if ok:
+                stale = self._stale
+                self._journal_length = 0
+                self._mark_seen()
+                # Still to be picked up by changes(); after a stale fold only a reload will do
+                self._unseen, self._stale, self._versions = unseen, stale, versions
+                if self.use_cache and not is_jsonl(self.path):
+                    snapshot_cache.write_cache(self.path, data)
+        return ok
+
+    def replace_all(self, data: List[Dict]) -> bool:
+        with self.lock():
+            ok = save_data(data, self.path)
+            if ok:
+                # Other processes' records went with the journal; they reload on the new snapshot
+                self._journal_length = 0
+                self._mark_seen()
+                if self.use_cache and not is_jsonl(self.path):
+                    snapshot_cache.write_cache(self.path, data)
+        return ok
+
+    def pending_changes(self) -> int:
+        return self._journal_length
+
+    def changes(self) -> Optional[List[Dict]]:
+        if not self._stale and snapshot_stamp(self.path) == self._stamp \
+                and self._journal_size() == self._journal_offset and not self._unseen:
+            # Nothing new; checked without the lock since it only reads two stat()s
+            return []
+        with self.lock():
+            self._read_foreign()
+            if self._stale:
+                return None
+            records, self._unseen = self._unseen, []
+        return records
+
+    def backup(self) -> str:
+        with self.lock():
+            return backup_data(self.path)
+
+BACKENDS = ("json", "jsonl", "sqlite")
+
+def get_backend(name: Optional[str] = None) -> StorageBackend:
+    """Creates the backend selected by name or the STUDENT_STORAGE env var (default: json)."""
+    name = (name or os.environ.get("STUDENT_STORAGE") or "json").lower()
+    if name == "json":
+        return JsonBackend()
+    if name == "jsonl":
+        return JsonBackend(JSONL_FILE)
+    if name == "sqlite":
+        # Imported here because sqlite_storage builds on this module
+        from sqlite_storage import SQLiteBackend
+        return SQLiteBackend()
+    raise ValueError(f"Unknown storage backend: {name} (expected one of {', '.join(BACKENDS)})")
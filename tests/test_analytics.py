@@ -0,0 +1,81 @@
+import math
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+import storage
+from services import StudentManager
+
+# name, class, absences, {lesson: grades}
+ROSTER = [
+    ("Ali", "9-A", 0, {"Math": [90, 70], "Physics": [80]}),
+    ("Ayse", "9-A", 4, {"Math": [60]}),
+    ("Can", "9-B", 2, {"Math": [100, 50]}),
+    ("Deniz", "9-B", 1, {}),
+    ("Ece", "9-B", 0, {"History": [75]}),
+]
+
+# Worked out by hand: percentiles interpolate linearly between the sorted grades
+EXPECTED_CLASSES = [
+    # 60 70 80 90
+    {"name": "9-A", "count": 4, "mean": 75, "std": math.sqrt(125), "min": 60, "max": 90,
+     "p10": 63, "p25": 67.5, "p50": 75, "p75": 82.5, "p90": 87},
+    # 50 75 100
+    {"name": "9-B", "count": 3, "mean": 75, "std": math.sqrt(1250 / 3), "min": 50, "max": 100,
+     "p10": 55, "p25": 62.5, "p50": 75, "p75": 87.5, "p90": 95},
+]
+EXPECTED_LESSONS = [
+    {"name": "History", "count": 1, "mean": 75, "std": 0, "min": 75, "max": 75,
+     "p10": 75, "p25": 75, "p50": 75, "p75": 75, "p90": 75},
+    # 50 60 70 90 100
+    {"name": "Math", "count": 5, "mean": 74, "std": math.sqrt(344), "min": 50, "max": 100,
+     "p10": 54, "p25": 60, "p50": 70, "p75": 90, "p90": 96},
+    {"name": "Physics", "count": 1, "mean": 80, "std": 0, "min": 80, "max": 80,
+     "p10": 80, "p25": 80, "p50": 80, "p75": 80, "p90": 80},
+]
+# 50 60 70 75 80 90 100
+EXPECTED_SCHOOL = {"name": "school", "count": 7, "mean": 75, "std": math.sqrt(250), "min": 50, "max": 100,
+                   "p10": 56, "p25": 65, "p50": 75, "p75": 85, "p90": 94,
+                   "students": 5, "classes": 2, "lessons": 3}
+
+@pytest.fixture(params=["histogram", "sorted"])
+def table(request, tmp_path):
+    manager = StudentManager(storage.JsonBackend(str(tmp_path / "students.json")))
+    for name, class_name, absences, grades in ROSTER:
+        student = manager.add_student(name, "Yilmaz", class_name)
+        manager.update_attendance(student.id, absences)
+        for lesson, lesson_grades in grades.items():
+            for grade in lesson_grades:
+                manager.add_grade(student.id, lesson, grade)
+    table = manager.analytics()
+    # Whole-number grades are read off histograms; the other path sorts them
+    table._small_ints = request.param == "histogram"
+    return table
+
+def _approx(rows):
+    return [pytest.approx(row) for row in rows]
+
+def test_distributions_match_the_hand_computed_values(table):
+    assert table.class_stats() == _approx(EXPECTED_CLASSES)
+    assert table.lesson_stats() == _approx(EXPECTED_LESSONS)
+    assert table.school_stats() == pytest.approx(EXPECTED_SCHOOL)
+
+def test_student_averages_and_class_rankings(table):
+    averages = table.student_averages()
+    assert averages[:3].tolist() == [80, 60, 75]
+    assert np.isnan(averages[3]) and averages[4] == 75
+    rankings = {name: [(row["name"], row["rank"], row["average"]) for row in rows]
+                for name, rows in table.class_rankings().items()}
+    # Deniz has no grades; Can and Ece tie
+    assert rankings == {"9-A": [("Ali Yilmaz", 1, 80), ("Ayse Yilmaz", 2, 60)],
+                        "9-B": [("Can Yilmaz", 1, 75), ("Ece Yilmaz", 1, 75)]}
+    assert list(table.class_rankings("9-A")) == ["9-A"]
+    assert table.class_rankings("12-Z") == {}
+
+def test_absence_correlation(table):
+    # Absences 0 4 2 0 against averages 80 60 75 75: Sxy = -45, Sxx = 11, Syy = 225
+    result = table.absence_correlation()
+    assert result["students"] == 4
+    assert result["r"] == pytest.approx(-45 / math.sqrt(11 * 225))
+    assert result["slope"] == pytest.approx(-45 / 11)
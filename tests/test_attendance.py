@@ -0,0 +1,73 @@
+import pytest
+
+import storage
+from models import MODELS
+from services import StudentManager
+
+# March 2025: the 6th is a Thursday, the 8th and 9th are a weekend
+THU, FRI, SAT, MON, TUE, WED = "2025-03-06", "2025-03-07", "2025-03-08", "2025-03-10", "2025-03-11", "2025-03-12"
+
+@pytest.fixture(params=sorted(MODELS))
+def manager(request, tmp_path):
+    manager = StudentManager(storage.JsonBackend(str(tmp_path / "students.json")), model=MODELS[request.param])
+    for name, class_name in (("Ali", "9-A"), ("Ayse", "9-A"), ("Can", "9-A"), ("Deniz", "9-B")):
+        manager.add_student(name, "Yilmaz", class_name)
+    return manager
+
+def _student(manager, name):
+    return next(s for s in manager.students if s.name == name)
+
+@pytest.mark.parametrize("days, streak", [
+    ([THU, FRI, MON, TUE], 4),        # the weekend does not break it
+    ([FRI, MON], 2),
+    ([FRI, TUE], 1),                  # Monday was a school day
+    ([THU, FRI, SAT, MON], 2),        # a Saturday entry is not the day after Friday
+    ([MON, WED], 1),
+    ([], 0),
+])
+def test_streaks_run_across_weekends(manager, days, streak):
+    ali = _student(manager, "Ali")
+    for day in reversed(days):
+        manager.mark_absent(ali.id, day)
+    assert ali.absence_streak() == streak
+
+def test_streaks_are_limited_to_the_range(manager):
+    ali = _student(manager, "Ali")
+    for day in (THU, FRI, MON, TUE):
+        manager.mark_absent(ali.id, day)
+    assert ali.absence_streak(start=FRI) == 3
+    assert ali.absence_streak(start=FRI, end=MON) == 2
+    assert ali.absence_streak(start=WED) == 0
+
+def test_roll_call_marks_corrects_and_is_stored(manager):
+    ali, ayse, can = (_student(manager, name) for name in ("Ali", "Ayse", "Can"))
+    assert manager.roll_call("9-A", [ali.id, ayse.id], THU) == 2
+    assert manager.roll_call("9-A", [ali.id, ayse.id], THU) == 0
+    # Entered again: Ayse was there after all, Can was not
+    assert manager.roll_call("9-A", [ali.id, can.id], THU) == 2
+    assert [s.name for s in manager.students if s.is_absent(THU)] == ["Ali", "Can"]
+    assert (ali.absence_count, ayse.absence_count, can.absence_count) == (1, 0, 1)
+    reopened = StudentManager(storage.JsonBackend(manager.backend.path), model=manager.model)
+    assert [s.absence_days() for s in reopened.students] == [[THU], [], [THU], []]
+
+def test_rejected_roll_call_changes_nothing(manager):
+    ali, deniz = _student(manager, "Ali"), _student(manager, "Deniz")
+    with pytest.raises(ValueError):
+        manager.roll_call("9-A", [ali.id, deniz.id], THU)
+    with pytest.raises(ValueError):
+        manager.roll_call("12-Z", [], THU)
+    assert not any(s.absence_count for s in manager.students)
+
+def test_roll_calls_over_a_weekend_make_a_streak(manager):
+    ali, ayse, deniz = (_student(manager, name) for name in ("Ali", "Ayse", "Deniz"))
+    for day, absent in ((THU, [ali.id, ayse.id]), (FRI, [ali.id]), (MON, [ali.id, ayse.id]), (TUE, [ali.id])):
+        manager.roll_call("9-A", absent, day)
+    manager.roll_call("9-B", [deniz.id], FRI)
+    manager.roll_call("9-B", [deniz.id], MON)
+    rows = lambda *args, **kwargs: [(s.name, n) for s, n in manager.absence_streaks(*args, **kwargs)]
+    assert rows() == [("Ali", 4)]
+    assert rows(2) == [("Ali", 4), ("Deniz", 2)]
+    assert rows(1, class_name="9-A") == [("Ali", 4), ("Ayse", 1)]
+    assert rows(2, start=MON) == [("Ali", 2)]
+    with pytest.raises(ValueError):
+        manager.absence_streaks(0)
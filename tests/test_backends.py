@@ -0,0 +1,108 @@
+import pytest
+
+import storage
+from jobs import JobRunner
+from services import StudentManager
+from sqlite_storage import SQLiteBackend, migrate_json
+
+@pytest.fixture(params=["json", "sqlite"])
+def backend(request, tmp_path):
+    if request.param == "sqlite":
+        return lambda: SQLiteBackend(str(tmp_path / "students.db"))
+    return lambda: storage.JsonBackend(str(tmp_path / "students.json"))
+
+def _break_writes(manager, monkeypatch):
+    """Makes the next writes fail the way a full disk would."""
+    if manager.backend.name == "sqlite":
+        manager.backend.conn.execute("CREATE TRIGGER no_grades BEFORE INSERT ON grades "
+                                     "BEGIN SELECT RAISE(ABORT, 'disk I/O error'); END")
+    else:
+        monkeypatch.setattr(storage, "append_journal", lambda records, path=None: False)
+
+def test_failed_write_raises_and_keeps_the_stored_state(backend, monkeypatch):
+    manager = StudentManager(backend())
+    student_id = manager.add_student("Ali", "Yilmaz", "9-A").id
+    manager.add_grade(student_id, "Math", 90)
+    _break_writes(manager, monkeypatch)
+    with pytest.raises(storage.StorageError):
+        manager.add_grade(student_id, "Math", 50)
+    assert manager.get_student(student_id).grades == {"Math": [90]}
+    with pytest.raises(storage.StorageError):
+        with manager.batch():
+            manager.add_grade(student_id, "Physics", 70)
+            manager.update_student(student_id, name="Veli")
+    student = manager.get_student(student_id)
+    assert (student.name, student.grades) == ("Ali", {"Math": [90]})
+
+def test_failed_background_write_is_reported_through_the_future(backend, monkeypatch):
+    jobs = JobRunner()
+    try:
+        # Set up on the worker, as a SQLite connection is bound to the thread that opened it
+        def _setup():
+            manager = StudentManager(backend())
+            student_id = manager.add_student("Ali", "Yilmaz", "9-A").id
+            _break_writes(manager, monkeypatch)
+            return manager, student_id
+        manager, student_id = jobs.submit(_setup).result()
+        manager.writer = jobs
+        manager.begin()
+        manager.add_grade(student_id, "Math", 50)
+        with pytest.raises(storage.StorageError):
+            manager.commit().result()
+    finally:
+        jobs.shutdown()
+
+def test_failed_restore_leaves_the_data_alone(backend, monkeypatch):
+    manager = StudentManager(backend())
+    manager.add_student("Ali", "Yilmaz", "9-A")
+    manager.backup_data()
+    manager.add_student("Veli", "Kaya", "9-A")
+    monkeypatch.setattr(manager.backend, "replace_all", lambda data: False)
+    with pytest.raises(storage.StorageError):
+        manager.restore_backup()
+    assert [s.name for s in manager.students] == ["Ali", "Veli"]
+
+def _fill(manager):
+    ali = manager.add_student("Ali", "Yilmaz", "9-A")
+    manager.add_grade(ali.id, "Math", 90)
+    manager.add_grade(ali.id, "Math", 70, term="2025-1", day="2025-03-04", weight=2.5)
+    manager.add_grade(ali.id, "Physics", 60, weight=3)
+    manager.mark_absent(ali.id, "2025-03-05")
+    manager.mark_absent(ali.id, "2025-03-03")
+    ayse = manager.add_student("Ayşe", "Kaya", "9-B")
+    manager.update_student(ayse.id, name="Ayşegül", class_name="10-B")
+    manager.update_attendance(ayse.id, 2)
+    manager.delete_student(manager.add_student("Can", "Demir", "9-A").id)
+
+def _dicts(manager):
+    return [s.to_dict() for s in manager.students]
+
+def test_sqlite_round_trip(tmp_path):
+    path = str(tmp_path / "students.db")
+    manager = StudentManager(SQLiteBackend(path))
+    _fill(manager)
+    reopened = StudentManager(SQLiteBackend(path))
+    assert _dicts(reopened) == _dicts(manager)
+    # A full rewrite stores the same thing as the single-row statements did
+    assert reopened.backend.save_all(_dicts(manager))
+    assert _dicts(StudentManager(SQLiteBackend(path))) == _dicts(manager)
+
+def test_migrated_json_matches_the_json_data(tmp_path):
+    manager = StudentManager(storage.JsonBackend(str(tmp_path / "students.json")))
+    _fill(manager)
+    db_path = str(tmp_path / "students.db")
+    assert migrate_json(manager.backend.path, db_path) == 2
+    assert _dicts(StudentManager(SQLiteBackend(db_path))) == _dicts(manager)
+
+def test_data_version_reports_other_connections_only(tmp_path):
+    path = str(tmp_path / "students.db")
+    first, second = StudentManager(SQLiteBackend(path)), StudentManager(SQLiteBackend(path))
+    student = first.add_student("Ali", "Yilmaz", "9-A")
+    assert first.backend.changes() == []
+    # SQLite cannot say what changed, so the other side reloads everything
+    assert second.backend.changes() is None
+    assert second.backend.changes() == []
+    first.add_grade(student.id, "Math", 90)
+    assert second.sync() == 1
+    assert second.get_student(student.id).grades == {"Math": [90]}
+    assert second.sync() == 0
@@ -0,0 +1,93 @@
+import os
+
+import pytest
+
+import storage
+from backup_store import BackupNotFound, BackupStore
+from services import StudentManager
+
+def _records(count, name="Ali"):
+    return [{"id": f"s{i:04}", "name": name, "surname": "Yilmaz", "class_name": "9-A", "grades": {"Math": [i % 101]}}
+            for i in range(count)]
+
+@pytest.fixture
+def store(tmp_path):
+    return BackupStore(str(tmp_path / "backups"), "students.json")
+
+def test_unchanged_chunks_are_stored_once(store):
+    first = store.create(_records(500))
+    assert first["new_chunks"] == len(first["chunks"]) > 1
+    records = _records(500)
+    records[250]["name"] = "Veli"
+    second = store.create(records)
+    assert second["new_chunks"] == 1
+    assert list(store.iter_records(second["id"]))[250]["name"] == "Veli"
+    assert list(store.iter_records(first["id"])) == _records(500)
+
+def test_find_by_id_prefix(store):
+    first = store.create(_records(3))
+    second = store.create(_records(4))
+    assert store.find()["id"] == second["id"]
+    assert store.find(first["id"])["id"] == first["id"]
+    assert store.find(first["id"][:8])["id"] == second["id"]
+    with pytest.raises(BackupNotFound):
+        store.find("19990101")
+
+def test_sources_share_chunks_but_not_backups(store):
+    store.create(_records(3))
+    other = BackupStore(store.root, "students.jsonl")
+    assert other.create(_records(3))["new_chunks"] == 0
+    assert len(store.list()) == len(other.list()) == 1
+
+def test_corrupt_chunk_is_detected(store):
+    backup = store.create(_records(3), compress=False)
+    with open(store._object_path(backup["chunks"][0]), 'r+b') as f:
+        f.seek(10)
+        f.write(b"X")
+    with pytest.raises(ValueError):
+        list(store.iter_records())
+
+def test_prune_keeps_the_newest_and_drops_unreferenced_chunks(store):
+    for i in range(5):
+        store.create(_records(3, name=f"Name{i}"))
+    kept = [b["id"] for b in store.list()[-2:]]
+    removed = store.prune(keep_last=2, keep_daily=0)
+    assert removed["backups"] == 3 and removed["chunks"] == 3
+    assert [b["id"] for b in store.list()] == kept
+    assert [r["name"] for r in store.iter_records(kept[0])] == ["Name3"] * 3
+
+def test_manager_restores_a_backup(tmp_path):
+    path = str(tmp_path / "students.json")
+    manager = StudentManager(storage.JsonBackend(path))
+    student = manager.add_student("Ali", "Yilmaz", "9-A")
+    manager.add_grade(student.id, "Math", 90)
+    assert manager.backup_data().startswith("Backup created")
+    backup_id = manager.backend.backup_store().find()["id"]
+
+    manager.add_grade(student.id, "Math", 10)
+    manager.add_student("Ayse", "Kaya", "9-A")
+    assert manager.restore_backup(backup_id[:8]) == f"Restored backup {backup_id} (1 students)."
+    assert [(s.name, s.grades) for s in manager.students] == [("Ali", {"Math": [90]})]
+    reloaded = StudentManager(storage.JsonBackend(path))
+    assert [(s.name, s.grades) for s in reloaded.students] == [("Ali", {"Math": [90]})]
+    assert os.path.isdir(storage.backup_dir(path))
+
+@pytest.fixture(params=["json", "sqlite"])
+def backend(request, tmp_path):
+    if request.param == "sqlite":
+        from sqlite_storage import SQLiteBackend
+        return lambda: SQLiteBackend(str(tmp_path / "students.db"))
+    return lambda: storage.JsonBackend(str(tmp_path / "students.json"))
+
+def test_restore_discards_another_processes_writes(backend):
+    first = StudentManager(backend())
+    first.add_student("Ali", "Yilmaz", "9-A")
+    first.backup_data()
+    second = StudentManager(backend())
+    first.add_student("Veli", "Kaya", "9-A")
+    second.add_student("Can", "Demir", "9-B")
+    assert first.restore_backup().endswith("(1 students).")
+    assert [s.name for s in first.students] == ["Ali"]
+    assert [s.name for s in StudentManager(backend()).students] == ["Ali"]
+    second.sync()
+    assert [s.name for s in second.students] == ["Ali"]
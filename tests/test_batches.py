@@ -0,0 +1,72 @@
+import pytest
+
+import storage
+from services import StudentManager
+from sqlite_storage import SQLiteBackend
+
+@pytest.fixture(params=["json", "sqlite"])
+def manager(request, tmp_path):
+    if request.param == "sqlite":
+        backend = SQLiteBackend(str(tmp_path / "students.db"))
+    else:
+        backend = storage.JsonBackend(str(tmp_path / "students.json"))
+    manager = StudentManager(backend)
+    for name, surname, class_name in (("Ali", "Yilmaz", "9-A"), ("Ayse", "Kaya", "9-A"),
+                                      ("Ali", "Kaya", "9-B")):
+        student = manager.add_student(name, surname, class_name)
+        manager.add_grade(student.id, "Math", 80)
+    yield manager
+    manager.backend.close()
+
+def _ids(students):
+    return [s.id for s in students]
+
+def _stored(manager):
+    return list(manager.backend.load())
+
+def test_failed_batch_restores_memory_and_storage(manager):
+    before = [s.to_dict() for s in manager.students]
+    stored, pending = _stored(manager), manager.backend.pending_changes()
+    ali, ayse, other_ali = manager.students
+    with pytest.raises(RuntimeError):
+        with manager.batch():
+            manager.add_grade(ali.id, "Math", 10, term="2025-1")
+            manager.update_attendance(ali.id, 3)
+            manager.mark_absent(ayse.id, "2025-03-03")
+            manager.update_student(ayse.id, name="Veli", class_name="9-C")
+            manager.delete_student(other_ali.id)
+            manager.add_student("Can", "Demir", "9-A")
+            raise RuntimeError("import row failed")
+    assert [s.to_dict() for s in manager.students] == before
+    assert _stored(manager) == stored
+    assert manager.backend.pending_changes() == pending
+
+def test_rollback_restores_the_indexes_and_order(manager):
+    ali, ayse, other_ali = manager.students
+    manager.search("ayse")
+    manager.begin()
+    manager.update_student(ayse.id, class_name="9-C")
+    manager.delete_student(ali.id)
+    manager.rollback()
+    assert _ids(manager.students) == [ali.id, ayse.id, other_ali.id]
+    assert _ids(manager.get_class_roster("9-A")) == [ali.id, ayse.id]
+    assert manager.get_class_roster("9-C") == []
+    assert _ids(manager.find_by_name(name="Ali")) == [ali.id, other_ali.id]
+    assert _ids(manager.search("kaya")) == [ayse.id, other_ali.id]
+
+def test_nested_batches_commit_or_roll_back_together(manager):
+    ali = manager.students[0]
+    with pytest.raises(ValueError):
+        with manager.batch():
+            manager.add_grade(ali.id, "Math", 90)
+            with manager.batch():
+                manager.add_grade(ali.id, "Math", 95)
+            manager.add_grade(ali.id, "Math", 101)
+    assert manager.get_student(ali.id).grades == {"Math": [80]}
+    with manager.batch():
+        manager.add_grade(ali.id, "Math", 90)
+        with manager.batch():
+            manager.add_grade(ali.id, "Math", 95)
+    reopened = StudentManager(type(manager.backend)(manager.backend.path))
+    assert reopened.get_student(ali.id).grades == {"Math": [80, 90, 95]}
+    reopened.backend.close()
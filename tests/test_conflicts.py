@@ -0,0 +1,68 @@
+"""Two managers on one data file, as the CLI, GUI and server would be in separate processes."""
+import pytest
+
+import storage
+from services import StudentManager
+
+@pytest.fixture(params=["json", "sqlite"])
+def managers(request, tmp_path):
+    if request.param == "sqlite":
+        from sqlite_storage import SQLiteBackend
+        backend = lambda: SQLiteBackend(str(tmp_path / "students.db"))
+    else:
+        backend = lambda: storage.JsonBackend(str(tmp_path / "students.json"))
+    first = StudentManager(backend())
+    student = first.add_student("Ali", "Yilmaz", "9-A")
+    other = first.add_student("Ayse", "Kaya", "9-A")
+    second = StudentManager(backend())
+    yield first, second, student.id, other.id
+    first.backend.close()
+    second.backend.close()
+
+def test_stale_edit_is_rejected_and_refreshed(managers):
+    first, second, student_id, _ = managers
+    first.add_grade(student_id, "Math", 90)
+    with pytest.raises(storage.ConflictError):
+        second.add_grade(student_id, "Math", 50)
+    # The rejected edit is replaced by the stored state, so a retry applies on top of it
+    assert second.get_student(student_id).grades == {"Math": [90]}
+    second.add_grade(student_id, "Math", 50)
+    first.sync()
+    assert first.get_student(student_id).grades == {"Math": [90, 50]}
+
+def test_edits_to_different_students_do_not_conflict(managers):
+    first, second, student_id, other_id = managers
+    first.update_student(student_id, name="Veli")
+    second.update_attendance(other_id, 2)
+    second.sync()
+    assert second.get_student(student_id).name == "Veli"
+    first.sync()
+    assert first.get_student(other_id).absence_count == 2
+
+def test_delete_of_a_changed_student_is_rejected(managers):
+    first, second, student_id, _ = managers
+    first.update_student(student_id, name="Veli")
+    with pytest.raises(storage.ConflictError):
+        second.delete_student(student_id)
+    assert second.get_student(student_id).name == "Veli"
+
+def test_changes_fetched_but_not_yet_applied_still_conflict(managers):
+    first, second, student_id, _ = managers
+    first.add_grade(student_id, "Math", 90)
+    # The GUI's worker half of sync(): the records are read but not applied yet
+    records, snapshot = second.fetch_changes()
+    with pytest.raises(storage.ConflictError):
+        second.add_grade(student_id, "Math", 50)
+    second.apply_changes(records, snapshot)
+    assert second.get_student(student_id).grades == {"Math": [90]}
+    second.add_grade(student_id, "Math", 50)
+    first.sync()
+    assert first.get_student(student_id).grades == {"Math": [90, 50]}
+
+def test_update_of_several_fields_is_stored_at_once(managers):
+    first, second, student_id, _ = managers
+    first.update_student(student_id, name="Veli", class_name="10-B")
+    first.update_student(student_id, surname="Kaya", class_name="10-C")
+    second.sync()
+    student = second.get_student(student_id)
+    assert (student.name, student.surname, student.class_name) == ("Veli", "Kaya", "10-C")
@@ -0,0 +1,57 @@
+import csv
+import gzip
+
+import pytest
+
+import csv_export
+import storage
+from services import StudentManager
+
+NAMES = [
+    ("Ali, Jr.", "Yılmaz", "9-A"),
+    ('Ayşe "Ace"', "Kaya", "9-B"),
+    ("Can", "Demir\nÖztürk", "9-A"),
+    ("Deniz", ' "quoted", and\r\nsplit ', "10,C"),
+    ("Ece", "Şahin", "9-A"),
+]
+
+@pytest.fixture
+def manager(tmp_path):
+    manager = StudentManager(storage.JsonBackend(str(tmp_path / "students.json")))
+    for name, surname, class_name in NAMES:
+        student = manager.add_student(name, surname, class_name)
+        manager.add_grade(student.id, "Math, Advanced", 90, term='2025 "spring"')
+    return manager
+
+def _read(path, opener=open):
+    with opener(path, "rt", encoding="utf-8", newline="") as f:
+        return list(csv.reader(f))
+
+def test_commas_quotes_and_newlines_survive_a_round_trip(manager, tmp_path, monkeypatch):
+    # Smaller than the roster, so rows are written over several chunks
+    monkeypatch.setattr(csv_export, "CHUNK_ROWS", 2)
+    path = str(tmp_path / "export.csv")
+    assert manager.export_csv(path) == f"Data exported to {path}"
+    rows = _read(path)
+    assert rows[0] == ["ID", "Name", "Surname", "Class", "Absence", "Grades"]
+    assert [row[1:4] for row in rows[1:]] == [list(names) for names in NAMES]
+    assert {row[5] for row in rows[1:]} == {"Math, Advanced: 90"}
+
+def test_fields_are_quoted_per_rfc_4180(manager, tmp_path):
+    path = str(tmp_path / "export.csv")
+    csv_export.write_csv(manager.students, path, columns=["name", "surname"])
+    with open(path, "rb") as f:
+        data = f.read().decode("utf-8")
+    assert data.startswith("Name,Surname\r\n")
+    assert '"Ali, Jr.",Yılmaz\r\n' in data
+    assert '"Ayşe ""Ace""",Kaya\r\n' in data
+    assert 'Can,"Demir\nÖztürk"\r\n' in data
+    assert 'Deniz," ""quoted"", and\r\nsplit "\r\n' in data
+
+def test_long_layout_and_gzip_keep_the_quoting(manager, tmp_path):
+    path = str(tmp_path / "export.csv.gz")
+    assert csv_export.write_csv(manager.students, path, long=True) == len(NAMES)
+    rows = _read(path, gzip.open)
+    assert rows[0] == ["ID", "Name", "Surname", "Class", "Lesson", "Grade", "Term", "Date", "Weight"]
+    assert rows[4][1:] == ["Deniz", ' "quoted", and\r\nsplit ', "10,C", "Math, Advanced", "90",
+                           '2025 "spring"', "", "1"]
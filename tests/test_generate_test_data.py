@@ -0,0 +1,66 @@
+import json
+
+import pytest
+
+import generate_test_data as gen
+import storage
+from services import StudentManager
+
+SPEC = gen.DataSpec(terms=["2025-1", "2025-2"], grade_mean=70)
+
+@pytest.fixture(autouse=True)
+def small_blocks(monkeypatch):
+    # Several blocks, so the workers really split the work
+    monkeypatch.setattr(gen, "BLOCK_SIZE", 7)
+
+def _generate(tmp_path, name, fmt="json", seed=42, workers=1, count=30):
+    path = str(tmp_path / name)
+    assert gen.generate(count, path, fmt, seed, SPEC, workers) == count
+    with open(path, "rb") as f:
+        return f.read()
+
+@pytest.mark.parametrize("fmt", ["json", "jsonl"])
+def test_same_seed_gives_byte_identical_files(tmp_path, fmt):
+    first = _generate(tmp_path, "a", fmt)
+    assert _generate(tmp_path, "b", fmt) == first
+    assert _generate(tmp_path, "c", fmt, workers=3) == first
+    assert _generate(tmp_path, "d", fmt, workers=3) == first
+    assert _generate(tmp_path, "e", fmt, seed=43) != first
+
+def test_formats_hold_the_same_students(tmp_path):
+    array = json.loads(_generate(tmp_path, "a.json"))
+    lines = [json.loads(line) for line in _generate(tmp_path, "a.jsonl", "jsonl").splitlines()]
+    assert lines == array
+    assert len({s["id"] for s in array}) == 30
+    path = str(tmp_path / "students.db")
+    gen.generate(30, path, "sqlite", 42, SPEC, workers=3)
+    from sqlite_storage import SQLiteBackend
+    backend = SQLiteBackend(path)
+    try:
+        assert backend.load() == array
+    finally:
+        backend.close()
+
+def test_appending_keeps_the_existing_students(tmp_path):
+    first = json.loads(_generate(tmp_path, "students.json", count=10))
+    path = str(tmp_path / "students.json")
+    assert gen.generate(5, path, "json", 7, SPEC, append=True) == 15
+    data = storage.load_data(path)
+    assert data[:10] == first
+    assert len({s["id"] for s in data}) == 15
+
+def test_append_keeps_students_stored_while_waiting_for_the_lock(tmp_path, monkeypatch):
+    path = str(tmp_path / "students.json")
+    gen.generate(3, path, "json", 1, SPEC)
+    other = StudentManager(storage.JsonBackend(path))
+    stored = []
+
+    class ContendedLock(gen.FileLock):
+        def acquire(self):
+            # Another process stores a student just before the generator gets the lock
+            stored.append(other.add_student("Ali", "Yilmaz", "9-A").id)
+            super().acquire()
+
+    monkeypatch.setattr(gen, "FileLock", ContendedLock)
+    assert gen.generate(2, path, "json", 2, SPEC, append=True) == 6
+    assert stored[0] in [s["id"] for s in storage.load_data(path)]
@@ -0,0 +1,135 @@
+"""The GUI's virtualized table, driven against a stub Treeview (no display needed)."""
+import pytest
+
+pytest.importorskip("tkinter")
+
+import storage
+from gui import ROW_BUFFER, ROW_HEIGHT, StudentManagerApp
+from services import StudentManager
+
+VISIBLE = 10
+
+class StubTreeview:
+    """Records the pool items the way ttk.Treeview keeps them: attached in order, or detached."""
+
+    def __init__(self):
+        self.items = {}
+        self.attached = []
+        self.selected = ()
+        self.item_calls = 0
+
+    def winfo_height(self):
+        return VISIBLE * ROW_HEIGHT
+
+    def insert(self, parent, index, iid):
+        self.items[iid] = {"values": (), "tags": ()}
+        self.attached.append(iid)
+
+    def delete(self, iid):
+        del self.items[iid]
+        if iid in self.attached:
+            self.attached.remove(iid)
+
+    def move(self, iid, parent, index):
+        if iid in self.attached:
+            self.attached.remove(iid)
+        self.attached.insert(index, iid)
+
+    def detach(self, iid):
+        if iid in self.attached:
+            self.attached.remove(iid)
+
+    def item(self, iid, values=(), tags=()):
+        self.item_calls += 1
+        self.items[iid]["values"] = values
+        if tags:
+            self.items[iid]["tags"] = tags
+
+    def selection(self):
+        return self.selected
+
+    def selection_set(self, iid):
+        self.selected = (iid,)
+
+    def selection_remove(self, items):
+        self.selected = ()
+
+    def focus(self, iid):
+        pass
+
+    def shown(self):
+        return [self.items[iid]["values"][1] for iid in self.attached]
+
+class StubScrollbar:
+    def set(self, first, last):
+        self.position = (first, last)
+
+class StubVar:
+    def __init__(self, value=""):
+        self.value = value
+
+    def get(self):
+        return self.value
+
+@pytest.fixture
+def app(tmp_path):
+    manager = StudentManager(storage.JsonBackend(str(tmp_path / "students.json")))
+    with manager.batch():
+        for i in range(500):
+            manager.add_student(f"Student{i:03}", "Yilmaz", "9-A" if i % 2 else "10-B")
+    # Everything __init__ sets up except the Tk widgets
+    app = StudentManagerApp.__new__(StudentManagerApp)
+    app.manager = manager
+    app.tree, app.scrollbar, app.search_var = StubTreeview(), StubScrollbar(), StubVar()
+    app._rows, app._offset, app._pool_size, app._selected_id, app._row_cache = [], 0, 0, None, {}
+    app.refresh_list()
+    return app
+
+def test_only_the_visible_window_is_materialized(app):
+    assert len(app.tree.items) == VISIBLE
+    assert app.tree.shown() == [f"Student{i:03}" for i in range(VISIBLE)]
+    assert len(app._row_cache) == VISIBLE + ROW_BUFFER
+
+def test_scrolling_refills_the_pool(app):
+    app._scroll_by(250)
+    assert len(app.tree.items) == VISIBLE
+    assert app.tree.shown() == [f"Student{i:03}" for i in range(250, 260)]
+    assert len(app._row_cache) <= 2 * (VISIBLE + 2 * ROW_BUFFER)
+    assert app.scrollbar.position == (0.5, 0.52)
+
+def test_scrolling_stops_at_the_end(app):
+    app._on_scrollbar("moveto", "1.0")
+    assert app.tree.shown()[-1] == "Student499"
+    assert len(app.tree.shown()) == VISIBLE
+
+def test_short_lists_detach_the_unused_slots(app):
+    app.search_var.value = "Student00"
+    app.refresh_list()
+    assert app.tree.shown() == [f"Student00{i}" for i in range(VISIBLE)]
+    app.search_var.value = "Student49"
+    app.refresh_list()
+    assert app.tree.shown() == [f"Student49{i}" for i in range(VISIBLE)]
+    app.search_var.value = "Student499"
+    app.refresh_list()
+    assert app.tree.shown() == ["Student499"]
+    assert len(app.tree.items) == VISIBLE
+
+def test_a_changed_student_is_redrawn_in_place(app):
+    student_id = app._rows[3]
+    app.manager.update_student(student_id, name="Changed")
+    app.tree.item_calls = 0
+    app._update_row(student_id)
+    assert app.tree.item_calls == 1
+    assert app.tree.shown()[3] == "Changed"
+
+def test_selection_follows_the_student_not_the_slot(app):
+    app._selected_id = app._rows[2]
+    app._render_window()
+    assert app.tree.selected == ("row2",)
+    app._scroll_by(1)
+    assert app.tree.selected == ("row1",)
+    app._scroll_by(VISIBLE)
+    assert app.tree.selected == ()
+    app._move_selection(1)
+    assert app._selected_id == app._rows[3]
+    assert app.tree.selected == ("row0",)
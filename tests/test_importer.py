@@ -0,0 +1,108 @@
+import csv
+import gzip
+import json
+
+import pytest
+
+import importer
+import storage
+from services import StudentManager
+
+@pytest.fixture
+def manager(tmp_path):
+    return StudentManager(storage.JsonBackend(str(tmp_path / "students.json")))
+
+def _write_csv(path, rows):
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        csv.writer(f).writerows(rows)
+    return str(path)
+
+def test_students_csv_reports_duplicates_and_invalid_rows(manager, tmp_path):
+    existing = manager.add_student("Ali", "Yilmaz", "9-A")
+    path = _write_csv(tmp_path / "students.csv", [
+        ["ID", "Name", "Surname", "Class", "Absence", "Grades"],
+        ["s1", "Ayse", "Kaya", "10-B", "2", "Math: 90 80; Physics: 70"],
+        [existing.id, "Ali", "Yilmaz", "9-A", "0", ""],
+        ["s2", "", "Demir", "10-B", "0", ""],
+        ["s3", "Can", "Demir", "10-B", "-1", ""],
+        ["s4", "Cem", "Demir", "10-B", "0", "Math: 101"],
+        ["s1", "Ayse", "Kaya", "10-B", "2", ""],
+        ["", "Deniz", "Arslan", "11-C", "", ""],
+    ])
+    report = manager.import_students(path, chunk_size=3)
+
+    assert report.imported == 2
+    assert report.duplicates == [(3, existing.id), (7, "s1")]
+    assert [line for line, _ in report.errors] == [4, 5, 6]
+    assert "name is required" in report.errors[0][1]
+    assert manager.get_student("s1").grades == {"Math": [90, 80], "Physics": [70]}
+    assert str(report) == "Imported 2 rows, skipped 2 duplicate ids, 3 invalid rows."
+
+def test_report_is_written_as_csv(manager, tmp_path):
+    path = _write_csv(tmp_path / "students.csv", [["name", "surname", "class_name"], ["", "Kaya", "9-A"]])
+    report = manager.import_students(path)
+    report.write(str(tmp_path / "skipped.csv"))
+    with open(tmp_path / "skipped.csv", encoding='utf-8', newline='') as f:
+        assert list(csv.reader(f)) == [["Line", "Problem"], ["2", "name is required"]]
+
+def test_students_jsonl_gzip(manager, tmp_path):
+    path = tmp_path / "students.jsonl.gz"
+    with gzip.open(path, 'wt', encoding='utf-8') as f:
+        f.write(json.dumps({"id": "s1", "name": "Ayse", "surname": "Kaya", "class_name": "9-A",
+                            "grades": {"Math": [90]}, "absence_dates": ["2026-01-06", "2026-01-05"]}) + "\n")
+        f.write("\n{not json\n")
+    report = manager.import_students(str(path))
+    assert report.imported == 1
+    assert [line for line, _ in report.errors] == [3]
+    assert manager.get_student("s1").absence_days() == ["2026-01-05", "2026-01-06"]
+
+def test_malformed_grade_info_is_a_row_error(manager, tmp_path):
+    path = tmp_path / "students.jsonl"
+    rows = [{"id": "s1", "name": "Ayse", "surname": "Kaya", "class_name": "9-A",
+             "grades": {"Math": [90]}, "grade_info": {"Math": {"term": 5}}},
+            {"id": "s2", "name": "Ali", "surname": "Kaya", "class_name": "9-A",
+             "grades": {"Math": [80]}, "grade_info": {"Math": {"term": ["2025-1"], "weight": {"x": 1}}}},
+            {"id": "s3", "name": "Can", "surname": "Kaya", "class_name": "9-A",
+             "grades": {"Math": [70]}, "grade_info": {"Math": {"term": ["2025-1"]}}}]
+    path.write_text("".join(json.dumps(row) + "\n" for row in rows), encoding='utf-8')
+    for workers in (1, 2):
+        chunks = list(importer.iter_validated(str(path), "students", chunk_size=2, workers=workers))
+        assert [line for _, errors in chunks for line, _ in errors] == [1, 2]
+    report = manager.import_students(str(path))
+    assert report.imported == 1
+    assert "grade_info of Math" in report.errors[0][1]
+    assert manager.get_student("s3").grade_history()[0].term == "2025-1"
+
+def test_grades_report_unknown_students_and_invalid_rows(manager, tmp_path):
+    student = manager.add_student("Ali", "Yilmaz", "9-A")
+    path = _write_csv(tmp_path / "grades.csv", [
+        ["ID", "Lesson", "Grade", "Term", "Date", "Weight"],
+        [student.id, "Math", "90", "2025-1", "2025-10-01", "2"],
+        ["nobody", "Math", "90", "", "", ""],
+        [student.id, "Math", "abc", "", "", ""],
+        [student.id, "Math", "80", "", "2025-13-01", ""],
+        [student.id, "", "80", "", "", ""],
+        [student.id, "Math", "70", "", "", ""],
+    ])
+    report = manager.import_grades(path)
+
+    assert report.imported == 2
+    assert [line for line, _ in report.errors] == [3, 4, 5, 6]
+    assert report.errors[0][1] == "unknown student nobody"
+    assert [e.describe() for e in student.grade_history()] == ["90 (2025-1, 2025-10-01, x2)", "70"]
+
+def test_unknown_format_is_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        importer.detect_format(str(tmp_path / "students.xlsx"))
+
+def test_process_pool_keeps_file_order(tmp_path):
+    rows = [["id", "name", "surname", "class_name"]]
+    rows += [[f"s{i}", f"Name{i}" if i % 7 else "", "Kaya", "9-A"] for i in range(40)]
+    path = _write_csv(tmp_path / "students.csv", rows)
+    def summary(chunks):
+        # created_at is stamped at validation time, so it differs between runs
+        return [([(line, data["id"]) for line, data in records], errors) for records, errors in chunks]
+    serial = list(importer.iter_validated(path, "students", chunk_size=5, workers=1))
+    parallel = list(importer.iter_validated(path, "students", chunk_size=5, workers=2))
+    assert summary(parallel) == summary(serial)
+    assert [line for _, errors in parallel for line, _ in errors] == [2, 9, 16, 23, 30, 37]
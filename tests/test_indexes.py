@@ -0,0 +1,49 @@
+import pytest
+
+import storage
+from services import StudentManager
+
+@pytest.fixture
+def manager(tmp_path):
+    manager = StudentManager(storage.JsonBackend(str(tmp_path / "students.json")))
+    for name, surname, class_name in (("Ali", "Yilmaz", "9-A"), ("Ayse", "Kaya", "9-A"),
+                                      ("Ali", "Kaya", "9-B")):
+        manager.add_student(name, surname, class_name)
+    return manager
+
+def _ids(students):
+    return [s.id for s in students]
+
+def test_update_moves_the_student_between_index_buckets(manager):
+    ali, ayse, _ = manager.students
+    manager.update_student(ali.id, name="Veli", class_name="9-B")
+    assert _ids(manager.get_class_roster("9-A")) == [ayse.id]
+    assert ali.id in _ids(manager.get_class_roster("9-B"))
+    assert manager.find_by_name(name="Ali", surname="Yilmaz") == []
+    assert _ids(manager.find_by_name(name="veli")) == [ali.id]
+    assert _ids(manager.find_by_name(surname="Yilmaz")) == [ali.id]
+
+def test_rejected_update_leaves_the_indexes_intact(manager):
+    ali = manager.students[0]
+    with pytest.raises(ValueError):
+        manager.update_student(ali.id, name="Veli", class_name=9)
+    assert ali.id in _ids(manager.get_class_roster("9-A"))
+    assert ali.id in _ids(manager.find_by_name(name="Ali"))
+
+def test_delete_removes_the_student_from_every_index(manager):
+    ali, ayse, other_ali = manager.students
+    assert manager.delete_student(ali.id)
+    assert manager.get_student(ali.id) is None
+    assert _ids(manager.get_class_roster("9-A")) == [ayse.id]
+    assert _ids(manager.find_by_name(name="Ali")) == [other_ali.id]
+    assert _ids(manager.students) == [ayse.id, other_ali.id]
+    assert manager.loaded_count == 2
+
+def test_indexes_follow_another_processes_changes(manager, tmp_path):
+    ali = manager.students[0]
+    other = StudentManager(storage.JsonBackend(str(tmp_path / "students.json")))
+    other.update_student(ali.id, class_name="10-A")
+    other.delete_student(manager.students[1].id)
+    manager.sync()
+    assert _ids(manager.get_class_roster("10-A")) == [ali.id]
+    assert manager.get_class_roster("9-A") == []
@@ -0,0 +1,99 @@
+import json
+import os
+import subprocess
+import sys
+import time
+from contextlib import contextmanager
+
+import pytest
+
+from instrumentation import STATS, _timed
+
+PAUSE = 0.02
+
+@pytest.fixture(autouse=True)
+def stats():
+    STATS.reset()
+    yield
+    STATS.reset()
+
+def _timer(name):
+    return STATS.timers[name]
+
+def test_generators_are_timed_while_they_produce():
+    def produce(n):
+        for i in range(n):
+            time.sleep(PAUSE)
+            yield i
+        return "done"
+
+    opened = []
+    timed = _timed("produce", produce, lambda result, n: opened.append(n))
+    items = timed(3)
+    assert opened == [3] and "produce" not in STATS.timers
+    assert next(items) == 0
+    time.sleep(PAUSE * 5)   # The consumer's own time is not counted
+    assert list(items) == [1, 2]
+    timer = _timer("produce")
+    assert timer.calls == 1
+    assert PAUSE * 3 <= timer.total < PAUSE * 5
+
+def test_a_generator_closed_early_is_recorded_once():
+    def produce():
+        yield from range(10)
+
+    items = _timed("produce", produce)()
+    next(items)
+    items.close()
+    assert _timer("produce").calls == 1
+
+def test_context_managers_are_timed_over_the_with_block():
+    @contextmanager
+    def block():
+        yield "value"
+        time.sleep(PAUSE)
+
+    timed = _timed("block", block)
+    with pytest.raises(RuntimeError):
+        with timed() as value:
+            assert value == "value"
+            time.sleep(PAUSE)
+            raise RuntimeError
+    with timed():
+        time.sleep(PAUSE)
+    timer = _timer("block")
+    assert timer.calls == 2
+    assert timer.total >= PAUSE * 3
+
+def test_plain_functions_and_their_errors_are_timed():
+    def fail():
+        raise ValueError
+
+    timed = _timed("fail", fail)
+    with pytest.raises(ValueError):
+        timed()
+    assert _timer("fail").calls == 1
+    assert _timed("sum", sum)([1, 2]) == 3
+    assert _timer("sum").calls == 1
+
+SCRIPT = """
+import sys, time
+import instrumentation, storage
+from services import StudentManager
+path = sys.argv[1]
+storage.write_jsonl([{"id": "1", "name": "Ali", "surname": "Yilmaz", "class_name": "9-A"}], path)
+instrumentation.enable(sys.argv[2])
+manager = StudentManager(storage.JsonBackend(path))
+with manager.batch():
+    manager.add_grade("1", "Math", 90)
+    time.sleep(%s)
+"""
+
+def test_installed_timers_cover_batches_and_streamed_snapshots(tmp_path):
+    stats_file = tmp_path / "stats.json"
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    subprocess.run([sys.executable, "-c", SCRIPT % PAUSE, str(tmp_path / "students.jsonl"), str(stats_file)],
+                   cwd=root, check=True, capture_output=True)
+    operations = json.loads(stats_file.read_text())["operations"]
+    assert operations["StudentManager.batch"]["total_ms"] >= PAUSE * 1000
+    assert operations["storage.iter_jsonl"]["calls"] == 1
@@ -0,0 +1,91 @@
+import os
+
+import pytest
+
+import services
+import storage
+from services import StudentManager
+
+def _student(**fields):
+    return {"id": "s1", "name": "Ali", "surname": "Yilmaz", "class_name": "9-A", "grades": {},
+            "absence_count": 0, **fields}
+
+def test_grade_records_replay_idempotently():
+    records = [{"op": "grade", "id": "s1", "field": "Math", "value": 90, "pos": 0, "ts": "t1"},
+               {"op": "grade", "id": "s1", "field": "Math", "value": 70, "pos": 1, "ts": "t2", "weight": 2}]
+    once = storage.apply_records(_student(), records)
+    twice = storage.apply_records(once, records)
+    assert twice["grades"] == {"Math": [90, 70]}
+    assert twice["grade_info"]["Math"]["weight"] == [1, 2]
+    assert twice["updated_at"] == "t2"
+
+def test_grade_records_do_not_mutate_shared_lists():
+    grades = [90]
+    student = storage.apply_records(_student(grades={"Math": grades}),
+                                    [{"op": "grade", "id": "s1", "field": "Math", "value": 70, "pos": 1}])
+    assert grades == [90]
+    assert student["grades"]["Math"] == [90, 70]
+
+def test_grade_records_past_the_end_are_skipped_as_corrupt(capsys):
+    # The record for position 1 is missing, so 70 must not become the second grade
+    records = [{"op": "grade", "id": "s1", "field": "Math", "value": 90, "pos": 0, "ts": "t1"},
+               {"op": "grade", "id": "s1", "field": "Math", "value": 70, "pos": 2, "ts": "t3", "term": "2025-1"},
+               {"op": "grade", "id": "s1", "field": "Physics", "value": 60, "ts": "t4"}]
+    student = storage.apply_records(_student(), records)
+    assert student["grades"] == {"Math": [90], "Physics": [60]}
+    assert "grade_info" not in student
+    assert student["updated_at"] == "t4"
+    assert "corrupt journal record" in capsys.readouterr().out
+
+def test_absence_records_replay_idempotently():
+    records = [{"op": "absent", "id": "s1", "value": "2026-01-05", "count": 1},
+               {"op": "absent", "id": "s1", "value": "2026-01-06", "count": 2},
+               {"op": "present", "id": "s1", "value": "2026-01-05", "count": 1}]
+    once = storage.apply_records(_student(), records)
+    twice = storage.apply_records(once, records)
+    assert twice["absence_dates"] == ["2026-01-06"]
+    assert twice["absence_count"] == 1
+
+def test_add_set_and_delete_records():
+    records = [{"op": "add", "id": "s1", "value": _student()},
+               {"op": "set", "id": "s1", "field": "name", "value": "Veli"}]
+    assert storage.apply_records(None, records)["name"] == "Veli"
+    assert storage.apply_records(None, records + [{"op": "delete", "id": "s1"}]) is None
+
+def test_replay_keeps_snapshot_order_and_appends_new_students():
+    records = [{"op": "add", "id": "s3", "value": _student(id="s3")},
+               {"op": "delete", "id": "s1"},
+               {"op": "set", "id": "s2", "field": "name", "value": "Veli"}]
+    data = storage.replay_journal([_student(id="s1"), _student(id="s2")], records)
+    assert [(s["id"], s["name"]) for s in data] == [("s2", "Veli"), ("s3", "Ali")]
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "students.json")
+
+def test_mutations_are_journaled_and_replayed_on_load(path):
+    manager = StudentManager(storage.JsonBackend(path))
+    student = manager.add_student("Ali", "Yilmaz", "9-A")
+    manager.add_grade(student.id, "Math", 90, term="2025-1")
+    manager.mark_absent(student.id, "2026-01-05")
+    assert not os.path.exists(path)
+    assert manager.backend.pending_changes() == 3
+
+    loaded = StudentManager(storage.JsonBackend(path)).get_student(student.id)
+    assert loaded.grades == {"Math": [90]}
+    assert loaded.grade_history()[0].term == "2025-1"
+    assert loaded.absence_days() == ["2026-01-05"]
+
+def test_journal_is_compacted_at_the_threshold(path, monkeypatch):
+    monkeypatch.setattr(services, "COMPACT_THRESHOLD", 5)
+    manager = StudentManager(storage.JsonBackend(path))
+    student = manager.add_student("Ali", "Yilmaz", "9-A")
+    for grade in range(3):
+        manager.add_grade(student.id, "Math", grade)
+    assert not os.path.exists(path)
+
+    manager.add_grade(student.id, "Math", 3)
+    assert os.path.exists(path)
+    assert not os.path.exists(storage.journal_file(path))
+    assert manager.backend.pending_changes() == 0
+    assert StudentManager(storage.JsonBackend(path)).get_student(student.id).grades == {"Math": [0, 1, 2, 3]}
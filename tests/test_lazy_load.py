@@ -0,0 +1,69 @@
+import asyncio
+
+import pytest
+
+import storage
+from jobs import JobRunner
+from server import StudentServer
+from services import StudentManager
+
+COUNT = 250
+
+@pytest.fixture(params=["json", "jsonl", "sqlite"])
+def backend(request, tmp_path):
+    if request.param == "sqlite":
+        from sqlite_storage import SQLiteBackend
+        make = lambda: SQLiteBackend(str(tmp_path / "students.db"))
+    else:
+        make = lambda: storage.JsonBackend(str(tmp_path / f"students.{request.param}"))
+    manager = StudentManager(make())
+    with manager.batch():
+        ids = [manager.add_student(f"Student{i:03}", "Yilmaz", "9-A").id for i in range(COUNT)]
+    manager.backend.close()
+    return make, ids
+
+def test_load_next_indexes_in_batches(backend):
+    make, ids = backend
+    manager = StudentManager(make(), lazy=True)
+    assert manager.loaded_count == 0 and not manager.fully_loaded
+    assert manager.load_next(100) == 100
+    assert manager.loaded_count == 100
+    assert manager.load_next(100) == 100
+    assert manager.load_next(100) == COUNT - 200
+    assert manager.fully_loaded
+    assert [s.id for s in manager.students] == ids
+
+def test_lookups_before_the_load_finishes(backend):
+    make, ids = backend
+    manager = StudentManager(make(), lazy=True)
+    assert manager.get_student(ids[10]).name == "Student010"
+    assert manager.loaded_count == 11
+    assert manager.get_student("missing") is None
+    assert manager.fully_loaded
+    assert [s.id for s in manager.students] == ids
+
+def test_whole_roster_queries_finish_the_load(backend):
+    make, ids = backend
+    manager = StudentManager(make(), lazy=True)
+    assert len(manager.search("student")) == COUNT
+    assert manager.fully_loaded
+
+def test_server_builds_on_the_worker_and_indexes_on_the_loop(backend):
+    make, ids = backend
+    jobs = JobRunner()
+    try:
+        # As server.run does it: the backend (a SQLite connection) belongs to the worker
+        manager = jobs.submit(lambda: StudentManager(make(), lazy=True)).result()
+        server = StudentServer(manager, jobs)
+        assert server.dispatch("GET", "/health", {}, {})[1] == {"status": "loading", "students": 0}
+        asyncio.run(server._finish_loading())
+        assert server.dispatch("GET", "/health", {}, {})[1] == {"status": "ok", "students": COUNT}
+        assert [s["id"] for s in server.dispatch("GET", "/students", {"limit": "5"}, {})[1]] == ids[:5]
+    finally:
+        jobs.shutdown(wait=True)
+
+def test_sync_without_changes_does_not_finish_the_load(backend):
+    make, _ = backend
+    manager = StudentManager(make(), lazy=True)
+    assert manager.sync() == 0
+    assert manager.loaded_count == 0
@@ -0,0 +1,43 @@
+import pytest
+
+import storage
+from models import MODELS
+from services import StudentManager
+
+# name -> (lesson, grade, term, weight) rows
+GRADES = {
+    "Ayşe": [("Math", 90, "2025-1", 1), ("Physics", 40, "2025-1", 3), ("Math", 100, "2025-2", 1)],
+    "Ali": [("Math", 70, "2025-1", 1), ("History", 80, "2025-1", 1)],
+    "Can": [("Math", 95, None, 1), ("History", 60, "2025-2", 1)],
+    "Deniz": [("Physics", 75, "2025-1", 2)],
+}
+
+@pytest.fixture(params=sorted(MODELS))
+def manager(request, tmp_path):
+    manager = StudentManager(storage.JsonBackend(str(tmp_path / "students.json")), model=MODELS[request.param])
+    for name, rows in GRADES.items():
+        student_id = manager.add_student(name, "Yilmaz", "9-A").id
+        for lesson, grade, term, weight in rows:
+            manager.add_grade(student_id, lesson, grade, term=term, weight=weight)
+    return manager
+
+def _names(students):
+    return [s.name for s in students]
+
+def test_term_ranking_uses_that_terms_grades_only(manager):
+    assert _names(manager.rank_students(term="2025-1")) == ["Ali", "Deniz", "Ayşe"]
+    assert _names(manager.rank_students(term="2025-1", weighted=True)) == ["Ali", "Deniz", "Ayşe"]
+    assert _names(manager.rank_students(term="2025-1", ascending=True, limit=1)) == ["Ayşe"]
+    assert _names(manager.rank_students(term="2025-2", lesson="Math")) == ["Ayşe"]
+    assert _names(manager.rank_students(by="absence", term="2025-2")) == ["Ayşe", "Can"]
+    assert manager.rank_students(term="2024-2") == []
+
+def test_term_ranking_follows_grades_added_after_a_ranking(manager):
+    manager.rank_students(term="2025-1")
+    deniz = next(s for s in manager.students if s.name == "Deniz")
+    manager.add_grade(deniz.id, "Math", 100, term="2025-1")
+    can = next(s for s in manager.students if s.name == "Can")
+    manager.add_grade(can.id, "Math", 10, term="2025-1")
+    assert _names(manager.rank_students(term="2025-1")) == ["Deniz", "Ali", "Ayşe", "Can"]
+    assert deniz.grade_stats(term="2025-1").count == 2
+    assert deniz.average(term="2025-1", weighted=True) == pytest.approx((75 * 2 + 100) / 3)
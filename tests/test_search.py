@@ -0,0 +1,70 @@
+from types import SimpleNamespace
+
+import pytest
+
+import storage
+from search import SearchIndex, fold, matches
+from services import StudentManager
+
+def _student(student_id, name, surname, class_name="9-A"):
+    return SimpleNamespace(id=student_id, name=name, surname=surname, class_name=class_name)
+
+STUDENTS = [
+    _student("s1", "IŞIK", "Yılmaz"),
+    _student("s2", "İsmail", "Kaya", "10-B"),
+    _student("s3", "Ali", "Halıcı"),
+    _student("s4", "ilker", "ÇELİK", "11-C"),
+]
+
+@pytest.mark.parametrize("text, expected", [
+    ("IŞIK", "işik"), ("ışık", "işik"), ("İSMAİL", "ismail"), ("Ilgaz", "ilgaz"),
+    ("ÇELİK", "çelik"), ("Straße", "strasse"), (None, ""),
+])
+def test_turkish_case_folding(text, expected):
+    assert fold(text) == expected
+
+@pytest.mark.parametrize("query, expected", [
+    ("ışık", ["s1"]), ("ISIK", []), ("işık", ["s1"]),          # ş is a letter of its own
+    ("ismail", ["s2"]), ("İSMAİL", ["s2"]), ("ılker", ["s4"]),
+    ("i", ["s1", "s2", "s4"]),                                  # one letter: word prefixes
+    ("al", ["s3"]),                                             # not the "al" inside "Halıcı"
+    ("lıc", ["s3"]), ("ELIK", ["s4"]),                          # three or more: anywhere
+    ("yilmaz 9-a", ["s1"]), ("ali kaya", []), ("10-b", ["s2"]), ("S2", ["s2"]),
+    ("", ["s1", "s2", "s3", "s4"]), ("zzz", []),
+])
+def test_prefix_and_trigram_search(query, expected):
+    index = SearchIndex(STUDENTS)
+    assert index.search(query) == expected
+    assert [s.id for s in STUDENTS if matches(s, query)] == expected
+
+def test_typing_on_reuses_and_widens_results_correctly():
+    index = SearchIndex(STUDENTS)
+    assert index.search("i") == ["s1", "s2", "s4"]
+    assert index.search("il") == ["s4"]
+    # Two to three characters switches from prefixes to substrings: "ali" is in "Halıcı"
+    assert index.search("al") == ["s3"]
+    assert index.search("alı") == ["s3"]
+    assert index.search("ali") == ["s3"]
+    assert index.search("ma") == []
+    assert index.search("mai") == ["s2"]
+
+def test_updates_keep_the_result_order():
+    index = SearchIndex(STUDENTS)
+    renamed = _student("s1", "Işıl", "Yılmaz")
+    index.add(renamed)
+    assert index.search("ışı") == ["s1"]
+    assert index.search("i") == ["s1", "s2", "s4"]
+    index.remove("s2", keep_position=False)
+    index.add(STUDENTS[1])
+    assert index.search("i") == ["s1", "s4", "s2"]
+
+def test_manager_search_follows_edits(tmp_path):
+    manager = StudentManager(storage.JsonBackend(str(tmp_path / "students.json")))
+    isik = manager.add_student("IŞIK", "Yılmaz", "9-A")
+    ilker = manager.add_student("ilker", "Çelik", "9-B")
+    assert manager.search("işık") == [isik]
+    assert manager.find_by_name(name="ışık") == [isik]
+    manager.update_student(ilker.id, surname="Işıklı")
+    assert manager.search("ışık") == [isik, ilker]
+    manager.delete_student(isik.id)
+    assert manager.search("IŞIK") == [ilker]
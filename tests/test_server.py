@@ -0,0 +1,90 @@
+import asyncio
+import json
+from http import HTTPStatus
+
+import pytest
+
+import storage
+from jobs import JobRunner
+from server import HTTPError, StudentServer
+from services import StudentManager
+
+@pytest.fixture
+def server(tmp_path):
+    manager = StudentManager(storage.JsonBackend(str(tmp_path / "students.json")))
+    jobs = JobRunner()
+    server = StudentServer(manager, jobs)
+    manager.writer = None   # Stored inline, so dispatch() can be called without an event loop
+    ali = manager.add_student("Ali", "Yilmaz", "9-A")
+    for day in ("2025-03-06", "2025-03-07", "2025-03-10"):   # Thursday to Monday
+        manager.mark_absent(ali.id, day)
+    manager.mark_absent(manager.add_student("Ayse", "Kaya", "9-A").id, "2025-03-05")
+    yield server
+    jobs.shutdown()
+
+def _status(server, method, path, query=None, body=None):
+    try:
+        return server.dispatch(method, path, query or {}, body or {})[0]
+    except HTTPError as e:
+        return e.status
+
+@pytest.mark.parametrize("method, path, query, body", [
+    ("POST", "/students", {}, {"name": "Ali", "surname": ""}),
+    ("GET", "/students", {"limit": "-1"}, {}),
+    ("GET", "/students", {"offset": "ten"}, {}),
+    ("GET", "/students", {"sort": "height"}, {}),
+    ("POST", "/grades", {}, {"rows": [["id", "Math"]]}),
+    ("POST", "/grades", {}, {"rows": "id,Math,90"}),
+    ("POST", "/classes/9-A/roll-call", {}, {"absent": "id"}),
+    ("GET", "/absences", {"from": "2025-13-01"}, {}),
+    ("GET", "/absences/streaks", {"min_days": "0"}, {}),
+    ("GET", "/absences/streaks", {"min_days": "-2"}, {}),
+    ("GET", "/absences/streaks", {"to": "yesterday"}, {}),
+])
+def test_bad_requests_are_400(server, method, path, query, body):
+    assert _status(server, method, path, query, body) == HTTPStatus.BAD_REQUEST
+
+def test_bad_student_fields_are_400(server):
+    student_id = server.manager.students[0].id
+    assert _status(server, "PATCH", f"/students/{student_id}", body={"name": " "}) == HTTPStatus.BAD_REQUEST
+    assert _status(server, "PATCH", f"/students/{student_id}", body={"class_name": 9}) == HTTPStatus.BAD_REQUEST
+    assert _status(server, "POST", f"/students/{student_id}/grades",
+                   body={"lesson": "Math", "grade": "90"}) == HTTPStatus.BAD_REQUEST
+    assert _status(server, "POST", f"/students/{student_id}/attendance",
+                   body={"amount": True}) == HTTPStatus.BAD_REQUEST
+    assert _status(server, "GET", f"/students/{student_id}/attendance",
+                   {"from": "03/06/2025"}) == HTTPStatus.BAD_REQUEST
+    assert server.manager.get_student(student_id).name == "Ali"
+
+def test_absence_streak_thresholds(server):
+    def streaks(min_days=None):
+        query = {} if min_days is None else {"min_days": min_days}
+        return [(row["name"], row["streak"]) for row in server.dispatch("GET", "/absences/streaks", query, {})[1]]
+    # The weekend does not break Ali's streak
+    assert streaks() == [("Ali", 3)]
+    assert streaks("1") == [("Ali", 3), ("Ayse", 1)]
+    assert streaks("4") == []
+
+async def _exchange(server, raw: bytes):
+    listener = await asyncio.start_server(server.handle_connection, "127.0.0.1", 0)
+    async with listener:
+        reader, writer = await asyncio.open_connection(*listener.sockets[0].getsockname()[:2])
+        writer.write(raw)
+        await writer.drain()
+        response = await asyncio.wait_for(reader.read(), 5)
+        writer.close()
+    head, _, body = response.partition(b"\r\n\r\n")
+    return head.decode("latin-1"), json.loads(body)
+
+@pytest.mark.parametrize("raw", [
+    b"GET\r\n\r\n",
+    b"POST /students HTTP/1.1\r\nContent-Length: 4\r\n\r\n{bad",
+    b"POST /students HTTP/1.1\r\nContent-Length: 3\r\n\r\n[1]",
+    b"POST /students HTTP/1.1\r\nContent-Length: four\r\n\r\n",
+])
+def test_malformed_http_is_400_and_closes_the_connection(server, raw):
+    # Sent as keep-alive: the server still closes, so reading to the end returns
+    head, body = asyncio.run(_exchange(server, raw))
+    assert head.startswith("HTTP/1.1 400 ")
+    assert "Connection: close" in head
+    assert "error" in body
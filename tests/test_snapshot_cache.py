@@ -0,0 +1,85 @@
+import json
+import os
+
+import pytest
+
+import snapshot_cache
+import storage
+from models import Student
+
+def _students():
+    return [
+        {"id": "s1", "name": "Ayşe", "surname": "Yılmaz", "class_name": "9-A",
+         "grades": {"Math": [90, 70], "Physics": []}, "absence_count": 2, "absence_dates": ["2026-01-05"],
+         "created_at": "2026-01-01T00:00:00", "updated_at": "2026-01-02T00:00:00"},
+        {"id": "s2", "name": "Ali", "surname": "Kaya", "class_name": "10-B",
+         "grades": {"Math": [55], "History": [80, 85, 60]}, "absence_count": 0,
+         "grade_info": {"History": {"term": ["2025-1", None, "2025-2"], "date": [None, "2025-10-01", None],
+                                    "weight": [1, 2, 0.5]}},
+         "created_at": None, "updated_at": None},
+    ]
+
+@pytest.fixture
+def path(tmp_path):
+    path = str(tmp_path / "students.json")
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(_students(), f)
+    return path
+
+def _without_stats(students):
+    return [{k: v for k, v in s.items() if k != "grade_stats"} for s in students]
+
+def test_round_trip(path):
+    assert snapshot_cache.write_cache(path, _students())
+    assert _without_stats(snapshot_cache.load_cache(path, plain_ids={"s1", "s2"})) == _students()
+
+def test_grade_info_round_trip(path):
+    snapshot_cache.write_cache(path, _students())
+    info = snapshot_cache.load_cache(path, plain_ids={"s2"})[1]["grade_info"]
+    assert info == {"History": {"term": ["2025-1", None, "2025-2"], "date": [None, "2025-10-01", None],
+                                "weight": [1, 2, 0.5]}}
+    assert snapshot_cache.load_cache(path)[1]["grade_info"]["History"].to_dict() == info["History"]
+
+def test_cached_students_match_the_json_ones(path):
+    snapshot_cache.write_cache(path, _students())
+    for cached, data in zip(snapshot_cache.load_cache(path), _students()):
+        student, expected = Student.from_dict(cached), Student.from_dict(data)
+        assert student == expected
+        assert student.lesson_stats == expected.lesson_stats and student.stats == expected.stats
+        assert student.term_stats == expected.term_stats and student.term_totals == expected.term_totals
+    assert Student.from_dict(cached).average(term="2025-2", weighted=True) == 60
+
+def test_journal_records_apply_on_top_of_the_cache(path):
+    snapshot_cache.write_cache(path, _students())
+    storage.append_journal([{"op": "grade", "id": "s2", "field": "History", "value": 100, "pos": 3, "term": "2025-2"},
+                            {"op": "absent", "id": "s2", "value": "2026-02-02", "count": 1}], path)
+    students = [Student.from_dict(s) for s in storage.JsonBackend(path).iter_students()]
+    assert students[1].grades["History"] == [80, 85, 60, 100]
+    assert students[1].average("History", term="2025-2") == 80
+    assert students[1].absence_days() == ["2026-02-02"]
+    assert students[0].absence_days() == ["2026-01-05"]
+
+def test_changed_snapshot_makes_the_cache_stale(path):
+    snapshot_cache.write_cache(path, _students())
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write("\n")
+    assert snapshot_cache.load_cache(path) is None
+
+def test_cache_of_another_format_is_ignored(path):
+    snapshot_cache.write_cache(path, _students())
+    with open(snapshot_cache.cache_file(path), 'r+b') as f:
+        f.write(b'SMC1')
+    assert snapshot_cache.load_cache(path) is None
+
+def test_truncated_cache_is_ignored(path):
+    snapshot_cache.write_cache(path, _students())
+    cache = snapshot_cache.cache_file(path)
+    with open(cache, 'r+b') as f:
+        f.truncate(os.path.getsize(cache) // 2)
+    assert snapshot_cache.load_cache(path) is None
+
+def test_values_containing_the_separator_are_not_cached(path):
+    students = _students()
+    students[0]["name"] = "A" + snapshot_cache.SEP + "B"
+    assert not snapshot_cache.write_cache(path, students)
+    assert snapshot_cache.load_cache(path) is None
@@ -0,0 +1,53 @@
+import json
+import os
+
+import pytest
+
+import storage
+from backup_store import BackupStore
+
+def _record(student_id, **fields):
+    return {"id": student_id, "name": "Ali", "surname": "Yilmaz", "class_name": "9-A", "grades": {},
+            "absence_count": 0, "created_at": "2026-01-01T00:00:00", "updated_at": "2026-01-01T00:00:00",
+            **fields}
+
+def _ids(path):
+    return [s["id"] for s in storage.JsonBackend(path).load()]
+
+def _corrupt(path):
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('[{"id": "a", ')
+
+@pytest.fixture
+def path(tmp_path):
+    path = str(tmp_path / "students.json")
+    # An old-style backup, older than anything in the store
+    with open(f"{path}.20200101_000000.bak", 'w', encoding='utf-8') as f:
+        json.dump([_record("legacy", name="Legacy")], f)
+    return path
+
+def test_corrupt_snapshot_is_recovered_from_backup_store(path):
+    backend = storage.JsonBackend(path)
+    backend.save_all([_record("a"), _record("b")])
+    assert backend.backup().startswith("Backup created")
+    backend.save_all([_record("a"), _record("b"), _record("c")])
+    _corrupt(path)
+    assert _ids(path) == ["a", "b"]
+
+def test_corrupt_backup_falls_back_to_an_older_one(path):
+    backend = storage.JsonBackend(path)
+    backend.save_all([_record("a")])
+    backend.backup()
+    backend.save_all([_record("a", name="Veli")])
+    backend.backup()
+    store = BackupStore(storage.backup_dir(path), os.path.basename(path))
+    newest, = store.find()["chunks"]
+    with open(store._object_path(newest), 'wb') as f:
+        f.write(b"r[]")
+    _corrupt(path)
+    assert [s["name"] for s in storage.JsonBackend(path).load()] == ["Ali"]
+
+def test_legacy_backup_is_used_when_the_store_is_empty(path):
+    storage.JsonBackend(path).save_all([_record("a")])
+    _corrupt(path)
+    assert _ids(path) == ["legacy"]